@@ -12,7 +12,7 @@ from services.handle_auth import verify_jwt_token, AuthError
 from services.handle_api_keys import validate_api_key
 
 app = Flask(__name__)
-CORS(app, expose_headers=["X-Total-Count", "X-Page-Size", "X-Page-Number", "X-Total-Pages"])
+CORS(app, expose_headers=["X-Total-Count", "X-Page-Size", "X-Page-Number", "X-Total-Pages", "X-Next-Cursor", "X-Audio-Key"])
 
 def login_required(f):
     @wraps(f)
@@ -1,12 +1,10 @@
 import os
-from openai import OpenAI
+from libs.provider_clients import get_openai_client
 from typing import List, Dict, Any, Optional
 from data_classes.common_classes import Message, Language, Agent, AgentStatus
 from datetime import datetime
 from services.handle_agent import get_agent_by_id
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-# Initialize OpenAI client
-client = OpenAI(api_key=OPENAI_API_KEY)
 
 SYSTEM_PROMPT_VI = """
 Bạn là một vị tăng AI: từ bi, điềm tĩnh, và nói tiếng Việt, xưng hô như một vị tăng.
@@ -102,7 +100,7 @@ def generate_answer(
             chat_messages.append({"role": msg.role, "content": msg.content})
 
         # Generate the response with streaming
-        stream = client.chat.completions.create(
+        stream = get_openai_client(OPENAI_API_KEY).chat.completions.create(
             model=model, 
             messages=chat_messages,
             temperature=temperature,
@@ -1,13 +1,16 @@
 import asyncio
-from typing import List, Dict, Any, Optional, AsyncGenerator
+import threading
+from typing import List, Dict, Any, Optional, AsyncGenerator, Tuple
 from langgraph.prebuilt import create_react_agent
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
 from data_classes.common_classes import Message, Language, AppMessageResponse
 from data_classes.common_classes import MessageType, AgentRole
-from langchain_core.prompts import PromptTemplate
 from agents.extract_message import extract_message_content, find_messages_in_chunk
 from agents.tools.buddha_agent_builder_tools_manager import handle_approval_response, create_frontend_friendly_tools, buddha_agent_tools
 from libs.langchain import get_langchain_model
-from libs.file_utils import load_prompt_file
+from libs.file_utils import load_prompt_file_cached
+from libs.event_loop import run_coroutine
+from libs.lazy import lazy
 
 #  4 chức năng chính
 
@@ -19,22 +22,55 @@ from libs.file_utils import load_prompt_file
 
 # Tập làm Kệ: Sáng tác thơ kệ Phật giáo với sự hướng dẫn của BuddhaAI. Học cách diễn đạt tâm tư, cảm xúc qua ngôn ngữ thơ ca.
 
-# Initialize OpenAI model
-model = get_langchain_model(model="gpt-4o-mini", temperature=0.7)
+# OpenAI model, built when the first graph is compiled
+model = lazy("buddha_agent_builder.model", lambda: get_langchain_model(model="gpt-4o-mini", temperature=0.7))
 
 # Buddha Agent Builder tools
 
-buddha_agent_prompt = PromptTemplate.from_template("""
+buddha_agent_prompt = """
 {system_prompt}
 
-Current conversation:
-{chat_history}
-
 IMPORTANT: Always respond in {answer_language} regardless of input. Do NOT use any other language.
+"""
+
+PROMPT_FILES = {
+    Language.VI.value: "agents/prompts/buddha_agent_builder_vi.txt",
+    Language.EN.value: "agents/prompts/buddha_agent_builder_en.txt",
+}
+
+# (language, tool names) -> compiled graph
+compiled_agents: Dict[Tuple[str, Tuple[str, ...]], Any] = {}
+compiled_agents_lock = threading.Lock()
+
+def build_system_prompt(language: str) -> str:
+    """System prompt for a language, picking up edits to the prompt files"""
+    system_prompt = load_prompt_file_cached(PROMPT_FILES.get(language, PROMPT_FILES[Language.EN.value]))
+    return buddha_agent_prompt.format(
+        system_prompt=system_prompt or "",
+        answer_language="Tiếng Việt" if language == Language.VI.value else "English",
+    )
+
+def get_buddha_agent_builder(language: str, tools: List = buddha_agent_tools):
+    """
+    Return the compiled Buddha Agent Builder graph for a language and toolset.
 
-Human: {input}
-{agent_scratchpad}
-""")
+    Graphs are compiled once per process. The system prompt is resolved on
+    every run, so prompt file edits apply without recompiling.
+    """
+    key = (language, tuple(tool.name for tool in tools))
+    with compiled_agents_lock:
+        agent = compiled_agents.get(key)
+        if agent is None:
+            def prompt(state) -> List[BaseMessage]:
+                return [SystemMessage(content=build_system_prompt(language))] + state["messages"]
+
+            agent = create_react_agent(
+                model=model.instance(),
+                tools=create_frontend_friendly_tools(tools),
+                prompt=prompt,
+            )
+            compiled_agents[key] = agent
+        return agent
 
 
 ENGLISH_SYSTEM_PROMPT = """
@@ -160,7 +196,10 @@ async def generate_buddha_agent_response(
     try:
         # Handle approval response first
         if approval_response:
-            for response in handle_approval_response(approval_response, language):
+            # Running the approved tool makes blocking Weaviate and LLM
+            # calls, so keep it off the event loop
+            responses = await asyncio.to_thread(list, handle_approval_response(approval_response, language))
+            for response in responses:
                 yield response
             return
         
@@ -183,37 +222,18 @@ async def generate_buddha_agent_response(
             ])
             latest_message = f"{latest_message}\n\nRelevant context:\n{context_text}"
         
-        # Prepare chat history as string
-        chat_history = []
+        # Pass the conversation as graph state
+        chat_messages: List[BaseMessage] = []
         for msg in messages[:-1]:  # Exclude the latest message
             if msg.role == "user":
-                chat_history.append(f"Human: {msg.content}")
+                chat_messages.append(HumanMessage(content=msg.content))
             elif msg.role == "assistant":
-                chat_history.append(f"Assistant: {msg.content}")
-        
-        chat_history_str = "\n".join(chat_history)
-        # system_prompt = ENGLISH_SYSTEM_PROMPT if language == Language.EN.value else VIETNAMESE_SYSTEM_PROMPT
-        
-        vi_system_prompt = load_prompt_file(filepath="agents/prompts/buddha_agent_builder_vi.txt")
-        en_system_prompt = load_prompt_file(filepath="agents/prompts/buddha_agent_builder_en.txt")
-        system_prompt = vi_system_prompt if language == Language.VI.value else en_system_prompt
-        input_buddha_agent_prompt = buddha_agent_prompt.format(
-            system_prompt=system_prompt,
-            chat_history=chat_history_str,
-            answer_language="Tiếng Việt" if language == Language.VI.value else "English",
-            input=latest_message,
-            agent_scratchpad=""
-        )
-    
-        # Create the Buddha Agent Builder
-        buddha_agent_builder = create_react_agent(
-            model=model,
-            tools=create_frontend_friendly_tools(buddha_agent_tools),
-            prompt=input_buddha_agent_prompt,
-            debug=True
-        )
+                chat_messages.append(AIMessage(content=msg.content))
+        chat_messages.append(HumanMessage(content=latest_message))
+
+        buddha_agent_builder = get_buddha_agent_builder(getattr(language, "value", language))
   
-        async for event in buddha_agent_builder.astream_events(input={"input": latest_message}, version="v2"):
+        async for event in buddha_agent_builder.astream_events(input={"messages": chat_messages}, version="v2"):
             event_type = event.get("event")
             
             # Stream tool messages (including approval requests)
@@ -297,14 +317,14 @@ def generate_buddha_agent_response_sync(messages: List[Message], contexts: List[
         The complete response as a string
     """
     try:
-        # Use asyncio to run the async generator
+        # Run the async generator on the shared event loop
         async def collect_responses():
             response_parts = []
             async for message in generate_buddha_agent_response(messages, contexts, options, language):
                 response_parts.append(str(message))
             return " ".join(response_parts)
         
-        return asyncio.run(collect_responses())
+        return run_coroutine(collect_responses())
         
     except Exception as e:
         if language == Language.VI.value:
@@ -1,11 +1,9 @@
 import os
-from openai import OpenAI
+from libs.provider_clients import get_openai_client
 from typing import List, Dict, Any, Optional
 from data_classes.common_classes import Message, Language
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-# Initialize OpenAI client
-client = OpenAI(api_key=OPENAI_API_KEY)
 
 
 SYSTEM_PROMPT = """You are a context generation engine that updates a list of concise behavior rules for an AI assistant.
@@ -36,7 +34,7 @@ def generate_context(user_prompt: str, previous_context: Optional[str]) -> Optio
         system_prompt = system_prompt.replace("{previous_context}", previous_context or "")
         system_prompt = system_prompt.replace("{user_prompt}", user_prompt)
         
-        response = client.chat.completions.create(
+        response = get_openai_client(OPENAI_API_KEY).chat.completions.create(
             model="gpt-4o-mini",
             messages=[
                 {"role": "system", "content": system_prompt},
@@ -6,13 +6,13 @@ from langchain_core.tools import tool
 
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.messages import HumanMessage, AIMessage
-from libs.weaviate_lib import client, search_documents, insert_to_collection, update_collection_object, delete_collection_object, COLLECTION_AGENTS
+from libs.weaviate_lib import get_collection, search_documents, insert_to_collection, update_collection_object, delete_collection_object, COLLECTION_AGENTS
 from data_classes.common_classes import Message, Language, AgentStatus
 from datetime import datetime
 import uuid
 import weaviate.classes as wvc
 from libs.langchain import get_langchain_model
-model = get_langchain_model(model="gemini-2.5-flash", temperature=0.7)
+from libs.lazy import lazy
 # Tools for the meta agent
 @tool
 def create_agent(name: str, description: str, system_prompt: str, tools: List[str], model: str = "gpt-4o-mini", temperature: float = 0, author: str = "system") -> Dict[str, Any]:
@@ -72,7 +72,7 @@ def list_agents(author: str = "system", limit: int = 10) -> List[Dict[str, Any]]
         List of agent configurations
     """
     try:
-        collection = client.collections.get(COLLECTION_AGENTS)
+        collection = get_collection(COLLECTION_AGENTS)
         response = collection.query.fetch_objects(
             limit=limit,
             filters=wvc.query.Filter.by_property("author").equal(author)
@@ -100,7 +100,7 @@ def get_agent(agent_id: str) -> Dict[str, Any]:
         Agent configuration
     """
     try:
-        collection = client.collections.get(COLLECTION_AGENTS)
+        collection = get_collection(COLLECTION_AGENTS)
         response = collection.query.fetch_object_by_id(agent_id)
         
         if response:
@@ -184,7 +184,7 @@ def search_agents(query: str, limit: int = 5) -> List[Dict[str, Any]]:
         List of matching agents
     """
     try:
-        collection = client.collections.get(COLLECTION_AGENTS)
+        collection = get_collection(COLLECTION_AGENTS)
         response = collection.query.near_text(
             query=query,
             limit=limit,
@@ -365,12 +365,12 @@ Always be helpful, patient, and thorough in your explanations. Focus on creating
     # MessagesPlaceholder(variable_name="agent_scratchpad"),
 ])
 
-# Create the meta agent
-meta_agent = create_react_agent(
-    model=model,
+# Create the meta agent on first use
+meta_agent = lazy("meta_agent", lambda: create_react_agent(
+    model=get_langchain_model(model="gemini-2.5-flash", temperature=0.7),
     tools=meta_agent_tools,
     prompt=meta_agent_prompt,
-)
+))
 
 def generate_meta_agent_response(messages: List[Message], contexts: List[Dict[str, str]] = None, options: Optional[Dict[str, Any]] = None, language: Language = Language.EN) -> str:
     """
@@ -1,11 +1,9 @@
 import os
-from openai import OpenAI
+from libs.provider_clients import get_openai_client
 from typing import List, Dict, Any, Optional
 from data_classes.common_classes import Message, Language
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-# Initialize OpenAI client
-client = OpenAI(api_key=OPENAI_API_KEY)
 
 # System prompts for different languages
 SYSTEM_PROMPT_VI = """Bạn là một trợ lý AI chuyên nghiệp trong việc tóm tắt nội dung cuộc trò chuyện.
@@ -55,7 +53,7 @@ def generate_summary(messages: List[Message], language: Language = Language.VI)
             system_prompt = SYSTEM_PROMPT_EN
         
         # Generate summary using OpenAI
-        response = client.chat.completions.create(
+        response = get_openai_client(OPENAI_API_KEY).chat.completions.create(
             model="gpt-4o-mini",
             messages=[
                 {"role": "system", "content": system_prompt},
@@ -102,7 +100,7 @@ def generate_detailed_summary(messages: List[Message]) -> str:
         The summary should be concise but informative."""
         
         # Generate detailed summary using OpenAI
-        response = client.chat.completions.create(
+        response = get_openai_client(OPENAI_API_KEY).chat.completions.create(
             model="gpt-4o-mini",
             messages=[
                 {"role": "system", "content": system_prompt},
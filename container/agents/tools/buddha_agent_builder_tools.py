@@ -2,7 +2,7 @@ import json
 from typing import List, Dict, Any
 from langchain_core.tools import tool
 from langchain_core.prompts import ChatPromptTemplate
-from libs.weaviate_lib import client, insert_to_collection, COLLECTION_AGENTS, COLLECTION_DOCUMENTS, get_object_by_id
+from libs.weaviate_lib import get_collection, insert_to_collection, COLLECTION_AGENTS, COLLECTION_DOCUMENTS, get_object_by_id
 from datetime import datetime
 import uuid
 from weaviate.collections.classes.filters import Filter
@@ -178,7 +178,7 @@ def list_buddhist_agents(author: str = "system", limit: int = 10) -> List[Dict[s
     """
     try:
         filters = (Filter.by_property("agent_type").equal("buddhist"))
-        collection = client.collections.get(COLLECTION_AGENTS)
+        collection = get_collection(COLLECTION_AGENTS)
         response = collection.query.fetch_objects(
             limit=limit,
             filters=filters
@@ -497,7 +497,7 @@ def search_buddhist_agents(query: str, limit: int = 5) -> List[Dict[str, Any]]:
         List of matching Buddhist agents
     """
     try:
-        collection = client.collections.get(COLLECTION_AGENTS)
+        collection = get_collection(COLLECTION_AGENTS)
         response = collection.query.near_text(
             query=query,
             limit=limit,
@@ -530,7 +530,7 @@ def test_buddhist_agent(agent_id: str, test_input: str) -> Dict[str, Any]:
     """
     try:
         # Get agent configuration
-        collection = client.collections.get(COLLECTION_AGENTS)
+        collection = get_collection(COLLECTION_AGENTS)
         response = collection.query.fetch_object_by_id(agent_id)
         
         if not response:
@@ -730,7 +730,7 @@ def update_buddhist_agent(agent_id: str, updates: Dict[str, Any]) -> Dict[str, A
         Dictionary containing the update result
     """
     try:
-        collection = client.collections.get(COLLECTION_AGENTS)
+        collection = get_collection(COLLECTION_AGENTS)
         
         # Check if agent exists
         existing_agent = collection.query.fetch_object_by_id(agent_id)
@@ -778,7 +778,7 @@ def delete_buddhist_agent(agent_id: str) -> Dict[str, Any]:
         Dictionary containing the deletion result
     """
     try:
-        collection = client.collections.get(COLLECTION_AGENTS)
+        collection = get_collection(COLLECTION_AGENTS)
         
         # Check if agent exists
         existing_agent = collection.query.fetch_object_by_id(agent_id)
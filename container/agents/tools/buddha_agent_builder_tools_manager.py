@@ -1,24 +1,27 @@
+import asyncio
 import json
 from typing import List, Dict, Any, Optional, Generator
 from langchain_core.tools import tool, BaseTool
 from langchain_core.prompts import ChatPromptTemplate
-from libs.weaviate_lib import client, insert_to_collection, COLLECTION_AGENTS, COLLECTION_DOCUMENTS, get_object_by_id
-from datetime import datetime
+from libs.weaviate_lib import insert_to_collection, COLLECTION_AGENTS, COLLECTION_DOCUMENTS, COLLECTION_PENDING_APPROVALS, get_collection, get_object_by_id, with_retry
+from datetime import datetime, UTC
 import uuid
 from weaviate.collections.classes.filters import Filter
 from data_classes.common_classes import ApprovalRequest, MessageType, Language, AppMessageResponse, AgentRole
 from agents.extract_message import extract_message_content
 from agents.tools.buddha_agent_builder_tools import create_buddhist_agent, update_buddhist_agent, delete_buddhist_agent, list_buddhist_agents, get_buddhist_teachings, search_buddhist_agents, test_buddhist_agent, add_buddhist_knowledge_to_context, search_buddhist_knowledge, add_buddhist_teaching_example, add_user_insight_to_knowledge_base, get_buddhist_agent_by_id
 class ApprovalManager:
-    """Manages pending approvals and execution state"""
-    
-    def __init__(self):
-        self.pending_approvals: Dict[str, ApprovalRequest] = {}
-        self.execution_state: Dict[str, Any] = {}
+    """
+    Manages pending approvals and execution state.
+
+    Both are stored in Weaviate under the approval id rather than in process
+    memory, since the approval response may be served by another worker.
+    """
     
     def create_approval_request(self, tool_name: str, tool_description: str, 
-                              arguments: Dict[str, Any], reasoning: str = "") -> ApprovalRequest:
-        """Create a new approval request"""
+                              arguments: Dict[str, Any], reasoning: str = "",
+                              execution_state: Optional[Dict[str, Any]] = None) -> ApprovalRequest:
+        """Create a new approval request, with the tool call to run once approved"""
         approval_id = str(uuid.uuid4())
         request = ApprovalRequest(
             id=approval_id,
@@ -28,16 +31,56 @@ class ApprovalManager:
             reasoning=reasoning,
             timestamp=str(datetime.now())
         )
-        self.pending_approvals[approval_id] = request
+        insert_to_collection(
+            collection_name=COLLECTION_PENDING_APPROVALS,
+            properties={
+                "tool_name": tool_name,
+                "tool_description": tool_description,
+                "arguments": json.dumps(arguments, default=str),
+                "reasoning": reasoning,
+                "timestamp": request.timestamp,
+                "execution_state": json.dumps(execution_state or {}, default=str),
+                "created_at": datetime.now(UTC).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            },
+            uuid=approval_id
+        )
         return request
     
+    def _get(self, approval_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            return get_object_by_id(COLLECTION_PENDING_APPROVALS, approval_id)
+        except Exception:
+            # Not a UUID, or not found
+            return None
+    
     def get_pending_approval(self, approval_id: str) -> Optional[ApprovalRequest]:
         """Get pending approval by ID"""
-        return self.pending_approvals.get(approval_id)
+        approval = self._get(approval_id)
+        if not approval:
+            return None
+        return ApprovalRequest(
+            id=approval_id,
+            tool_name=approval["tool_name"],
+            tool_description=approval["tool_description"],
+            arguments=json.loads(approval["arguments"] or "{}"),
+            reasoning=approval["reasoning"] or "",
+            timestamp=approval["timestamp"] or ""
+        )
     
-    def remove_pending_approval(self, approval_id: str):
-        """Remove pending approval after resolution"""
-        self.pending_approvals.pop(approval_id, None)
+    def get_execution_state(self, approval_id: str) -> Optional[Dict[str, Any]]:
+        """Tool call stored with a pending approval"""
+        approval = self._get(approval_id)
+        if not approval or not approval.get("execution_state"):
+            return None
+        return json.loads(approval["execution_state"]) or None
+    
+    def remove_pending_approval(self, approval_id: str) -> bool:
+        """
+        Remove pending approval after resolution. Returns False if it was
+        already gone, e.g. resolved by a concurrent response on another
+        worker, so each approval is acted on once.
+        """
+        return bool(with_retry(get_collection(COLLECTION_PENDING_APPROVALS).data.delete_by_id, approval_id))
 
 # Global approval manager instance
 approval_manager = ApprovalManager()
@@ -107,21 +150,21 @@ class FrontendFriendlyApprovalTool(BaseTool):
                         return tool._run(*args, **kwargs, config=config)
                 raise ValueError(f"Could not find original tool for {tool_name}")
         
-        # Create approval request
+        # Create approval request, storing the tool execution context with it
+        # for later retrieval; the run config belongs to this run only
+        stored_kwargs = {key: value for key, value in kwargs.items() if key != 'config'}
         approval_request = approval_manager.create_approval_request(
             tool_name=self.name,
             tool_description=self.description,
-            arguments=kwargs if kwargs else {"args": args},
-            reasoning=f"Agent wants to execute {self.name}"
+            arguments=stored_kwargs if stored_kwargs else {"args": args},
+            reasoning=f"Agent wants to execute {self.name}",
+            execution_state={
+                "tool_name": tool_name,
+                "args": list(args),
+                "kwargs": stored_kwargs
+            }
         )
         
-        # Store the tool execution context in the approval manager for later retrieval
-        approval_manager.execution_state[approval_request.id] = {
-            "tool_name": tool_name,
-            "args": args,
-            "kwargs": kwargs
-        }
-        
         # Return special approval marker that the streaming function will catch
         return {
             "type": "approval_required",
@@ -130,8 +173,9 @@ class FrontendFriendlyApprovalTool(BaseTool):
         }
     
     async def _arun(self, *args, **kwargs) -> Any:
-        # Same logic for async
-        return self._run(*args, **kwargs)
+        # Same logic for async; the tools make blocking Weaviate calls, so run
+        # them in a thread instead of stalling the event loop
+        return await asyncio.to_thread(self._run, *args, **kwargs)
 
 def create_frontend_friendly_tools(original_tools: List) -> List:
     """Create frontend-friendly tools with approval system"""
@@ -254,7 +298,17 @@ def handle_approval_response(approval_response: Dict[str, Any], language: Langua
             # Execute the approved action
             try:
                 # Get the tool execution context from the approval manager
-                execution_context = approval_manager.execution_state.get(approval_id)
+                execution_context = approval_manager.get_execution_state(approval_id)
+                
+                # Claim the approval first, so a response repeated on another
+                # worker cannot run the tool twice
+                if not approval_manager.remove_pending_approval(approval_id):
+                    yield AppMessageResponse(
+                        type=MessageType.ERROR,
+                        content="Approval request not found or already processed",
+                        role=AgentRole.SYSTEM
+                    )
+                    return
                 
                 if execution_context:
                     tool_name = execution_context["tool_name"]
@@ -291,9 +345,6 @@ def handle_approval_response(approval_response: Dict[str, Any], language: Langua
                             content=f"Could not find original tool for {tool_name}",
                             role=AgentRole.SYSTEM
                         )
-                    
-                    # Clean up execution state
-                    approval_manager.execution_state.pop(approval_id, None)
                 else:
                     yield AppMessageResponse(
                         type=MessageType.ERROR,
@@ -301,9 +352,6 @@ def handle_approval_response(approval_response: Dict[str, Any], language: Langua
                         role=AgentRole.SYSTEM
                     )
                 
-                # Remove from pending
-                approval_manager.remove_pending_approval(approval_id)
-                
             except Exception as e:
                 yield AppMessageResponse(
                     type=MessageType.ERROR,
@@ -322,8 +370,7 @@ def handle_approval_response(approval_response: Dict[str, Any], language: Langua
                 role=AgentRole.ASSISTANT
             )
             
-            # Clean up execution state and remove from pending
-            approval_manager.execution_state.pop(approval_id, None)
+            # Remove from pending, execution state included
             approval_manager.remove_pending_approval(approval_id)
     
     except Exception as e:
@@ -0,0 +1,185 @@
+"""
+ASGI entry point.
+
+The long-lived streaming endpoints are served natively on the worker's event
+loop, so thousands of concurrent streams share one loop instead of each
+holding a thread. Every other route falls through to the Flask app, which
+asgiref runs in a thread pool.
+
+Run with: GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker gunicorn -c gunicorn.conf.py asgi:application
+"""
+
+import asyncio
+import io
+import json
+import logging
+import re
+from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple
+
+from asgiref.wsgi import WsgiToAsgi
+from werkzeug.formparser import parse_form_data
+
+from __init__ import app
+from controllers.agent_controller import stream_upload_events
+from controllers.buddha_agent_controller import stream_buddha_agent_events, SSE_HEADERS
+from data_classes.common_classes import Language, Message, UserRole
+from libs.background_jobs import background_jobs
+from libs.reaction_aggregator import shutdown_reaction_aggregators
+from libs.weaviate_lib import close_async_client, close_client
+from services.handle_auth import AuthError, verify_jwt_token
+from services.handle_rag import upload_files
+
+logger = logging.getLogger(__name__)
+
+wsgi_application = WsgiToAsgi(app)
+
+OWNER_ROLES = [UserRole.OWNER.value]
+CONTRIBUTOR_ROLES = [UserRole.CONTRIBUTOR.value, UserRole.ADMIN.value, UserRole.OWNER.value]
+
+
+class HttpError(Exception):
+    def __init__(self, message: str, status_code: int = 400):
+        self.message = message
+        self.status_code = status_code
+        super().__init__(self.message)
+
+
+async def authorize(headers: Dict[str, str], allowed_roles: List[str]) -> Dict[str, Any]:
+    """Same checks as the owner_required/contributor_required decorators"""
+    auth_header = headers.get("authorization")
+    if not auth_header:
+        raise HttpError("No authorization header", 401)
+    try:
+        token = auth_header.split(" ")[1]
+        # The blacklist lookup may hit Weaviate, keep it off the event loop
+        payload = await asyncio.to_thread(verify_jwt_token, token)
+    except AuthError as e:
+        raise HttpError(e.message, e.status_code)
+    except Exception:
+        raise HttpError("Invalid authorization", 401)
+    if payload.get("role", None) not in allowed_roles:
+        raise HttpError("Insufficient permissions", 403)
+    return payload
+
+
+async def read_body(receive) -> bytes:
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body", False):
+            return body
+
+
+async def send_json(send, status: int, data: Dict[str, Any]):
+    body = json.dumps(data).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def send_stream(send, events: AsyncGenerator[str, None]):
+    headers = [(b"content-type", b"text/event-stream")]
+    headers += [(key.lower().encode(), value.encode()) for key, value in SSE_HEADERS.items()]
+    await send({"type": "http.response.start", "status": 200, "headers": headers})
+    try:
+        async for event in events:
+            await send({"type": "http.response.body", "body": event.encode("utf-8"), "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+    finally:
+        await events.aclose()
+
+
+async def buddha_agent_chat(scope, receive, send, headers: Dict[str, str]):
+    """Native version of POST /api/v1/buddha-agent-builder/chat"""
+    await authorize(headers, OWNER_ROLES)
+    body = json.loads(await read_body(receive) or b"null")
+    if not body:
+        raise HttpError("Request body is required", 500)
+    messages = [Message(**msg) for msg in body.get('messages', [])]
+    language = body.get('language', Language.EN)
+    options = body.get('options', {})
+    approval_response = body.get('approval_response', None)
+    await send_stream(send, stream_buddha_agent_events(messages, language, options, approval_response))
+
+
+async def agent_upload(scope, receive, send, headers: Dict[str, str], agent_id: str):
+    """Native version of POST /api/v1/agents/<agent_id>/upload"""
+    await authorize(headers, CONTRIBUTOR_ROLES)
+    body = await read_body(receive)
+    environ = {
+        "REQUEST_METHOD": "POST",
+        "CONTENT_TYPE": headers.get("content-type", ""),
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.input": io.BytesIO(body),
+    }
+    _, _, files = parse_form_data(environ)
+    files = files.getlist('files')
+    if not files:
+        await send_json(send, 400, {"error": "No files provided", "status": "error"})
+        return
+    file_datas = await asyncio.to_thread(upload_files, files)
+    await send_stream(send, stream_upload_events(file_datas, agent_id))
+
+
+ROUTES: List[Tuple[str, re.Pattern, Any]] = [
+    ("POST", re.compile(r"^/api/v1/buddha-agent-builder/chat$"), buddha_agent_chat),
+    ("POST", re.compile(r"^/api/v1/agents/(?P<agent_id>[^/]+)/upload$"), agent_upload),
+]
+
+
+def match_route(method: str, path: str) -> Tuple[Optional[Any], Dict[str, str]]:
+    for route_method, pattern, handler in ROUTES:
+        match = pattern.match(path)
+        if match and method == route_method:
+            return handler, match.groupdict()
+    return None, {}
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await asyncio.to_thread(shutdown_reaction_aggregators)
+            await asyncio.to_thread(background_jobs.shutdown)
+            await close_async_client()
+            close_client()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "lifespan":
+        await lifespan(receive, send)
+        return
+    if scope["type"] == "http":
+        handler, params = match_route(scope["method"], scope["path"])
+        if handler:
+            headers = {key.decode("latin-1").lower(): value.decode("latin-1") for key, value in scope["headers"]}
+            started = False
+
+            async def tracked_send(message):
+                nonlocal started
+                if message["type"] == "http.response.start":
+                    started = True
+                await send(message)
+
+            try:
+                await handler(scope, receive, tracked_send, headers, **params)
+            except Exception as e:
+                status, message = (e.status_code, e.message) if isinstance(e, HttpError) else (500, str(e))
+                if not started:
+                    if not isinstance(e, HttpError):
+                        logger.error(f"Error in {scope['path']}: {message}")
+                    await send_json(send, status, {"error": message})
+                else:
+                    # Too late for an error response; the server closes the
+                    # connection since the body was never completed
+                    logger.error(f"Error in {scope['path']} after the response started: {message}")
+            return
+    await wsgi_application(scope, receive, send)
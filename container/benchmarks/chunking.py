@@ -0,0 +1,108 @@
+"""
+Chunking throughput: LangChain's SemanticChunker vs the NumPy breakpoint
+detection in libs/chunker.py.
+
+Both paths get the same deterministic local embeddings (no OpenAI calls), so
+the numbers only reflect sentence windowing, distance computation and
+breakpoint detection. The text is read from `--text`, or a book-length
+synthetic text is generated.
+
+Usage (from the container directory):
+    python benchmarks/chunking.py --sentences 50000
+    python benchmarks/chunking.py --text path/to/book.txt --threshold-types percentile gradient
+"""
+
+import argparse
+import hashlib
+import os
+import random
+import re
+import sys
+import time
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("EMBEDDING_CACHE_DIR", "")
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_experimental.text_splitter import SemanticChunker
+
+from libs.chunker import combine_sentences, native_semantic_chunk_text
+
+DIM = 1536
+WORDS = (
+    "dharma sangha buddha mindfulness suffering compassion wisdom impermanence "
+    "meditation breath monk teaching path noble truth karma rebirth nirvana "
+    "attachment craving emptiness awakening practice vow merit precept"
+).split()
+
+
+def synthetic_text(sentences: int, seed: int = 7) -> str:
+    rng = random.Random(seed)
+    return " ".join(
+        " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 20))).capitalize() + rng.choice(".?!")
+        for _ in range(sentences)
+    )
+
+
+def fake_embedding(text: str) -> np.ndarray:
+    seed = int.from_bytes(hashlib.sha256(text.encode()).digest()[:8], "little")
+    return np.random.default_rng(seed).standard_normal(DIM).astype(np.float32)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--text", help="Path to a UTF-8 text file")
+    parser.add_argument("--sentences", type=int, default=20000, help="Size of the synthetic text")
+    parser.add_argument("--threshold-types", nargs="+", default=["percentile", "standard_deviation", "interquartile", "gradient"])
+    args = parser.parse_args()
+
+    if args.text:
+        with open(args.text, encoding="utf-8") as f:
+            text = f.read()
+    else:
+        text = synthetic_text(args.sentences)
+
+    regex = r"(?<=[.?!])\s+"
+    sentences = re.split(regex, text)
+    # Embed once up front; both paths reuse these vectors
+    cache = {window: fake_embedding(window) for window in combine_sentences(sentences)}
+
+    class CachedEmbeddings(Embeddings):
+        def embed_documents(self, texts: List[str]) -> List[List[float]]:
+            return [cache[text].tolist() for text in texts]
+
+        def embed_query(self, text: str) -> List[float]:
+            return cache[text].tolist()
+
+    embeddings = np.stack([cache[window] for window in combine_sentences(sentences)])
+    print(f"{len(text):,} characters, {len(sentences):,} sentences")
+    print(f"{'threshold':<20} {'langchain (s)':>14} {'native (s)':>12} {'speedup':>8} {'chunks':>8}")
+    for threshold_type in args.threshold_types:
+        started = time.perf_counter()
+        langchain_chunks = SemanticChunker(
+            embeddings=CachedEmbeddings(),
+            breakpoint_threshold_type=threshold_type,
+            sentence_split_regex=regex,
+        ).create_documents([text])
+        langchain_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        native_chunks = native_semantic_chunk_text(
+            text,
+            breakpoint_threshold_type=threshold_type,
+            sentence_split_regex=regex,
+            embeddings=embeddings,
+        )
+        native_time = time.perf_counter() - started
+
+        same = [c.page_content for c in langchain_chunks] == [c.page_content for c in native_chunks]
+        print(
+            f"{threshold_type:<20} {langchain_time:>14.3f} {native_time:>12.3f} "
+            f"{langchain_time / native_time:>7.1f}x {len(native_chunks):>8}{'' if same else '  (chunks differ)'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Time-to-first-token with and without provider client reuse.
+
+A local stub speaks the OpenAI chat completions streaming protocol. Every new
+TCP connection to it is delayed by `--connect-latency` seconds to stand in for
+the TCP + TLS handshake to the real provider. Each mode sends `--requests`
+sequential streaming completions and records the time until the first token:
+
+- new-client: an OpenAI client is built per call, as the agents used to do
+- registry: the shared client from libs/provider_clients.py
+
+Usage (from the container directory):
+    python benchmarks/client_reuse.py --requests 50 --connect-latency 0.05
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openai import OpenAI
+
+from libs.provider_clients import ProviderClientRegistry
+
+CONNECT_LATENCY = 0.05
+
+
+class StubCompletionsHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        time.sleep(CONNECT_LATENCY)
+        super().setup()
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for i in range(5):
+            chunk = {
+                "id": "stub", "object": "chat.completion.chunk", "created": 0, "model": "stub",
+                "choices": [{"index": 0, "delta": {"content": f"token{i} "}, "finish_reason": None}],
+            }
+            self._write_chunk(f"data: {json.dumps(chunk)}\n\n")
+        self._write_chunk("data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, data: str):
+        body = data.encode()
+        self.wfile.write(f"{len(body):x}\r\n".encode() + body + b"\r\n")
+        self.wfile.flush()
+
+
+def time_to_first_token(client: OpenAI) -> float:
+    start = time.perf_counter()
+    stream = client.chat.completions.create(
+        model="stub",
+        messages=[{"role": "user", "content": "What are the Four Noble Truths?"}],
+        stream=True,
+    )
+    ttft = None
+    for chunk in stream:
+        if ttft is None and chunk.choices and chunk.choices[0].delta.content:
+            ttft = time.perf_counter() - start
+    return ttft
+
+
+def run(get_client: Callable[[], OpenAI], requests: int) -> List[float]:
+    return [time_to_first_token(get_client()) for _ in range(requests)]
+
+
+def main():
+    global CONNECT_LATENCY
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--connect-latency", type=float, default=CONNECT_LATENCY)
+    args = parser.parse_args()
+    CONNECT_LATENCY = args.connect_latency
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubCompletionsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+    registry = ProviderClientRegistry(health_check_interval=0)
+    modes = {
+        "new-client": lambda: OpenAI(api_key="stub", base_url=base_url),
+        "registry": lambda: registry.get(("openai", base_url), lambda: OpenAI(api_key="stub", base_url=base_url)),
+    }
+    print(f"{'mode':<12} {'mean (ms)':>10} {'p50 (ms)':>10} {'max (ms)':>10}")
+    for mode, get_client in modes.items():
+        ttfts = run(get_client, args.requests)
+        print(f"{mode:<12} {statistics.mean(ttfts) * 1000:>10.1f} {statistics.median(ttfts) * 1000:>10.1f} {max(ttfts) * 1000:>10.1f}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Memory and time of a fine-tuning export: the list-based path used by
+fine_tune_messages (convert the whole list, validate it, join it into one
+JSONL string, write it) against the streaming path used by
+export_fine_tune_dataset (convert, validate and write a page at a time, into
+shards, optionally gzipped).
+
+Messages are generated in pages shaped like iter_approved_q_and_a_pages()
+output, so Weaviate is not needed. Peak memory is measured with tracemalloc
+and covers the messages too: the list path needs all of them at once, the
+streaming path one page. tracemalloc slows every mode several times over,
+so compare seconds between modes, not with production.
+
+Usage (from the container directory):
+    python benchmarks/fine_tune_export.py --pairs 1000 50000
+    python benchmarks/fine_tune_export.py --pairs 250000 --skip-list --page-size 1000
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, Generator, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from libs.jsonl_converter import (
+    JsonlShardWriter,
+    convert_json_to_jsonl,
+    convert_messages_to_fine_tune_format,
+    save_jsonl_to_file,
+    validate_fine_tune_data,
+    write_fine_tune_dataset,
+)
+
+WORDS = (
+    "tâm hơi thở chánh niệm vô thường khổ đau từ bi trí tuệ thiền định "
+    "giác ngộ buông bỏ an lạc hiện tại giáo pháp tăng đoàn phật tử tu tập"
+).split()
+
+
+def synthetic_pages(pairs: int, page_size: int, seed: int = 7) -> Generator[List[Dict[str, Any]], None, None]:
+    rng = random.Random(seed)
+
+    def text(low: int, high: int) -> str:
+        return " ".join(rng.choice(WORDS) for _ in range(rng.randint(low, high)))
+
+    for start in range(0, pairs, page_size):
+        yield [
+            {
+                "uuid": f"q-{index}",
+                "content": text(8, 30) + "?",
+                "role": "user",
+                "response_answer_id": f"a-{index}",
+                "related_message": {"uuid": f"a-{index}", "content": text(60, 250) + ".", "role": "assistant"},
+            }
+            for index in range(start, min(start + page_size, pairs))
+        ]
+
+
+def list_export(pairs: int, page_size: int, directory: str, **_) -> int:
+    messages = [message for page in synthetic_pages(pairs, page_size) for message in page]
+    fine_tune_data = convert_messages_to_fine_tune_format(messages)
+    validate_fine_tune_data(fine_tune_data)
+    path = save_jsonl_to_file(convert_json_to_jsonl(fine_tune_data), directory=directory)
+    return os.path.getsize(path)
+
+
+def streaming_export(pairs: int, page_size: int, directory: str, shard_records: int, compress: bool) -> int:
+    with JsonlShardWriter(directory=directory, shard_records=shard_records, compress=compress) as writer:
+        write_fine_tune_dataset(synthetic_pages(pairs, page_size), writer)
+    return sum(os.path.getsize(path) for path in writer.paths)
+
+
+def measure(run: Callable[..., int], **kwargs) -> Tuple[float, float, int]:
+    """(seconds, peak MiB, bytes written)"""
+    directory = tempfile.mkdtemp(prefix="fine-tune-export-")
+    try:
+        tracemalloc.start()
+        started = time.perf_counter()
+        written = run(directory=directory, **kwargs)
+        seconds = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        shutil.rmtree(directory)
+    return seconds, peak / 2 ** 20, written
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pairs", type=int, nargs="+", default=[1000, 20000], help="Q&A pairs to export")
+    parser.add_argument("--page-size", type=int, default=500, help="Messages per page")
+    parser.add_argument("--shard-records", type=int, default=100000, help="Examples per shard, 0 for one file")
+    parser.add_argument("--skip-list", action="store_true", help="Only run the streaming path (for large --pairs)")
+    args = parser.parse_args()
+
+    runs: List[Tuple[str, Callable[..., int], Dict[str, Any]]] = [
+        ("streaming", streaming_export, {"compress": False}),
+        ("streaming gzip", streaming_export, {"compress": True}),
+    ]
+    if not args.skip_list:
+        runs.insert(0, ("list", list_export, {}))
+
+    print(f"{'pairs':>9} {'mode':<15} {'seconds':>8} {'peak MiB':>9} {'written MiB':>12}")
+    for pairs in args.pairs:
+        for name, run, options in runs:
+            seconds, peak, written = measure(
+                run, pairs=pairs, page_size=args.page_size, shard_records=args.shard_records, **options
+            )
+            print(f"{pairs:>9,} {name:<15} {seconds:>8.2f} {peak:>9.1f} {written / 2 ** 20:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Import-time profile of the app, in the style of `python -X importtime`.
+
+Imports a module (the Flask app by default) in a fresh interpreter with
+-X importtime and reports the slowest imports: the top-level packages by
+cumulative time, and the individual modules by self time. It then lists the
+objects registered with libs.lazy and whether importing built any of them;
+after the import nothing should be initialized.
+
+The same environment as the app is needed (.env with WEAVIATE_URL, ...).
+
+Usage (from the container directory):
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --module asgi --top 30
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+CONTAINER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import importlib, json, sys
+importlib.import_module(sys.argv[1])
+from libs.lazy import lazy_stats
+print(json.dumps(lazy_stats()))
+"""
+
+
+def parse_importtime(stderr: str) -> List[Tuple[int, int, int, str]]:
+    """(self us, cumulative us, depth, module) for every line of -X importtime output"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        # One space, then two more per nesting level
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        rows.append((int(self_us), int(cumulative_us), depth, name.strip()))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="__init__", help="Module to import, relative to the container directory")
+    parser.add_argument("--top", type=int, default=20, help="Rows per table")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE, args.module],
+        cwd=CONTAINER_DIR,
+        capture_output=True,
+        text=True,
+    )
+    wall = time.perf_counter() - started
+    rows = parse_importtime(result.stderr)
+    if result.returncode != 0:
+        print(result.stderr.splitlines()[-1] if result.stderr else f"import failed with code {result.returncode}")
+        sys.exit(result.returncode)
+
+    # Top-level lines cover every import, the interpreter's own startup included
+    total_us = sum(cumulative for _, cumulative, depth, _ in rows if depth == 0)
+    print(f"import {args.module}: {total_us / 1e6:.2f}s of imports, {wall:.2f}s wall, {len(rows)} modules\n")
+
+    packages: Dict[str, int] = defaultdict(int)
+    for self_us, _, _, name in rows:
+        packages[name.split(".")[0]] += self_us
+    print(f"{'package':<40} {'seconds':>8} {'share':>7}")
+    for name, self_us in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{name:<40} {self_us / 1e6:>8.3f} {self_us / max(total_us, 1):>7.1%}")
+
+    print(f"\n{'module':<60} {'self (s)':>9} {'cumulative (s)':>15}")
+    for self_us, cumulative_us, _, name in sorted(rows, key=lambda row: -row[0])[:args.top]:
+        print(f"{name:<60} {self_us / 1e6:>9.3f} {cumulative_us / 1e6:>15.3f}")
+
+    stats = json.loads(result.stdout.strip().splitlines()[-1])
+    built = [name for name, stat in stats.items() if stat["initialized"]]
+    print(f"\n{len(stats)} lazy objects registered: {', '.join(sorted(stats)) or '-'}")
+    print(f"built during import: {', '.join(built) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
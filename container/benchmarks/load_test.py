@@ -0,0 +1,124 @@
+"""
+Load-test harness comparing the single-threaded dev server with the
+gunicorn production mode.
+
+Both modes serve benchmarks/stub_app.py, so Weaviate and the LLM providers
+are local stubs. For every mode the harness starts the server, fires
+`--requests` streaming asks with `--concurrency` clients, reads every stream
+to the end and reports requests/sec and latency percentiles.
+
+Usage (from the container directory):
+    python benchmarks/load_test.py --concurrency 32 --requests 256
+    python benchmarks/load_test.py --modes gunicorn --workers 4 --threads 16
+"""
+
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+CONTAINER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(mode: str, port: int, workers: int, threads: int) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "PORT": str(port),
+        "WEB_CONCURRENCY": str(workers),
+        "GUNICORN_THREADS": str(threads),
+        "GUNICORN_LOG_LEVEL": "warning",
+        "WEAVIATE_INIT_SCHEMA": "0",
+    }
+    if mode == "dev":
+        cmd = [sys.executable, "benchmarks/stub_app.py"]
+    elif mode == "gunicorn":
+        cmd = [
+            sys.executable, "-m", "gunicorn",
+            "-c", "gunicorn.conf.py",
+            "--bind", f"127.0.0.1:{port}",
+            "--access-logfile", "/dev/null",
+            "benchmarks.stub_app:app",
+        ]
+    else:
+        raise ValueError(f"Unknown mode {mode}")
+    return subprocess.Popen(cmd, cwd=CONTAINER_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def wait_until_ready(port: int, timeout: float = 15.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Server on port {port} did not become ready")
+
+
+def ask(port: int) -> float:
+    start = time.perf_counter()
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+    body = json.dumps({"messages": [{"role": "user", "content": "What are the Four Noble Truths?"}], "options": {"stream": True}})
+    conn.request("POST", "/api/v1/chat/bench/ask", body=body, headers={"Content-Type": "application/json"})
+    response = conn.getresponse()
+    response.read()
+    conn.close()
+    return time.perf_counter() - start
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_mode(mode: str, args) -> Dict[str, float]:
+    port = free_port()
+    server = start_server(mode, port, args.workers, args.threads)
+    try:
+        wait_until_ready(port)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            latencies = list(pool.map(lambda _: ask(port), range(args.requests)))
+        elapsed = time.perf_counter() - started
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+    return {
+        "requests_per_sec": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="+", default=["dev", "gunicorn"], choices=["dev", "gunicorn"])
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=256)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=16)
+    args = parser.parse_args()
+
+    print(f"{'mode':<10} {'req/s':>10} {'p50 (ms)':>10} {'p99 (ms)':>10}")
+    for mode in args.modes:
+        result = run_mode(mode, args)
+        print(f"{mode:<10} {result['requests_per_sec']:>10.1f} {result['p50_ms']:>10.1f} {result['p99_ms']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Concurrency check for libs/reaction_aggregator.py: thousands of users like one
+feed at the same time, and every like must survive.
+
+The feed is stored in memory with a simulated round-trip latency. The
+baseline is the old like_feed_entry (read the array, toggle in Python, write
+it back), which loses likes whenever two requests interleave. The aggregated
+run sends the same likes through ReactionAggregator.toggle and checks that
+the stored array holds every user once the buffer is flushed, and that reads
+saw the likes before the flush.
+
+Usage (from the container directory):
+    python benchmarks/reaction_aggregator.py --likes 5000 --threads 64
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from libs.reaction_aggregator import ReactionAggregator
+
+FEED_ID = "feed-1"
+
+
+class MemoryStore:
+    """One feed's like_ids with a delay on every read and write"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.rows: Dict[str, List[str]] = {FEED_ID: []}
+        self.reads = 0
+        self.writes = 0
+        self._lock = threading.Lock()
+
+    def load(self, feed_id: str) -> List[str]:
+        time.sleep(self.latency)
+        with self._lock:
+            self.reads += 1
+            return list(self.rows[feed_id])
+
+    def store(self, feed_id: str, like_ids: List[str]):
+        time.sleep(self.latency)
+        with self._lock:
+            self.writes += 1
+            self.rows[feed_id] = list(like_ids)
+
+
+def naive_like(store: MemoryStore, user_id: str):
+    like_ids = store.load(FEED_ID)
+    if user_id in like_ids:
+        like_ids.remove(user_id)
+    else:
+        like_ids.append(user_id)
+    store.store(FEED_ID, like_ids)
+
+
+def run(likes: int, threads: int, like) -> float:
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(like, [f"user-{i}" for i in range(likes)]))
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--likes", type=int, default=5000, help="Distinct users liking the feed")
+    parser.add_argument("--threads", type=int, default=64, help="Concurrent requests")
+    parser.add_argument("--latency", type=float, default=0.002, help="Simulated round trip in seconds")
+    args = parser.parse_args()
+
+    print(f"{'mode':<12} {'seconds':>8} {'reads':>7} {'writes':>7} {'stored':>7} {'lost':>6}")
+
+    store = MemoryStore(args.latency)
+    elapsed = run(args.likes, args.threads, lambda user_id: naive_like(store, user_id))
+    stored = len(set(store.rows[FEED_ID]))
+    print(f"{'naive':<12} {elapsed:>8.2f} {store.reads:>7} {store.writes:>7} {stored:>7} {args.likes - stored:>6}")
+
+    store = MemoryStore(args.latency)
+    aggregator = ReactionAggregator("benchmark", store.load, store.store, flush_interval=0.05, max_pending=500)
+    elapsed = run(args.likes, args.threads, lambda user_id: aggregator.toggle(FEED_ID, user_id))
+    visible = len(aggregator.current(FEED_ID, store.load(FEED_ID)))
+    aggregator.flush()
+    stored_ids = store.rows[FEED_ID]
+    stored = len(set(stored_ids))
+    print(f"{'aggregated':<12} {elapsed:>8.2f} {store.reads:>7} {store.writes:>7} {stored:>7} {args.likes - stored:>6}")
+
+    ok = stored == args.likes and len(stored_ids) == stored and visible == args.likes
+    print(f"\nreads before flush saw {visible} likes; {'no likes lost' if ok else 'LIKES LOST'}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
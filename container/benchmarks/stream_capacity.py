@@ -0,0 +1,97 @@
+"""
+Concurrent-stream capacity of a single worker.
+
+Every stream is a stub agent: an async generator that awaits a fake LLM
+latency between tokens, like the LangGraph streams behind the buddha agent
+builder chat. Three ways of serving N simultaneous streams are compared:
+
+- per-request-loop: the old controllers, a gthread worker thread per stream
+  which creates and tears down its own event loop
+- shared-loop: gthread worker threads driving the streams on the worker's
+  shared loop (libs/event_loop.py)
+- native: the ASGI entry point, every stream is a task on one loop
+
+Usage (from the container directory):
+    python benchmarks/stream_capacity.py --streams 50 200 1000 --threads 8
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncGenerator, Dict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from libs.event_loop import iterate_async_generator
+
+TOKEN_COUNT = 20
+TOKEN_LATENCY = 0.05
+
+
+async def stub_agent_stream() -> AsyncGenerator[str, None]:
+    for i in range(TOKEN_COUNT):
+        await asyncio.sleep(TOKEN_LATENCY)
+        yield f"data: token{i}\n\n"
+
+
+def per_request_loop_stream():
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        async def collect():
+            return [event async for event in stub_agent_stream()]
+        for _ in loop.run_until_complete(collect()):
+            pass
+    finally:
+        loop.close()
+
+
+def shared_loop_stream():
+    for _ in iterate_async_generator(stub_agent_stream()):
+        pass
+
+
+async def native_streams(count: int):
+    async def consume():
+        async for _ in stub_agent_stream():
+            pass
+    await asyncio.gather(*(consume() for _ in range(count)))
+
+
+def run(mode: str, streams: int, threads: int) -> Dict[str, float]:
+    peak_threads = threading.active_count()
+    started = time.perf_counter()
+    if mode == "native":
+        asyncio.run(native_streams(streams))
+    else:
+        target = per_request_loop_stream if mode == "per-request-loop" else shared_loop_stream
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            futures = [pool.submit(target) for _ in range(streams)]
+            peak_threads = max(peak_threads, threading.active_count())
+            for future in futures:
+                future.result()
+    elapsed = time.perf_counter() - started
+    return {"elapsed": elapsed, "streams_per_sec": streams / elapsed, "threads": peak_threads}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--streams", nargs="+", type=int, default=[50, 200, 1000])
+    parser.add_argument("--threads", type=int, default=8, help="gthread threads per worker")
+    args = parser.parse_args()
+
+    ideal = TOKEN_COUNT * TOKEN_LATENCY
+    print(f"one stream alone takes {ideal:.2f}s")
+    print(f"{'mode':<18} {'streams':>8} {'elapsed (s)':>12} {'streams/s':>10} {'threads':>8}")
+    for streams in args.streams:
+        for mode in ["per-request-loop", "shared-loop", "native"]:
+            result = run(mode, streams, args.threads)
+            print(f"{mode:<18} {streams:>8} {result['elapsed']:>12.2f} {result['streams_per_sec']:>10.1f} {result['threads']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Stand-in for the ask endpoint used by the load-test harness.
+
+It has the same shape as `/api/v1/chat/<session_id>/ask` with streaming on:
+a few blocking lookups (agent, section, contexts) followed by an SSE token
+stream. Weaviate and the LLM providers are replaced by sleeps so that the
+numbers only reflect the serving model.
+"""
+
+import json
+import os
+import time
+
+from flask import Flask, Response, stream_with_context
+
+STUB_LOOKUP_LATENCY = float(os.environ.get("STUB_LOOKUP_LATENCY", 0.02))
+STUB_TOKEN_COUNT = int(os.environ.get("STUB_TOKEN_COUNT", 50))
+STUB_TOKEN_LATENCY = float(os.environ.get("STUB_TOKEN_LATENCY", 0.01))
+
+app = Flask(__name__)
+
+
+def stub_weaviate_lookup():
+    time.sleep(STUB_LOOKUP_LATENCY)
+
+
+def stub_llm_stream():
+    for i in range(STUB_TOKEN_COUNT):
+        time.sleep(STUB_TOKEN_LATENCY)
+        yield {"type": "text", "data": f"token{i} "}
+    yield {"type": "end_of_stream", "data": ""}
+
+
+@app.route('/api/v1/chat/<session_id>/ask', methods=['POST'])
+def ask_endpoint(session_id):
+    # get_agent, get_section_by_id, get_contexts
+    for _ in range(3):
+        stub_weaviate_lookup()
+
+    def generate():
+        for event in stub_llm_stream():
+            yield f"data: {json.dumps(event)}"
+
+    return Response(stream_with_context(generate()), content_type='application/json')
+
+
+@app.route('/health', methods=['GET'])
+def health():
+    return "ok", 200
+
+
+if __name__ == '__main__':
+    # Mirrors main.py: the single-threaded development server
+    app.run(host="127.0.0.1", port=int(os.environ.get("PORT", 8080)), threaded=False)
@@ -0,0 +1,88 @@
+"""
+Time-to-first-audio of streaming TTS: one request for the whole text, the old
+1000-character chunks synthesized in series, and libs/speech_pipeline
+(sentence segments synthesized in parallel, yielded in order).
+
+Synthesis is simulated with a fixed round trip plus a per-character cost, so
+no Google calls are made; pass costs measured against the real API to get
+realistic numbers.
+
+Usage (from the container directory):
+    python benchmarks/tts_streaming.py --paragraphs 40
+    python benchmarks/tts_streaming.py --round-trip 0.25 --per-char 0.0008 --inflight 8
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from libs.speech_pipeline import split_sentences, synthesize_in_order
+
+WORDS = (
+    "tâm hơi thở chánh niệm vô thường khổ đau từ bi trí tuệ thiền định "
+    "giác ngộ buông bỏ an lạc hiện tại giáo pháp tăng đoàn phật tử tu tập"
+).split()
+
+
+def synthetic_talk(paragraphs: int, seed: int = 7) -> str:
+    rng = random.Random(seed)
+
+    def sentence() -> str:
+        clauses = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 12))) for _ in range(rng.randint(1, 4))]
+        return ", ".join(clauses).capitalize() + rng.choice("..?!")
+
+    return "\n\n".join(" ".join(sentence() for _ in range(rng.randint(3, 8))) for _ in range(paragraphs))
+
+
+def measure(chunks: Iterable[bytes]) -> Tuple[float, float, int]:
+    started = time.perf_counter()
+    first = None
+    count = 0
+    for _ in chunks:
+        count += 1
+        if first is None:
+            first = time.perf_counter() - started
+    return first or 0.0, time.perf_counter() - started, count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--paragraphs", type=int, default=40, help="Size of the synthetic talk")
+    parser.add_argument("--round-trip", type=float, default=0.2, help="Fixed seconds per request")
+    parser.add_argument("--per-char", type=float, default=0.0005, help="Seconds per synthesized character")
+    parser.add_argument("--inflight", type=int, default=4, help="Segments synthesized ahead")
+    args = parser.parse_args()
+
+    def synthesize(text: str) -> bytes:
+        time.sleep(args.round_trip + args.per_char * len(text))
+        return text.encode()
+
+    text = synthetic_talk(args.paragraphs)
+    segments = split_sentences(text)
+    print(f"{len(text):,} characters, {len(segments)} segments (first {len(segments[0])} chars)\n")
+
+    def chunked(size: int) -> List[str]:
+        return [text[i:i + size] for i in range(0, len(text), size)]
+
+    runs: List[Tuple[str, Callable[[], Iterable[bytes]]]] = [
+        ("whole text", lambda: (synthesize(whole) for whole in [text])),
+        ("1000-char serial", lambda: (synthesize(chunk) for chunk in chunked(1000))),
+    ]
+    executor = ThreadPoolExecutor(max_workers=args.inflight)
+    runs.append(("segmented", lambda: synthesize_in_order(synthesize, segments, executor, args.inflight)))
+
+    print(f"{'mode':<18} {'first audio (s)':>16} {'total (s)':>10} {'chunks':>7}")
+    for name, run in runs:
+        first, total, count = measure(run())
+        print(f"{name:<18} {first:>16.2f} {total:>10.2f} {count:>7}")
+    executor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
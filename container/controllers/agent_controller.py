@@ -11,10 +11,11 @@ from services.handle_agent import (
 )
 from services.handle_ask import handle_ask_streaming, handle_ask_non_streaming, AskError
 from services.handle_rag import handle_upload_file, upload_files
+from libs.event_loop import iterate_async_generator
 import json
 import logging
 import uuid
-import asyncio
+from typing import List, Dict, Any, AsyncGenerator
 from data_classes.common_classes import AskRequest, Message, Language
 
 from __init__ import admin_required, app, login_required, contributor_required, owner_required
@@ -224,6 +225,20 @@ def chat_with_agent_endpoint_with_api_key():
         return jsonify({"error": str(e)}), 500
 
 
+async def stream_upload_events(file_datas: List[Dict[str, Any]], agent_id: str) -> AsyncGenerator[str, None]:
+    """Format RAG upload progress updates as a stream of JSON events"""
+    try:
+        async for update in handle_upload_file(file_datas, agent_id):
+            yield f"{json.dumps(update)}\n\n"
+    except Exception as e:
+        error_response = {
+            "error": str(e),
+            "status": "error",
+            "message": f"Upload failed: {str(e)}"
+        }
+        yield f"{json.dumps(error_response)}\n\n"
+
+
 @app.route('/api/v1/agents/<agent_id>/upload', methods=['POST'])
 @contributor_required
 def upload_file_endpoint(agent_id):
@@ -239,39 +254,10 @@ def upload_file_endpoint(agent_id):
 
         file_datas = upload_files(files)
         print(f"Prepared {len(file_datas)} files for upload.")
-        def generate():
-            try:
-                # Create new event loop for this thread if needed
-                try:
-                    loop = asyncio.get_event_loop()
-                except RuntimeError:
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                
-                # Run the async generator
-                async def async_generate():
-                    async for update in handle_upload_file(file_datas, agent_id):
-                        yield f"{json.dumps(update)}\n\n"
-                
-                # Convert async generator to sync generator
-                async_gen = async_generate()
-                while True:
-                    try:
-                        result = loop.run_until_complete(async_gen.__anext__())
-                        yield result
-                    except StopAsyncIteration:
-                        break
-                        
-            except Exception as e:
-                error_response = {
-                    "error": str(e),
-                    "status": "error",
-                    "message": f"Upload failed: {str(e)}"
-                }
-                yield f"{json.dumps(error_response)}\n\n"
-        
+        # Stream from the worker's shared event loop instead of a loop per request
+        async_gen = stream_upload_events(file_datas, agent_id)
         return Response(
-            stream_with_context(generate()),
+            stream_with_context(iterate_async_generator(async_gen)),
             mimetype='text/event-stream',
             headers={
                 'Cache-Control': 'no-cache',
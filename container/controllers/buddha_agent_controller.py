@@ -1,5 +1,5 @@
 from flask import request, jsonify, Response, g
-import asyncio
+from typing import List, Dict, Any, Optional, AsyncGenerator
 from agents.buddha_agent_builder import (
     generate_buddha_agent_response,
     generate_buddha_agent_response_sync
@@ -8,10 +8,55 @@ from data_classes.common_classes import Message, Language, AppMessageResponse
 import json
 from datetime import datetime
 import logging
+from libs.event_loop import iterate_async_generator
 from __init__ import app, login_required, owner_required
 
 logger = logging.getLogger(__name__)
 
+SSE_HEADERS = {
+    'Cache-Control': 'no-cache',
+    'Connection': 'keep-alive',
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Headers': 'Cache-Control'
+}
+
+
+async def stream_buddha_agent_events(
+    messages: List[Message],
+    language: Language,
+    options: Dict[str, Any],
+    approval_response: Optional[Dict[str, Any]] = None
+) -> AsyncGenerator[str, None]:
+    """Format the buddha agent builder output as Server-Sent Events"""
+    try:
+        async for message in generate_buddha_agent_response(
+            messages=messages,
+            language=language,
+            options=options,
+            approval_response=approval_response
+        ):
+            try:
+                # Format as proper Server-Sent Events (SSE)
+                json_data = message.to_dict_json()
+                yield f"data: {json_data}"
+            except Exception as e:
+                # Fallback for any serialization issues
+                error_msg = {
+                    "type": "error",
+                    "content": f"Serialization error: {str(e)}",
+                    "original_message": str(message),
+                    "timestamp": datetime.now().isoformat()
+                }
+                yield f"data: {json.dumps(error_msg)}"
+        # Send end signal
+        yield f"data: {json.dumps({'type': 'end', 'timestamp': datetime.now().isoformat()})}"
+    except Exception as e:
+        error_data = {
+            "type": "error",
+            "content": str(e),
+            "timestamp": datetime.now().isoformat()
+        }
+        yield f"data: {json.dumps(error_data)}\n\n"
 
 @app.route('/api/v1/buddha-agent-builder/chat', methods=['POST'])
 @owner_required
@@ -27,63 +72,12 @@ def meta_agent_chat_endpoint():
         options = body.get('options', {})
         approval_response = body.get('approval_response', None)
         
-        def generate():
-            """Generate streaming response"""
-            try:
-                async def async_generate():
-                    async for message in generate_buddha_agent_response(
-                        messages=messages,
-                        language=language,
-                        options=options,
-                        approval_response=approval_response
-                    ):
-                        try:
-                            # Format as proper Server-Sent Events (SSE)
-                            json_data = message.to_dict_json()
-                            yield f"data: {json_data}"
-                        except Exception as e:
-                            # Fallback for any serialization issues
-                            error_msg = {
-                                "type": "error",
-                                "content": f"Serialization error: {str(e)}",
-                                "original_message": str(message),
-                                "timestamp": datetime.now().isoformat()
-                            }
-                            yield f"data: {json.dumps(error_msg)}"
-                    # Send end signal
-                    yield f"data: {json.dumps({'type': 'end', 'timestamp': datetime.now().isoformat()})}"
-                
-                # Run the async generator in the current event loop
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                try:
-                    async_gen = async_generate()
-                    while True:
-                        try:
-                            message = loop.run_until_complete(async_gen.__anext__())
-                            yield message
-                        except StopAsyncIteration:
-                            break
-                finally:
-                    loop.close()
-                
-            except Exception as e:
-                error_data = {
-                    "type": "error",
-                    "content": str(e),
-                    "timestamp": datetime.now().isoformat()
-                }
-                yield f"data: {json.dumps(error_data)}\n\n"
-        
+        # Stream from the worker's shared event loop instead of a loop per request
+        async_gen = stream_buddha_agent_events(messages, language, options, approval_response)
         return Response(
-            generate(),
+            iterate_async_generator(async_gen),
             mimetype='text/event-stream',
-            headers={
-                'Cache-Control': 'no-cache',
-                'Connection': 'keep-alive',
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Headers': 'Cache-Control'
-            }
+            headers=SSE_HEADERS
         )
         
     except Exception as e:
@@ -1,7 +1,7 @@
 from __init__ import app, login_required, contributor_required, admin_required
 from flask import request, jsonify, g
 from data_classes.common_classes import CreateCategoryRequest
-from services.handle_category import get_all_categories, CategoryError, create_category, get_category_by_id, update_category, delete_category
+from services.handle_category import CATEGORY_STORIES_LIMIT, get_all_categories, CategoryError, create_category, get_category_by_id, update_category, delete_category
 
 
 
@@ -52,12 +52,22 @@ def get_categories_endpoint():
         limit = int(data.get('limit', 10))
         offset = int(data.get('offset', 0))
         include_stories = data.get('include_stories', 'false').lower() == 'true'
+        stories_limit = int(data.get('stories_limit', CATEGORY_STORIES_LIMIT))
+        # stories_view=summary leaves out the story content
+        stories_summary = data.get('stories_view', 'full').lower() == 'summary'
         filters = {
             "language": data.get('language')
         }
         # Remove None values from filters
         filters = {k: v for k, v in filters.items() if v is not None}
-        categories = get_all_categories(limit=limit, offset=offset, include_stories=include_stories, filters=filters)
+        categories = get_all_categories(
+            limit=limit,
+            offset=offset,
+            include_stories=include_stories,
+            filters=filters,
+            stories_limit=stories_limit,
+            stories_summary=stories_summary,
+        )
 
         return jsonify({
             "status": "success",
@@ -1,8 +1,11 @@
-from flask import request, jsonify, g
-from services.upload_file import upload_file, get_documents, create_document, update_document, delete_document, get_document_by_id
+import json
+from flask import request, jsonify, g, Response, stream_with_context
+from services.upload_file import upload_file, ingest_files, validate_upload, UploadError, get_documents, create_document, update_document, delete_document, get_document_by_id
 from data_classes.common_classes import Document
 import logging
-from __init__ import app, login_required
+from libs.retrieval_cache import retrieval_cache
+from libs.weaviate_lib import CursorError
+from __init__ import app, login_required, admin_required
 logger = logging.getLogger(__name__)
 
 
@@ -18,8 +21,27 @@ def process_pdf_endpoint():
         files = request.files.getlist('files')
         description = request.form.get('description')
         author = g.user_id
+        # Id of an existing file to re-ingest as a new revision
+        file_id = request.form.get('file_id') or None
+        stream = request.args.get('stream', 'false').lower() == 'true'
+        # Rejected uploads get a 400, not a failure inside a started stream
+        validate_upload(files, file_id)
         # 2. handle request
-        results, failed_objects = upload_file(files, description, author)
+        if stream:
+            # Report progress per file while the PDFs are ingested
+            updates = ingest_files(files, description, author, file_id)
+
+            def generate():
+                try:
+                    for update in updates:
+                        update.pop("chunks", None)
+                        yield f"data: {json.dumps(update)}\n\n"
+                except Exception as e:
+                    yield f"data: {json.dumps({'status': 'failed', 'error': str(e)})}\n\n"
+
+            return Response(stream_with_context(generate()), mimetype='text/event-stream')
+
+        results, failed_objects = upload_file(files, description, author, file_id)
 
         # 3. return results
         return jsonify({
@@ -29,6 +51,8 @@ def process_pdf_endpoint():
             "failed_objects": failed_objects
         }), 200
 
+    except UploadError as e:
+        return jsonify({"error": e.message}), e.status_code
     except Exception as e:
         logger.error(f"Error processing PDF: {str(e)}")
         return jsonify({"error": str(e)}), 500
@@ -40,8 +64,9 @@ def get_documents_endpoint():
     try:
         limit = int(request.args.get('limit', 10))
         offset = int(request.args.get('offset', 0))
+        cursor = request.args.get('cursor')
         
-        documents, total_count = get_documents(limit, offset)
+        documents, total_count, next_cursor = get_documents(limit, offset, cursor)
         
         # Calculate pagination info
         page_number = (offset // limit) + 1 if limit > 0 else 1
@@ -52,7 +77,11 @@ def get_documents_endpoint():
         response.headers['X-Page-Size'] = str(limit)
         response.headers['X-Page-Number'] = str(page_number)
         response.headers['X-Total-Pages'] = str(total_pages)
+        if next_cursor:
+            response.headers['X-Next-Cursor'] = next_cursor
         return response, 200
+    except CursorError as e:
+        return jsonify({"error": e.message}), e.status_code
     except Exception as e:
         logger.error(f"Error getting documents: {str(e)}")
         return jsonify({"error": str(e)}), 500
@@ -107,4 +136,10 @@ def delete_document_endpoint(document_id):
         return jsonify({"status": "success"}), 200
     except Exception as e:
         logger.error(f"Error deleting document: {str(e)}")
-        return jsonify({"error": str(e)}), 500 
\ No newline at end of file
+        return jsonify({"error": str(e)}), 500 
+
+@app.route('/api/v1/documents/search-cache/stats', methods=['GET'])
+@admin_required
+def get_search_cache_stats_endpoint():
+    """Hit ratios of the document search caches in this worker"""
+    return jsonify(retrieval_cache.stats()), 200
@@ -2,6 +2,7 @@ from __init__ import app, login_required
 from flask import  request, jsonify, g
 from services.handle_feed import FeedError, create_feed_entry, get_feed_by_id, get_feeds_by_user_id, get_new_feeds, update_feed_entry, delete_feeds_by_user_id, like_feed_entry, retweet_feed_entry, delete_feed_entry
 from data_classes.common_classes import CreateFeedRequest
+from libs.weaviate_lib import CursorError
 
 
 
@@ -47,15 +48,17 @@ def get_user_feeds_endpoint(user_id: str):
     try:
         limit = int(request.args.get('limit', 10))
         offset = int(request.args.get('offset', 0))
+        cursor = request.args.get('cursor')
 
-        feeds = get_feeds_by_user_id(user_id, limit, offset)
+        feeds, next_cursor = get_feeds_by_user_id(user_id, limit, offset, cursor)
 
         return jsonify({
             "status": "success",
-            "data": feeds
+            "data": feeds,
+            "next_cursor": next_cursor
         }), 200
 
-    except FeedError as e:
+    except (FeedError, CursorError) as e:
         return jsonify({"error": e.message}), e.status_code
     except Exception as e:
         print(f"Error in get_user_feeds_endpoint: {str(e)}")
@@ -68,6 +71,7 @@ def get_feeds_endpoint():
     try:
         limit = int(request.args.get('limit', 10))
         offset = int(request.args.get('offset', 0))
+        cursor = request.args.get('cursor')
 
         filters = {
             "user_id": request.args.get('user_id'),
@@ -78,14 +82,15 @@ def get_feeds_endpoint():
         # Remove None values from filters
         filters = {k: v for k, v in filters.items() if v is not None}
 
-        feeds = get_new_feeds(limit, offset, filters=filters)
+        feeds, next_cursor = get_new_feeds(limit, offset, filters=filters, cursor=cursor)
 
         return jsonify({
             "status": "success",
-            "data": feeds
+            "data": feeds,
+            "next_cursor": next_cursor
         }), 200
 
-    except FeedError as e:
+    except (FeedError, CursorError) as e:
         return jsonify({"error": e.message}), e.status_code
     except Exception as e:
         print(f"Error in get_feeds_endpoint: {str(e)}")
@@ -1,6 +1,7 @@
 from flask import request, jsonify, g
 from services.upload_file import get_files, get_file_by_id, create_file, update_file, delete_file
 from data_classes.common_classes import File
+from libs.weaviate_lib import CursorError
 import logging
 from __init__ import app, login_required
 logger = logging.getLogger(__name__)
@@ -13,7 +14,8 @@ def get_files_endpoint():
     try:
         limit = int(request.args.get('limit', 10))
         offset = int(request.args.get('offset', 0))
-        files, total_count = get_files(limit, offset)
+        cursor = request.args.get('cursor')
+        files, total_count, next_cursor = get_files(limit, offset, cursor)
         
         # Calculate pagination info
         page_number = (offset // limit) + 1 if limit > 0 else 1
@@ -24,7 +26,11 @@ def get_files_endpoint():
         response.headers['X-Page-Size'] = str(limit)
         response.headers['X-Page-Number'] = str(page_number)
         response.headers['X-Total-Pages'] = str(total_pages)
+        if next_cursor:
+            response.headers['X-Next-Cursor'] = next_cursor
         return response, 200
+    except CursorError as e:
+        return jsonify({"error": e.message}), e.status_code
     except Exception as e:
         logger.error(f"Error getting files: {str(e)}")
         return jsonify({"error": str(e)}), 500
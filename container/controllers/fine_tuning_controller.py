@@ -4,9 +4,9 @@ Fine-tuning controller for handling fine-tuning requests.
 
 from flask import request, jsonify, g
 from __init__ import app, login_required, admin_required
-from services.handle_messages import fine_tune_messages, get_messages_list
+from services.handle_messages import fine_tune_approved_messages
 from services.handle_fine_tuning_models import get_fine_tuning_model_by_id, update_fine_tuning_model, FineTuningModelError
-from data_classes.common_classes import FineTuningStatus, ApprovalStatus
+from data_classes.common_classes import FineTuningStatus
 from libs.jsonl_converter import convert_json_to_jsonl, save_jsonl_to_file, validate_fine_tune_data
 import logging
 from libs.google_vertex import get_fine_tuning_job_list, upload_to_gcs
@@ -33,21 +33,9 @@ def start_fine_tuning():
         # if not message_ids:
         #     return jsonify({"error": "message_ids must be provided"}), 400
 
-        result = get_messages_list(
-            limit=1000,
-            include_related=True,
-            approval_status=ApprovalStatus.APPROVED.value
-        )
-        if "error" in result:
-            return jsonify({"error": f"Failed to get messages: {result['error']}"}), 400
-        messages = result.get("messages", [])
-        
-        if not messages:
-            return jsonify({"error": "No messages found for fine-tuning"}), 400
-        
-        
-        # Start fine-tuning
-        result = fine_tune_messages(messages, base_model)
+        # Start fine-tuning on the newest FINE_TUNE_MAX_PAIRS approved pairs,
+        # streamed to the training file; the full dataset is exported offline
+        result = fine_tune_approved_messages(base_model)
         
         if "error" in result:
             return jsonify({"error": result["error"]}), 400
@@ -1,6 +1,7 @@
 from flask import request, jsonify, g
-from __init__ import app, login_required
-from services.handle_messages import update_message, delete_message, get_message_by_id, get_messages_list, MessageError, save_q_and_a_pairs_to_system, like_message, dislike_message
+from __init__ import app, login_required, admin_required
+from services.handle_messages import update_message, delete_message, get_message_by_id, get_messages_list, MessageError, save_q_and_a_pairs_to_system, like_message, dislike_message, backfill_message_reactions
+from libs.background_jobs import background_jobs
 import logging
 import json
 logger = logging.getLogger(__name__)
@@ -13,6 +14,7 @@ def get_messages_endpoint():
         # Get query parameters for pagination and filtering
         limit = request.args.get('limit', 100, type=int)
         offset = request.args.get('offset', 0, type=int)
+        cursor = request.args.get('cursor', type=str)
         session_id = request.args.get('session_id', type=str)
         role = request.args.get('role', type=str)
         agent_id = request.args.get('agent_id', type=str)
@@ -28,7 +30,8 @@ def get_messages_endpoint():
             agent_id=agent_id,
             search=search,
             include_related=include_related,
-            approval_status=approval_status
+            approval_status=approval_status,
+            cursor=cursor
         )
         
         if "error" in result:
@@ -52,12 +55,6 @@ def update_message_endpoint(message_id):
         if not data:
             return jsonify({"error": "No data provided"}), 400
         
-        # data is an json array, now join it with , 
-        if "like_user_ids" in data:
-            data["like_user_ids"] = ",".join(data["like_user_ids"])
-        if "dislike_user_ids" in data:
-            data["dislike_user_ids"] = ",".join(data["dislike_user_ids"])
-
         # Validate required fields
         allowed_fields = ["content", "role", "mode", "feedback", "edited_content", "approval_status", "like_user_ids", "dislike_user_ids"]
         update_data = {}
@@ -202,4 +199,17 @@ def dislike_message_endpoint(message_id):
         return jsonify({"error": e.message}), e.status_code
     except Exception as e:
         logger.error(f"Error in dislike_message_endpoint: {str(e)}")
-        return jsonify({"error": "Internal server error"}), 500
\ No newline at end of file
+        return jsonify({"error": "Internal server error"}), 500
+
+@app.route('/api/v1/messages/reactions/backfill', methods=['POST'])
+@admin_required
+def backfill_message_reactions_endpoint():
+    """Convert legacy comma-joined reactions to arrays in the background"""
+    try:
+        batch_size = request.args.get('batch_size', 500, type=int)
+        # Keyed, so a second request while it runs is a no-op
+        background_jobs.submit(backfill_message_reactions, batch_size=batch_size, key="message-reactions-backfill")
+        return jsonify({"message": "Reaction backfill started"}), 202
+    except Exception as e:
+        logger.error(f"Error in backfill_message_reactions_endpoint: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
@@ -8,6 +8,7 @@ from services.handle_sections import (
     search_sections
 )
 from data_classes.common_classes import Section
+from libs.weaviate_lib import CursorError
 import logging
 from __init__ import app, login_required
 logger = logging.getLogger(__name__)
@@ -39,7 +40,8 @@ def get_sections_endpoint():
         print(email)
         limit = int(request.args.get('limit', 10))
         offset = int(request.args.get('offset', 0))
-        sections, total_count = get_sections(email, limit, offset)
+        cursor = request.args.get('cursor')
+        sections, total_count, next_cursor = get_sections(email, limit, offset, cursor)
         
         # Calculate pagination info
         page_number = (offset // limit) + 1 if limit > 0 else 1
@@ -50,7 +52,11 @@ def get_sections_endpoint():
         response.headers['X-Page-Size'] = str(limit)
         response.headers['X-Page-Number'] = str(page_number)
         response.headers['X-Total-Pages'] = str(total_pages)
+        if next_cursor:
+            response.headers['X-Next-Cursor'] = next_cursor
         return response, 200
+    except CursorError as e:
+        return jsonify({"error": e.message}), e.status_code
     except Exception as e:
         logger.error(f"Error getting sections: {str(e)}")
         return jsonify({"error": str(e)}), 500
@@ -2,6 +2,7 @@ from __init__ import app, login_required, contributor_required
 from flask import request, jsonify
 from services.handle_story import create_story, update_story, delete_story, StoryError, get_story_by_id, get_stories_by_filters
 from data_classes.common_classes import CreateStoryRequest
+from libs.weaviate_lib import CursorError
 
 
 
@@ -91,7 +92,7 @@ def update_story_endpoint(story_id):
             "audio_url": audio_url
         }.items() if v is not None}
 
-        update_story(story_id, update_data)
+        update_story(story_id, update_data, story)
 
         return jsonify({
             "message": "Story updated successfully"
@@ -131,6 +132,7 @@ def get_stories_endpoint():
     try:
         limit = int(request.args.get('limit', 10))
         offset = int(request.args.get('offset', 0))
+        cursor = request.args.get('cursor')
         filters = {
             "author": request.args.get('author'),
             "language": request.args.get('language'),
@@ -140,13 +142,14 @@ def get_stories_endpoint():
         # Remove None values from filters
         filters = {k: v for k, v in filters.items() if v is not None}
 
-        stories = get_stories_by_filters(filters, limit=limit, offset=offset)
+        stories, next_cursor = get_stories_by_filters(filters, limit=limit, offset=offset, cursor=cursor)
         return jsonify({
             "status": "success",
-            "data": stories
+            "data": stories,
+            "next_cursor": next_cursor
         }), 200
 
-    except StoryError as e:
+    except (StoryError, CursorError) as e:
         return jsonify({"error": e.message}), e.status_code
     except Exception as e:
         print(f"Error in get_stories_endpoint: {str(e)}")
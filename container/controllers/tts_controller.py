@@ -1,7 +1,9 @@
 from flask import request, jsonify, g
-from services.handle_tts import create_audio_stream_response, synthesize_text_to_base64, tts_service
+from services.handle_tts import create_audio_stream_response, create_cached_audio_response, synthesize_to_cache, tts_service
+from libs.audio_cache import audio_cache, is_cache_key
 from google.cloud import texttospeech
 from __init__ import app, login_required
+import base64
 import logging
 
 logger = logging.getLogger(__name__)
@@ -122,8 +124,12 @@ def tts_base64_endpoint():
         "audio_encoding": "MP3",
         "speaking_rate": 1.0,
         "pitch": 0.0,
-        "volume_gain_db": 0.0
+        "volume_gain_db": 0.0,
+        "format": "base64"
     }
+
+    With "format": "url" the audio is not inlined; fetch it from audio_url,
+    which supports Range requests and browser caching.
     """
     try:
         data = request.get_json()
@@ -163,8 +169,8 @@ def tts_base64_endpoint():
         if not (-96.0 <= volume_gain_db <= 16.0):
             return jsonify({"error": "Volume gain must be between -96.0 and 16.0"}), 400
         
-        # Synthesize to base64
-        audio_base64 = synthesize_text_to_base64(
+        # Synthesize, or reuse the cached audio
+        audio_key, audio_content = synthesize_to_cache(
             text=text,
             voice_name=voice_name,
             language_code=language_code,
@@ -174,17 +180,43 @@ def tts_base64_endpoint():
             volume_gain_db=volume_gain_db
         )
         
-        return jsonify({
-            "audio_base64": audio_base64,
+        result = {
             "content_type": "audio/mpeg" if audio_encoding == texttospeech.AudioEncoding.MP3 else "audio/wav",
-            "text_length": len(text)
-        }), 200
+            "text_length": len(text),
+            "audio_key": audio_key,
+            "audio_url": f"/api/v1/tts/audio/{audio_key}"
+        }
+        if data.get('format', 'base64') != 'url':
+            result["audio_base64"] = base64.b64encode(audio_content).decode('utf-8')
+        return jsonify(result), 200
         
     except Exception as e:
         logger.error(f"Error in TTS base64 endpoint: {str(e)}")
         return jsonify({"error": "Internal server error"}), 500
 
 
+@app.route('/api/v1/tts/audio/<audio_key>', methods=['GET'])
+def get_cached_audio_endpoint(audio_key: str):
+    """
+    Serve synthesized audio by its key (audio_key / X-Audio-Key of the other
+    TTS endpoints), with Range and conditional request support.
+
+    Not behind login so that <audio> elements can stream it: the key is an
+    HMAC of the text and voice settings under a server secret, so it cannot
+    be computed from a known text, and is handed out only to logged-in users.
+    """
+    try:
+        if not is_cache_key(audio_key):
+            return jsonify({"error": "Invalid audio key"}), 400
+        response = create_cached_audio_response(audio_key)
+        if response is None:
+            return jsonify({"error": "Audio not found"}), 404
+        return response
+    except Exception as e:
+        logger.error(f"Error serving cached audio: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
+
+
 @app.route('/api/v1/tts/voices', methods=['GET'])
 @login_required
 def get_voices_endpoint():
@@ -220,7 +252,8 @@ def tts_health_endpoint():
         return jsonify({
             "status": "healthy",
             "service": "Google Cloud Text-to-Speech",
-            "available_voices_count": len(voices)
+            "available_voices_count": len(voices),
+            "cache": audio_cache.stats()
         }), 200
         
     except Exception as e:
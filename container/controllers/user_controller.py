@@ -9,6 +9,7 @@ from services.handle_user import (
     check_user_permissions, UserError, get_user_stats, create_user, get_retention_rate
 )
 from data_classes.common_classes import UserRole
+from libs.weaviate_lib import CursorError
 
 
 @app.route('/api/v1/users', methods=['POST'])
@@ -85,21 +86,23 @@ def get_users():
         limit = request.args.get('limit', 100, type=int)
         offset = request.args.get('offset', 0, type=int)
         search = request.args.get('search', '', type=str)
+        cursor = request.args.get('cursor', type=str)
         # Ensure reasonable limits
         limit = min(limit, 1000)  # Max 1000 users per request
         offset = max(offset, 0)
 
         # Get users
-        users = get_all_users(limit=limit, offset=offset, search=search)
+        users, next_cursor = get_all_users(limit=limit, offset=offset, search=search, cursor=cursor)
         
         return jsonify({
             "users": users,
             "limit": limit,
             "offset": offset,
-            "count": len(users)
+            "count": len(users),
+            "next_cursor": next_cursor
         }), 200
 
-    except UserError as e:
+    except (UserError, CursorError) as e:
         return jsonify({"error": e.message}), e.status_code
     except Exception as e:
         print(f"Error in get_users: {str(e)}")
@@ -6,7 +6,7 @@ import json
 
 @dataclass
 class StreamEvent:
-    type: Literal["text", "end_of_stream", "thought"]
+    type: Literal["text", "end_of_stream", "thought", "audio"]
     data: str
     metadata: Optional[Dict[str, Any]] = None
     def to_dict_json(self):
@@ -0,0 +1,86 @@
+"""
+Gunicorn configuration for serving the API in production.
+
+Pre-fork model: the master process initializes the Weaviate schema once, then
+forks workers which each open their own Weaviate connection. SSE streams are
+served from a per-worker thread pool, and SIGTERM drains in-flight streams for
+up to GUNICORN_GRACEFUL_TIMEOUT seconds before workers are killed.
+
+Run with: gunicorn -c gunicorn.conf.py main:app
+"""
+
+import multiprocessing
+import os
+import sys
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 8080)}"
+
+# Worker model
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+# Set GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker and serve asgi:application
+# to run the streaming endpoints natively on each worker's event loop.
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+threads = int(os.environ.get("GUNICORN_THREADS", 8))
+
+# A gthread worker heartbeats from its main thread, so long SSE streams do not
+# trip this timeout; it only catches workers that are truly stuck.
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 120))
+# On SIGTERM workers stop accepting connections and get this long to finish
+# in-flight requests (e.g. an answer that is still streaming).
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", 120))
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", 5))
+
+# Each worker imports the app itself so that network clients are never shared
+# across a fork.
+preload_app = False
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.environ.get("GUNICORN_LOG_LEVEL", "info")
+
+
+def _should_initialize_schema() -> bool:
+    return os.environ.get("WEAVIATE_INIT_SCHEMA", "1") != "0"
+
+
+def on_starting(server):
+    """Initialize the Weaviate schema once, in the master, before forking."""
+    if not _should_initialize_schema():
+        return
+    from libs.weaviate_lib import initialize_schema, close_client
+    try:
+        initialize_schema()
+    finally:
+        # Workers reconnect after the fork, see post_fork
+        close_client()
+
+
+def post_fork(server, worker):
+    """Give every worker its own Weaviate connection."""
+    if "libs.weaviate_lib" in sys.modules:
+        from libs.weaviate_lib import connect_client
+        connect_client()
+        server.log.info(f"Worker {worker.pid}: Weaviate client connected")
+
+
+def worker_exit(server, worker):
+    # Write queued messages and likes before the connection goes away
+    if "libs.reaction_aggregator" in sys.modules:
+        from libs.reaction_aggregator import shutdown_reaction_aggregators
+        shutdown_reaction_aggregators()
+    if "libs.background_jobs" in sys.modules:
+        from libs.background_jobs import background_jobs
+        background_jobs.shutdown()
+    if "libs.weaviate_lib" in sys.modules:
+        from libs.weaviate_lib import close_async_client, close_client
+        if "libs.event_loop" in sys.modules:
+            from libs.event_loop import run_coroutine
+            try:
+                run_coroutine(close_async_client(), timeout=10)
+            except Exception as e:
+                server.log.warning(f"Worker {worker.pid}: failed to close async Weaviate client: {e}")
+        close_client()
@@ -0,0 +1,231 @@
+"""
+Content-addressed cache of synthesized speech.
+
+Audio is keyed by an HMAC of everything that affects it (text, voice,
+language, encoding, rate, pitch, gain), so the same story or greeting is
+synthesized once and the key doubles as a stable URL. The HMAC secret
+(TTS_AUDIO_KEY_SECRET, else JWT_SECRET) keeps keys unguessable even for
+known texts, and keeps the URL from telling whether a text was ever
+synthesized. Changing it orphans the cached clips.
+
+- memory: LRU of recently played clips, bounded by total bytes; clips larger
+  than TTS_CACHE_MEMORY_MAX_ITEM_BYTES only go to disk.
+- disk: one file per clip under TTS_CACHE_DIR, shared by every worker using
+  the same directory and bounded by TTS_CACHE_DISK_BYTES. Reads refresh the
+  file's mtime and the oldest files are evicted first. Files are written to a
+  temporary name and renamed, so readers never see a partial clip. Set
+  TTS_CACHE_DIR to an empty string to keep the cache in memory only.
+"""
+
+import hashlib
+import hmac
+import json
+import logging
+import os
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+TTS_AUDIO_KEY_SECRET = (os.getenv("TTS_AUDIO_KEY_SECRET") or os.getenv("JWT_SECRET", "your-secret-key")).encode("utf-8")
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", ".tts_cache")
+TTS_CACHE_DISK_BYTES = int(os.getenv("TTS_CACHE_DISK_BYTES", 1024 * 1024 * 1024))
+TTS_CACHE_MEMORY_BYTES = int(os.getenv("TTS_CACHE_MEMORY_BYTES", 64 * 1024 * 1024))
+TTS_CACHE_MEMORY_MAX_ITEM_BYTES = int(os.getenv("TTS_CACHE_MEMORY_MAX_ITEM_BYTES", 2 * 1024 * 1024))
+# Eviction frees space down to this share of the disk budget, so it does not run on every write
+TTS_CACHE_EVICT_TO = 0.9
+
+
+def audio_cache_key(
+    text: str,
+    voice_name: str,
+    language_code: str,
+    audio_encoding: Any,
+    speaking_rate: float = 1.0,
+    pitch: float = 0.0,
+    volume_gain_db: float = 0.0,
+) -> str:
+    """Hex digest identifying the audio of a synthesis request, keyed with TTS_AUDIO_KEY_SECRET"""
+    params = [
+        unicodedata.normalize("NFC", text),
+        voice_name,
+        language_code,
+        getattr(audio_encoding, "name", str(audio_encoding)),
+        float(speaking_rate),
+        float(pitch),
+        float(volume_gain_db),
+    ]
+    return hmac.new(TTS_AUDIO_KEY_SECRET, json.dumps(params, ensure_ascii=False).encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+def is_cache_key(key: str) -> bool:
+    return len(key) == 64 and all(c in "0123456789abcdef" for c in key)
+
+
+def audio_content_type(head: bytes) -> str:
+    """Content type of an audio clip from its first bytes"""
+    if head[:4] == b"OggS":
+        return "audio/ogg"
+    if head[:4] == b"RIFF":
+        return "audio/wav"
+    return "audio/mpeg"
+
+
+class AudioCache:
+    def __init__(
+        self,
+        directory: Optional[str] = TTS_CACHE_DIR,
+        disk_bytes: int = TTS_CACHE_DISK_BYTES,
+        memory_bytes: int = TTS_CACHE_MEMORY_BYTES,
+        memory_max_item_bytes: int = TTS_CACHE_MEMORY_MAX_ITEM_BYTES,
+    ):
+        self.directory = directory
+        self.disk_bytes = disk_bytes
+        self.memory_bytes = memory_bytes
+        self.memory_max_item_bytes = memory_max_item_bytes
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_size = 0
+        # Bytes on disk as far as this process knows; None until first measured
+        self._disk_size: Optional[int] = None
+        self._lock = threading.Lock()
+        self._evict_lock = threading.Lock()
+
+    def path(self, key: str) -> Optional[str]:
+        if not self.directory or not is_cache_key(key):
+            return None
+        return os.path.join(self.directory, key[:2], key)
+
+    def _remember(self, key: str, audio: bytes):
+        # Called with self._lock held
+        if len(audio) > self.memory_max_item_bytes:
+            return
+        if key in self._memory:
+            self._memory_size -= len(self._memory.pop(key))
+        self._memory[key] = audio
+        self._memory_size += len(audio)
+        while self._memory_size > self.memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_size -= len(evicted)
+
+    def lookup(self, key: str) -> Tuple[Optional[bytes], Optional[str]]:
+        """
+        Find a clip without reading it from disk.
+
+        Returns:
+            (audio, None) from memory, (None, path) from disk, or (None, None)
+        """
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return audio, None
+        path = self.path(key)
+        try:
+            if path is None:
+                raise FileNotFoundError(key)
+            # Refresh the mtime: eviction removes the least recently used files
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None, None
+        with self._lock:
+            self.disk_hits += 1
+        return None, path
+
+    def get(self, key: str) -> Optional[bytes]:
+        audio, path = self.lookup(key)
+        if path is not None:
+            try:
+                with open(path, "rb") as f:
+                    audio = f.read()
+            except OSError:
+                return None
+            with self._lock:
+                self._remember(key, audio)
+        return audio
+
+    def put(self, key: str, audio: bytes):
+        if not audio:
+            return
+        with self._lock:
+            self._remember(key, audio)
+        path = self.path(key)
+        if path is None:
+            return
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(audio)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.error(f"Failed to write cached audio {key}: {str(e)}")
+            return
+        with self._lock:
+            if self._disk_size is not None:
+                self._disk_size += len(audio)
+            over = self._disk_size is None or self._disk_size > self.disk_bytes
+        if over:
+            self.evict()
+
+    def _files(self) -> List[Tuple[float, int, str]]:
+        files = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                # Leave writes in progress alone; older temporary files are
+                # from writes that died half way and go first
+                if name.endswith(".tmp") and stat.st_mtime > time.time() - 3600:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+        return files
+
+    def evict(self):
+        """Remove the least recently used files until the disk tier fits its budget"""
+        if not self.directory or not self._evict_lock.acquire(blocking=False):
+            return
+        try:
+            files = self._files()
+            total = sum(size for _, size, _ in files)
+            if total > self.disk_bytes:
+                target = self.disk_bytes * TTS_CACHE_EVICT_TO
+                for _, size, path in sorted(files):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        continue
+                    total -= size
+                    if total <= target:
+                        break
+            with self._lock:
+                self._disk_size = total
+        finally:
+            self._evict_lock.release()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_ratio": (self.memory_hits + self.disk_hits) / total if total else 0.0,
+                "memory_items": len(self._memory),
+                "memory_bytes": self._memory_size,
+                "disk_bytes": self._disk_size,
+            }
+
+
+audio_cache = AudioCache()
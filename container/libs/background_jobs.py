@@ -0,0 +1,154 @@
+"""
+Background persistence pipeline for work that does not need to finish before
+a response is sent.
+
+- insert(): objects are buffered per collection and written with insert_many
+  every `flush_interval` seconds or once `batch_size` objects are waiting.
+  Callers choose the UUID up front, so it doubles as the idempotency key:
+  batch writes replace an object with the same UUID, so a retried batch
+  overwrites what an earlier attempt wrote with the same properties instead
+  of creating a duplicate.
+- submit(): arbitrary jobs (e.g. an LLM call followed by an update) run on a
+  small thread pool with exponential backoff between attempts. Jobs submitted
+  with a key that is already queued or running are dropped.
+
+Pending work is flushed when the process exits.
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+from libs.retry import backoff_delay
+from libs.weaviate_lib import insert_objects_with_ids
+
+logger = logging.getLogger(__name__)
+
+BACKGROUND_FLUSH_INTERVAL = float(os.getenv("BACKGROUND_FLUSH_INTERVAL", 0.5))
+BACKGROUND_BATCH_SIZE = int(os.getenv("BACKGROUND_BATCH_SIZE", 100))
+BACKGROUND_MAX_RETRIES = int(os.getenv("BACKGROUND_MAX_RETRIES", 5))
+BACKGROUND_JOB_WORKERS = int(os.getenv("BACKGROUND_JOB_WORKERS", 4))
+
+
+class BackgroundJobs:
+    def __init__(
+        self,
+        flush_interval: float = BACKGROUND_FLUSH_INTERVAL,
+        batch_size: int = BACKGROUND_BATCH_SIZE,
+        max_retries: int = BACKGROUND_MAX_RETRIES,
+        job_workers: int = BACKGROUND_JOB_WORKERS,
+    ):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.job_workers = job_workers
+        # collection -> uuid -> (properties, attempts)
+        self._pending: Dict[str, Dict[str, Tuple[Dict[str, Any], int]]] = {}
+        self._retry_after = 0.0
+        self._active_jobs: Set[str] = set()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pid: Optional[int] = None
+
+    def _ensure_started(self):
+        # Called with self._lock held. A forked worker inherits the buffers but
+        # not the threads.
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._executor = ThreadPoolExecutor(max_workers=self.job_workers, thread_name_prefix="background-job")
+            threading.Thread(target=self._run, name="background-flush", daemon=True).start()
+
+    def insert(self, collection_name: str, uuid: str, properties: Dict[str, Any]):
+        """Queue an object for insertion under the given UUID"""
+        with self._lock:
+            self._ensure_started()
+            pending = self._pending.setdefault(collection_name, {})
+            pending[uuid] = (properties, 0)
+            if len(pending) >= self.batch_size:
+                self._wake.set()
+
+    def submit(self, func: Callable, *args, key: Optional[str] = None, **kwargs):
+        """Run func in the background, retrying on exceptions"""
+        with self._lock:
+            self._ensure_started()
+            if key is not None:
+                if key in self._active_jobs:
+                    return
+                self._active_jobs.add(key)
+            executor = self._executor
+        executor.submit(self._run_job, func, args, kwargs, key)
+
+    def _run_job(self, func: Callable, args: tuple, kwargs: dict, key: Optional[str]):
+        try:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    func(*args, **kwargs)
+                    return
+                except Exception as e:
+                    if attempt == self.max_retries:
+                        logger.error(f"Background job {key or func.__name__} failed after {attempt + 1} attempts: {str(e)}")
+                        return
+                    time.sleep(backoff_delay(attempt))
+        finally:
+            if key is not None:
+                with self._lock:
+                    self._active_jobs.discard(key)
+
+    def flush(self):
+        """Write every queued object now"""
+        with self._flush_lock:
+            with self._lock:
+                batches, self._pending = self._pending, {}
+            failed: Dict[str, Dict[str, Tuple[Dict[str, Any], int]]] = {}
+            for collection_name, objects in batches.items():
+                items = list(objects.items())
+                for start in range(0, len(items), self.batch_size):
+                    chunk = dict(items[start:start + self.batch_size])
+                    try:
+                        errors = insert_objects_with_ids(
+                            collection_name,
+                            {uuid: properties for uuid, (properties, _) in chunk.items()}
+                        )
+                    except Exception as e:
+                        errors = {uuid: str(e) for uuid in chunk}
+                    for uuid, message in errors.items():
+                        properties, attempts = chunk[uuid]
+                        if attempts + 1 > self.max_retries:
+                            logger.error(f"Dropping {collection_name} object {uuid} after {attempts + 1} attempts: {message}")
+                            continue
+                        failed.setdefault(collection_name, {})[uuid] = (properties, attempts + 1)
+            if failed:
+                with self._lock:
+                    for collection_name, objects in failed.items():
+                        pending = self._pending.setdefault(collection_name, {})
+                        for uuid, entry in objects.items():
+                            pending.setdefault(uuid, entry)
+                    attempts = max(attempts for objects in failed.values() for _, attempts in objects.values())
+                    self._retry_after = time.monotonic() + backoff_delay(attempts - 1)
+
+    def _run(self):
+        pid = os.getpid()
+        while self._pid == pid:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            if self._pending and time.monotonic() >= self._retry_after:
+                self.flush()
+
+    def shutdown(self):
+        """Flush queued objects and wait for running jobs"""
+        if self._pid != os.getpid():
+            return
+        self.flush()
+        if self._executor:
+            self._executor.shutdown(wait=True)
+        self.flush()
+
+
+background_jobs = BackgroundJobs()
+atexit.register(background_jobs.shutdown)
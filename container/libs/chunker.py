@@ -1,17 +1,134 @@
-from typing import List, Optional
+import os
+import re
+from typing import Callable, List, Literal, Optional
+import numpy as np
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_experimental.text_splitter import SemanticChunker
 from langchain.schema import Document
-from langchain_openai import OpenAIEmbeddings
 from dotenv import load_dotenv
+from libs.embedding_engine import embedding_engine
 
 
 load_dotenv()
 
-# Initialize OpenAI embeddings with proper configuration
-embed_model = OpenAIEmbeddings(
-    model="text-embedding-3-small"  # Using the latest embedding model
-)
+# Batched, cached embeddings (see libs/embedding_engine.py). Sentences already
+# embedded for an earlier upload are not sent to OpenAI again.
+embed_model = embedding_engine
+
+# "native" runs breakpoint detection with NumPy, "langchain" uses SemanticChunker
+CHUNKING_MODE = os.getenv("CHUNKING_MODE", "native")
+
+BreakpointThresholdType = Literal['percentile', 'standard_deviation', 'interquartile', 'gradient']
+
+# Same defaults as SemanticChunker
+BREAKPOINT_DEFAULTS = {
+    'percentile': 95,
+    'standard_deviation': 3,
+    'interquartile': 1.5,
+    'gradient': 95,
+}
+
+def combine_sentences(sentences: List[str], buffer_size: int = 1) -> List[str]:
+    """Join every sentence with its buffer_size neighbours on each side"""
+    return [
+        " ".join(sentences[max(0, i - buffer_size):i + buffer_size + 1])
+        for i in range(len(sentences))
+    ]
+
+def adjacent_distances(embeddings: np.ndarray) -> np.ndarray:
+    """Cosine distance between each row and the next, for all rows at once"""
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    normalized = embeddings / np.where(norms == 0, 1, norms)
+    return 1.0 - np.einsum('ij,ij->i', normalized[:-1], normalized[1:])
+
+def find_breakpoints(
+    distances: np.ndarray,
+    threshold_type: BreakpointThresholdType = 'percentile',
+    threshold_amount: Optional[float] = None
+) -> np.ndarray:
+    """
+    Indices after which a new chunk starts, with SemanticChunker's threshold rules.
+
+    Args:
+        distances: Cosine distances between adjacent sentence windows
+        threshold_type: percentile, standard_deviation, interquartile or gradient
+        threshold_amount: Threshold parameter, defaults to SemanticChunker's
+
+    Returns:
+        Sorted array of sentence indices
+    """
+    if threshold_type not in BREAKPOINT_DEFAULTS:
+        raise ValueError(f"Unknown breakpoint threshold type: {threshold_type}")
+    amount = BREAKPOINT_DEFAULTS[threshold_type] if threshold_amount is None else threshold_amount
+    values = distances
+    if threshold_type == 'percentile':
+        threshold = np.percentile(distances, amount)
+    elif threshold_type == 'standard_deviation':
+        threshold = np.mean(distances) + amount * np.std(distances)
+    elif threshold_type == 'interquartile':
+        q1, q3 = np.percentile(distances, [25, 75])
+        threshold = np.mean(distances) + amount * (q3 - q1)
+    else:
+        values = np.gradient(distances, np.arange(len(distances))) if len(distances) > 1 else distances
+        threshold = np.percentile(values, amount)
+    return np.flatnonzero(values > threshold)
+
+def native_semantic_chunk_text(
+    text: str,
+    breakpoint_threshold_type: BreakpointThresholdType = 'percentile',
+    breakpoint_threshold_amount: Optional[float] = None,
+    buffer_size: int = 1,
+    sentence_split_regex: str = '(?<=[.?!])\\s+',
+    min_chunk_size: Optional[int] = None,
+    embeddings: Optional[np.ndarray] = None,
+    embed: Optional[Callable[[List[str]], np.ndarray]] = None
+) -> List[Document]:
+    """
+    Semantic chunking with the same rules as SemanticChunker, with distances
+    and thresholds computed as NumPy array operations.
+
+    Args:
+        text: The input text to be chunked
+        breakpoint_threshold_type: percentile, standard_deviation, interquartile or gradient
+        breakpoint_threshold_amount: Threshold parameter, defaults to SemanticChunker's
+        buffer_size: Neighbouring sentences embedded together with each sentence
+        sentence_split_regex: Regex used to split the text into sentences
+        min_chunk_size: Chunks shorter than this many characters are merged into the next one
+        embeddings: Precomputed embeddings of the combined sentence windows, one row per sentence
+        embed: Embedding function used when embeddings is None
+
+    Returns:
+        List[Document]: A list of Document objects containing the chunked text
+    """
+    sentences = re.split(sentence_split_regex, text)
+    if len(sentences) == 1:
+        return [Document(page_content=text)]
+    if breakpoint_threshold_type == 'gradient' and len(sentences) == 2:
+        return [Document(page_content=sentence) for sentence in sentences]
+
+    if embeddings is None:
+        embeddings = (embed or embed_model.embed)(combine_sentences(sentences, buffer_size))
+    elif len(embeddings) != len(sentences):
+        raise ValueError(f"Expected {len(sentences)} embeddings, got {len(embeddings)}")
+
+    breakpoints = find_breakpoints(
+        adjacent_distances(embeddings),
+        breakpoint_threshold_type,
+        breakpoint_threshold_amount
+    )
+
+    chunks = []
+    start = 0
+    for index in breakpoints:
+        content = " ".join(sentences[start:index + 1])
+        if min_chunk_size is not None and len(content) < min_chunk_size:
+            continue
+        chunks.append(Document(page_content=content))
+        start = index + 1
+    if start < len(sentences):
+        chunks.append(Document(page_content=" ".join(sentences[start:])))
+    return chunks
 
 # Semantic Chunking
 def semantic_chunk_text(
@@ -31,6 +148,14 @@ def semantic_chunk_text(
     """
     if separators is None:
         separators = ["\n\n", "\n", " ", ""]
+
+    if CHUNKING_MODE == "native":
+        return native_semantic_chunk_text(
+            text,
+            breakpoint_threshold_type='percentile',
+            buffer_size=1,
+            sentence_split_regex='(?<=[.?!])\\s+',
+        )
     
 #     class langchain_experimental.text_splitter.SemanticChunker(
 # embeddings: Embeddings,
@@ -44,7 +169,7 @@ def semantic_chunk_text(
 # )
     # Initialize the text splitter
     text_splitter = SemanticChunker(
-        embeddings=embed_model,
+        embeddings=embed_model.instance(),
         buffer_size=1,
         add_start_index=False,
         breakpoint_threshold_type='percentile',
@@ -0,0 +1,198 @@
+"""
+Batched, cached OpenAI embeddings.
+
+EmbeddingEngine implements LangChain's Embeddings interface, so it can be
+passed to SemanticChunker. It can also embed the final chunks so their
+vectors go to Weaviate directly instead of being re-embedded by the
+vectorizer.
+
+- Texts are deduplicated and sent in batches of EMBEDDING_BATCH_SIZE, with at
+  most EMBEDDING_MAX_CONCURRENCY requests in flight.
+- Vectors are cached by content hash (model + text). The cache is an
+  append-only file of fixed-size records (32-byte hash + float32 vector) that
+  is memory-mapped, so it survives restarts and is shared by every process
+  using the same EMBEDDING_CACHE_DIR. Set EMBEDDING_CACHE_DIR to an empty
+  string to keep the cache in memory only.
+"""
+
+import fcntl
+import hashlib
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+from dotenv import load_dotenv
+from langchain_core.embeddings import Embeddings
+
+from libs.lazy import lazy
+from libs.provider_clients import get_openai_client
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", 256))
+EMBEDDING_MAX_CONCURRENCY = int(os.getenv("EMBEDDING_MAX_CONCURRENCY", 4))
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", ".embedding_cache")
+
+KEY_SIZE = 32
+
+
+def content_hash(model: str, text: str) -> bytes:
+    return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).digest()
+
+
+class EmbeddingCache:
+    """Content-hash -> vector map backed by a memory-mapped append-only file"""
+
+    def __init__(self, directory: Optional[str], model: str):
+        self.directory = directory
+        self.model = model
+        self.dim: Optional[int] = None
+        self.path: Optional[str] = None
+        self._memory: Dict[bytes, np.ndarray] = {}
+        self._index: Dict[bytes, int] = {}
+        self._records: Optional[np.memmap] = None
+        self._rows = 0
+        self._lock = threading.Lock()
+        self._discover()
+
+    def _discover(self):
+        # Reuse a cache file written earlier for this model
+        if not self.directory or not os.path.isdir(self.directory):
+            return
+        prefix = f"{self.model}-"
+        for name in sorted(os.listdir(self.directory)):
+            if name.startswith(prefix) and name.endswith(".bin") and name[len(prefix):-4].isdigit():
+                self._open(int(name[len(prefix):-4]))
+                return
+
+    def _dtype(self) -> np.dtype:
+        return np.dtype([("key", f"S{KEY_SIZE}"), ("vector", "<f4", (self.dim,))])
+
+    def _open(self, dim: int):
+        # Called with self._lock held, once the vector size is known
+        self.dim = dim
+        if not self.directory:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self.path = os.path.join(self.directory, f"{self.model}-{dim}.bin")
+        open(self.path, "ab").close()
+        self._remap()
+
+    def _remap(self):
+        # Pick up records appended since the last map, by us or another process
+        record_size = self._dtype().itemsize
+        rows = os.path.getsize(self.path) // record_size
+        if rows == self._rows:
+            return
+        self._records = np.memmap(self.path, dtype=self._dtype(), mode="r", shape=(rows,)) if rows else None
+        for row in range(self._rows, rows):
+            self._index[bytes(self._records[row]["key"])] = row
+        self._rows = rows
+
+    def get_many(self, keys: List[bytes]) -> Dict[bytes, np.ndarray]:
+        found: Dict[bytes, np.ndarray] = {}
+        with self._lock:
+            if self.path and any(key not in self._memory and key not in self._index for key in keys):
+                self._remap()
+            for key in keys:
+                if key in self._memory:
+                    found[key] = self._memory[key]
+                elif key in self._index:
+                    found[key] = np.array(self._records[self._index[key]]["vector"])
+        return found
+
+    def put_many(self, vectors: Dict[bytes, np.ndarray]):
+        if not vectors:
+            return
+        with self._lock:
+            if self.dim is None:
+                self._open(len(next(iter(vectors.values()))))
+            if not self.path:
+                self._memory.update(vectors)
+                return
+            records = np.zeros(len(vectors), dtype=self._dtype())
+            for i, (key, vector) in enumerate(vectors.items()):
+                records[i]["key"] = key
+                records[i]["vector"] = vector
+            with open(self.path, "ab") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    # Whole records only, so a crash never leaves a shifted file
+                    size = f.seek(0, os.SEEK_END)
+                    f.truncate(size - size % records.itemsize)
+                    f.write(records.tobytes())
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+            self._remap()
+
+
+class EmbeddingEngine(Embeddings):
+    def __init__(
+        self,
+        model: str = EMBEDDING_MODEL,
+        batch_size: int = EMBEDDING_BATCH_SIZE,
+        max_concurrency: int = EMBEDDING_MAX_CONCURRENCY,
+        cache_dir: Optional[str] = EMBEDDING_CACHE_DIR,
+    ):
+        self.model = model
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.cache = EmbeddingCache(cache_dir, model)
+        self.requests = 0
+        self.texts_embedded = 0
+        self.cache_hits = 0
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        response = get_openai_client().embeddings.create(model=self.model, input=texts)
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Embed texts into a (len(texts), dim) float32 matrix"""
+        keys = [content_hash(self.model, text) for text in texts]
+        vectors = self.cache.get_many(keys)
+        self.cache_hits += sum(1 for key in keys if key in vectors)
+
+        missing: Dict[bytes, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors and key not in missing:
+                missing[key] = text
+        if missing:
+            missing_keys = list(missing.keys())
+            batches = [missing_keys[i:i + self.batch_size] for i in range(0, len(missing_keys), self.batch_size)]
+            with ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="embedding") as executor:
+                results = executor.map(lambda batch: self._embed_batch([missing[key] for key in batch]), batches)
+                new_vectors: Dict[bytes, np.ndarray] = {}
+                for batch, embeddings in zip(batches, results):
+                    for key, embedding in zip(batch, embeddings):
+                        new_vectors[key] = np.asarray(embedding, dtype=np.float32)
+            self.requests += len(batches)
+            self.texts_embedded += len(missing)
+            self.cache.put_many(new_vectors)
+            vectors.update(new_vectors)
+
+        if not texts:
+            return np.zeros((0, self.cache.dim or 0), dtype=np.float32)
+        return np.stack([vectors[key] for key in keys])
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed([text])[0].tolist()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "requests": self.requests,
+            "texts_embedded": self.texts_embedded,
+            "cache_hits": self.cache_hits,
+        }
+
+
+# Built on first use: opening the cache indexes every record in the cache file
+embedding_engine = lazy("embedding_engine", EmbeddingEngine)
@@ -0,0 +1,53 @@
+"""
+One asyncio event loop per worker process, shared by every request.
+
+Flask views are synchronous, so async code (LangGraph agents, concurrent RAG
+uploads) used to run on a brand new event loop per request. Instead, the loop
+below runs forever on a daemon thread and WSGI code hands coroutines to it.
+"""
+
+import asyncio
+import os
+import threading
+from typing import Any, AsyncGenerator, Coroutine, Generator, Optional, TypeVar
+
+T = TypeVar("T")
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_pid: Optional[int] = None
+_lock = threading.Lock()
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """Return the worker's shared event loop, starting it on first use."""
+    global _loop, _loop_pid
+    with _lock:
+        # A forked worker inherits the variable but not the thread running the loop
+        if _loop is None or _loop.is_closed() or _loop_pid != os.getpid():
+            _loop = asyncio.new_event_loop()
+            _loop_pid = os.getpid()
+            threading.Thread(target=_loop.run_forever, name="event-loop", daemon=True).start()
+        return _loop
+
+
+def run_coroutine(coroutine: Coroutine[Any, Any, T], timeout: Optional[float] = None) -> T:
+    """Run a coroutine on the shared loop and block the calling thread for its result."""
+    return asyncio.run_coroutine_threadsafe(coroutine, get_event_loop()).result(timeout)
+
+
+def iterate_async_generator(async_gen: AsyncGenerator[T, None]) -> Generator[T, None, None]:
+    """
+    Drive an async generator on the shared loop from synchronous code.
+
+    Items are yielded as soon as the loop produces them. If the consumer stops
+    early (e.g. the client disconnects), the async generator is closed on the loop.
+    """
+    loop = get_event_loop()
+    try:
+        while True:
+            try:
+                yield asyncio.run_coroutine_threadsafe(async_gen.__anext__(), loop).result()
+            except StopAsyncIteration:
+                break
+    finally:
+        asyncio.run_coroutine_threadsafe(async_gen.aclose(), loop).result()
@@ -1,4 +1,9 @@
+import os
 from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+# filepath -> (mtime, content)
+_prompt_files: Dict[str, Tuple[Optional[int], Optional[str]]] = {}
 
 def load_prompt_file(filepath: str) -> str:
     try:
@@ -8,4 +13,17 @@ def load_prompt_file(filepath: str) -> str:
         return None
     except Exception as e:
         print(f"Error loading prompt file: {e}")
-        return None
\ No newline at end of file
+        return None
+
+def load_prompt_file_cached(filepath: str) -> Optional[str]:
+    """Load a prompt file once, re-reading it only when it changes on disk"""
+    try:
+        mtime = os.stat(filepath).st_mtime_ns
+    except OSError:
+        mtime = None
+    cached = _prompt_files.get(filepath)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    content = load_prompt_file(filepath)
+    _prompt_files[filepath] = (mtime, content)
+    return content
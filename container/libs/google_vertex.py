@@ -1,29 +1,27 @@
-import vertexai
-from vertexai.generative_models import GenerativeModel, GenerationConfig, grounding
-from vertexai.generative_models import Tool
-from vertexai import rag
-from vertexai.rag.utils.resources import TransformationConfig, ChunkingConfig
-from typing import Generator, List, Optional
+# The Vertex AI SDK takes seconds to import and vertexai.init() resolves
+# credentials, so both wait until a RAG or tuning call needs them.
+from __future__ import annotations
+
+import importlib
+from typing import TYPE_CHECKING, Generator, List, Optional
 from data_classes.common_classes import Agent, Message, Language, StreamEvent
 from dotenv import load_dotenv
-from vertexai.preview.generative_models import Content, Part
 from werkzeug.datastructures import FileStorage 
 import tempfile
 from werkzeug.utils import secure_filename
-from vertexai.rag.utils.resources import RagFile
-from google.cloud.aiplatform_v1.services.vertex_rag_data_service.pagers import ListRagFilesPager
 import os
-from vertexai.rag.utils.resources import RagCorpus
-from vertexai.tuning import sft
-from google.cloud import storage
 import logging
 from datetime import datetime
 from typing import Dict, Any
 from constants.separators import STARTING_SEPARATOR, ENDING_SEPARATOR
 import asyncio
 logger = logging.getLogger(__name__)
-from google.genai import Client
-from google.genai import types
+from libs.lazy import lazy
+from libs.provider_clients import get_gemini_client
+
+if TYPE_CHECKING:
+    from google.cloud.aiplatform_v1.services.vertex_rag_data_service.pagers import ListRagFilesPager
+    from vertexai.rag.utils.resources import RagCorpus, RagFile
 
 load_dotenv()
 
@@ -37,14 +35,37 @@ if not RAG_LOCATION:
 
 # RAG_CORPUS_NAME = f"projects/{PROJECT_ID}/locations/{RAG_LOCATION}/ragCorpora/6917529027641081856"
 
-TRANSFORMATION_CONFIG: TransformationConfig = TransformationConfig(
-    chunking_config=ChunkingConfig(
-        chunk_size=1024,
-        chunk_overlap=200,
-    ),
-)
+def init_vertexai():
+    import vertexai
+    vertexai.init(project=PROJECT_ID, location=RAG_LOCATION)
+    return vertexai
+
+vertexai = lazy("vertexai", init_vertexai)
+
+def import_vertexai_module(module_name: str):
+    vertexai.instance()
+    return importlib.import_module(module_name)
+
+rag = lazy("vertexai.rag", lambda: import_vertexai_module("vertexai.rag"))
+sft = lazy("vertexai.tuning.sft", lambda: import_vertexai_module("vertexai.tuning.sft"))
+
+def build_transformation_config():
+    from vertexai.rag.utils.resources import TransformationConfig, ChunkingConfig
+    return TransformationConfig(
+        chunking_config=ChunkingConfig(
+            chunk_size=1024,
+            chunk_overlap=200,
+        ),
+    )
+
+TRANSFORMATION_CONFIG = lazy("vertexai.transformation_config", build_transformation_config)
+
+def create_storage_client():
+    from google.cloud import storage
+    return storage.Client()
 
-vertexai.init(project=PROJECT_ID, location=RAG_LOCATION)
+# One client (and its connection pool) for every upload
+storage_client = lazy("gcs.storage", create_storage_client)
 
 # Here is you:
     
@@ -77,6 +98,8 @@ def generate_gemini_response(
     Returns:
         The text response from the Gemini model, potentially with citations.
     """
+    from google.genai import types
+
     if not agent:
         raise Exception("Agent is required")
     base_language = getattr(agent, "language", Language.VI.value)
@@ -115,11 +138,7 @@ def generate_gemini_response(
             )
         )
     user_query = messages[-1].content
-    client = Client(
-        vertexai=True,
-        project=PROJECT_ID,
-        location=RAG_LOCATION
-    )
+    client = get_gemini_client(PROJECT_ID, RAG_LOCATION)
     history = []
     if messages:
         history = [types.Content(role=x.role, parts=[types.Part(text=x.content)]) for x in messages]
@@ -263,7 +282,7 @@ def add_file(file: FileStorage, corpus_id: str) -> str:
                 corpus_name=full_corpus_path,
                 display_name=display_name,
                 path=temp_file_path,
-                transformation_config=TRANSFORMATION_CONFIG,
+                transformation_config=TRANSFORMATION_CONFIG.instance(),
             )
             return f"File '{display_name}' uploaded successfully to RagCorpus. RagFile ID: {rag_file.name}"
         except Exception as e:
@@ -278,13 +297,13 @@ def add_file(file: FileStorage, corpus_id: str) -> str:
                 
 async def add_file_async(file: FileStorage, corpus_id: str) -> str:
     """Async wrapper for add_file function to support concurrent uploads"""
-    loop = asyncio.get_event_loop()
+    loop = asyncio.get_running_loop()
     # Run the synchronous add_file function in a thread pool executor
     return await loop.run_in_executor(None, add_file, file, corpus_id)
 
 async def upload_temp_file_async(temp_file_path: str, display_name: str, corpus_id: str) -> str:
     """Async function to upload a file from a temporary path to RAG corpus"""
-    loop = asyncio.get_event_loop()
+    loop = asyncio.get_running_loop()
     
     def upload_temp_file():
         full_corpus_path = f"projects/{PROJECT_ID}/locations/{RAG_LOCATION}/ragCorpora/{corpus_id}"
@@ -293,7 +312,7 @@ async def upload_temp_file_async(temp_file_path: str, display_name: str, corpus_
                 corpus_name=full_corpus_path,
                 display_name=display_name,
                 path=temp_file_path,
-                transformation_config=TRANSFORMATION_CONFIG,
+                transformation_config=TRANSFORMATION_CONFIG.instance(),
             )
             return f"File '{display_name}' uploaded successfully to RagCorpus. RagFile ID: {rag_file.name}"
         except Exception as e:
@@ -345,7 +364,6 @@ def list_corpora():
 
 def upload_to_gcs(file_path: str, bucket_name: str) -> str:
     """Upload a file to Google Cloud Storage"""
-    storage_client = storage.Client()
     bucket = storage_client.bucket(bucket_name)
     file_name = file_path.split("/")[-1]
     final_file_path = f"jsonl/{file_name}"
@@ -354,6 +372,14 @@ def upload_to_gcs(file_path: str, bucket_name: str) -> str:
     # should return gs://cloud-samples-data/training-file.jsonl
     return f"gs://{bucket_name}/{final_file_path}"
 
+def upload_bytes_to_gcs(data: bytes, bucket_name: str, blob_name: str, content_type: str, cache_control: Optional[str] = None) -> str:
+    """Upload in-memory data to Google Cloud Storage and return its public URL"""
+    blob = storage_client.bucket(bucket_name).blob(blob_name)
+    if cache_control:
+        blob.cache_control = cache_control
+    blob.upload_from_string(data, content_type=content_type)
+    return f"https://storage.googleapis.com/{bucket_name}/{blob_name}"
+
 def create_fine_tuning_job(
     training_data_path: str,
     base_model: str = "gemini-2.5-flash",
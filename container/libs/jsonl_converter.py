@@ -1,15 +1,27 @@
 """
 JSON to JSONL converter utility for fine-tuning data preparation.
+
+The list-based helpers hold the whole dataset in memory. For exports of any
+size, write_fine_tune_dataset() converts and validates pages of messages as
+they arrive and JsonlShardWriter writes them straight to (optionally
+gzip-compressed) shards, so memory stays at one page whatever the size.
 """
 
+import gzip
 import json
 import os
 import uuid
 import logging
-from typing import List, Dict, Any
+from typing import IO, Iterable, List, Dict, Any, Optional
 
 logger = logging.getLogger(__name__)
 
+# Examples per shard; 0 writes a single file
+FINE_TUNE_SHARD_RECORDS = int(os.getenv("FINE_TUNE_SHARD_RECORDS", 100000))
+FINE_TUNE_GZIP_LEVEL = int(os.getenv("FINE_TUNE_GZIP_LEVEL", 6))
+# Invalid examples logged in full per export; the rest are only counted
+FINE_TUNE_MAX_LOGGED_ERRORS = 10
+
 def convert_json_to_jsonl(json_data: List[Dict[str, Any]]) -> str:
     """
     Convert JSON data to JSONL format for fine-tuning.
@@ -152,6 +164,52 @@ def convert_messages_to_fine_tune_format(messages: List[Dict[str, Any]]) -> List
     
     return fine_tune_data
 
+def validate_fine_tune_item(item: Any, i: int = 0) -> None:
+    """
+    Validate one fine-tuning example.
+
+    Args:
+        item: Example to validate
+        i: Position of the example, for error messages
+
+    Raises:
+        ValueError: If the example is invalid
+    """
+    if not isinstance(item, dict):
+        raise ValueError(f"Item {i} must be a dictionary")
+    
+    if "contents" not in item:
+        raise ValueError(f"Item {i} must have 'contents' key")
+    
+    if not isinstance(item["contents"], list):
+        raise ValueError(f"Item {i} 'contents' must be a list")
+    
+    if len(item["contents"]) < 2:
+        raise ValueError(f"Item {i} must have at least 2 content items (user and model)")
+    
+    for j, content in enumerate(item["contents"]):
+        if not isinstance(content, dict):
+            raise ValueError(f"Item {i}, content {j} must be a dictionary")
+        
+        if "role" not in content:
+            raise ValueError(f"Item {i}, content {j} must have 'role' key")
+        
+        if "parts" not in content:
+            raise ValueError(f"Item {i}, content {j} must have 'parts' key")
+        
+        if not isinstance(content["parts"], list):
+            raise ValueError(f"Item {i}, content {j} 'parts' must be a list")
+        
+        for k, part in enumerate(content["parts"]):
+            if not isinstance(part, dict):
+                raise ValueError(f"Item {i}, content {j}, part {k} must be a dictionary")
+            
+            if "text" not in part:
+                raise ValueError(f"Item {i}, content {j}, part {k} must have 'text' key")
+            
+            if not isinstance(part["text"], str):
+                raise ValueError(f"Item {i}, content {j}, part {k} 'text' must be a string")
+
 def validate_fine_tune_data(data: List[Dict[str, Any]]) -> bool:
     """
     Validate that the data is in the correct format for fine-tuning.
@@ -169,39 +227,95 @@ def validate_fine_tune_data(data: List[Dict[str, Any]]) -> bool:
         raise ValueError("Data list cannot be empty")
     
     for i, item in enumerate(data):
-        if not isinstance(item, dict):
-            raise ValueError(f"Item {i} must be a dictionary")
-        
-        if "contents" not in item:
-            raise ValueError(f"Item {i} must have 'contents' key")
-        
-        if not isinstance(item["contents"], list):
-            raise ValueError(f"Item {i} 'contents' must be a list")
-        
-        if len(item["contents"]) < 2:
-            raise ValueError(f"Item {i} must have at least 2 content items (user and model)")
-        
-        for j, content in enumerate(item["contents"]):
-            if not isinstance(content, dict):
-                raise ValueError(f"Item {i}, content {j} must be a dictionary")
-            
-            if "role" not in content:
-                raise ValueError(f"Item {i}, content {j} must have 'role' key")
-            
-            if "parts" not in content:
-                raise ValueError(f"Item {i}, content {j} must have 'parts' key")
-            
-            if not isinstance(content["parts"], list):
-                raise ValueError(f"Item {i}, content {j} 'parts' must be a list")
-            
-            for k, part in enumerate(content["parts"]):
-                if not isinstance(part, dict):
-                    raise ValueError(f"Item {i}, content {j}, part {k} must be a dictionary")
-                
-                if "text" not in part:
-                    raise ValueError(f"Item {i}, content {j}, part {k} must have 'text' key")
-                
-                if not isinstance(part["text"], str):
-                    raise ValueError(f"Item {i}, content {j}, part {k} 'text' must be a string")
+        validate_fine_tune_item(item, i)
     
-    return True 
\ No newline at end of file
+    return True
+
+class JsonlShardWriter:
+    """
+    Write JSONL records one at a time into numbered shards,
+    <prefix>-00000.jsonl[.gz], starting a new shard every shard_records
+    records. Nothing is kept in memory beyond the file buffers.
+
+    Use as a context manager, or call close(); paths lists the shards written.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        prefix: Optional[str] = None,
+        shard_records: int = FINE_TUNE_SHARD_RECORDS,
+        compress: bool = False,
+        compress_level: int = FINE_TUNE_GZIP_LEVEL,
+    ):
+        self.directory = directory or os.path.join(os.getcwd(), "temp")
+        self.prefix = prefix or f"fine_tune_data_{uuid.uuid4().hex[:8]}"
+        self.shard_records = shard_records
+        self.compress = compress
+        self.compress_level = compress_level
+        self.paths: List[str] = []
+        self.records = 0
+        self._file: Optional[IO[str]] = None
+        self._shard_count = 0
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _open_shard(self):
+        self._close_shard()
+        extension = ".jsonl.gz" if self.compress else ".jsonl"
+        path = os.path.join(self.directory, f"{self.prefix}-{len(self.paths):05d}{extension}")
+        if self.compress:
+            self._file = gzip.open(path, "wt", encoding="utf-8", compresslevel=self.compress_level)
+        else:
+            self._file = open(path, "w", encoding="utf-8")
+        self.paths.append(path)
+        self._shard_count = 0
+
+    def _close_shard(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def write(self, record: Dict[str, Any]) -> None:
+        if self._file is None or (self.shard_records and self._shard_count >= self.shard_records):
+            self._open_shard()
+        self._file.write(json.dumps(record, ensure_ascii=False))
+        self._file.write("\n")
+        self._shard_count += 1
+        self.records += 1
+
+    def close(self) -> List[str]:
+        self._close_shard()
+        return self.paths
+
+    def __enter__(self) -> "JsonlShardWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+def write_fine_tune_dataset(pages: Iterable[List[Dict[str, Any]]], writer: JsonlShardWriter) -> Dict[str, int]:
+    """
+    Convert, validate and write pages of messages as they arrive.
+
+    Args:
+        pages: Pages of messages with related_message attached, in the format
+               taken by convert_messages_to_fine_tune_format
+        writer: Writer the valid examples are written to
+
+    Returns:
+        Counts of messages read, examples written and invalid examples skipped
+    """
+    stats = {"messages": 0, "pairs": 0, "invalid": 0}
+    for messages in pages:
+        stats["messages"] += len(messages)
+        for item in convert_messages_to_fine_tune_format(messages):
+            try:
+                validate_fine_tune_item(item, writer.records + stats["invalid"])
+            except ValueError as e:
+                stats["invalid"] += 1
+                if stats["invalid"] <= FINE_TUNE_MAX_LOGGED_ERRORS:
+                    logger.warning(f"Skipping invalid fine-tuning example: {str(e)}")
+                continue
+            writer.write(item)
+            stats["pairs"] += 1
+    return stats
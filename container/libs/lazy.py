@@ -0,0 +1,91 @@
+"""
+Deferred initialization of heavy module-level objects.
+
+Importing the app used to build every client and agent graph up front
+(Weaviate, Vertex AI, Google TTS, LangGraph agents), whether or not the
+route being served needs them. lazy() registers a factory instead; the
+object is built on first use and shared afterwards.
+
+The returned LazyObject forwards attribute access to the built object, so
+`client.collections.get(...)` keeps working when `client` is lazy. Call
+.instance() where the real object is needed, e.g. to pass it to code that
+checks its type. The proxy's own attributes are underscored so they do not
+hide the wrapped object's.
+
+lazy_stats() reports which objects were built and how long each took.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Generic, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class LazyObject(Generic[T]):
+    def __init__(self, name: str, factory: Callable[[], T]):
+        # Set through __dict__: __setattr__ forwards to the wrapped object
+        self.__dict__.update(
+            _name=name,
+            _factory=factory,
+            _instance=None,
+            _initialized=False,
+            _lock=threading.Lock(),
+            _init_seconds=None,
+        )
+
+    def instance(self) -> T:
+        """The object, built on first call"""
+        if not self._initialized:
+            with self._lock:
+                if not self._initialized:
+                    started = time.perf_counter()
+                    self.__dict__["_instance"] = self._factory()
+                    self.__dict__["_init_seconds"] = time.perf_counter() - started
+                    self.__dict__["_initialized"] = True
+                    logger.info(f"Initialized {self._name} in {self._init_seconds:.3f}s")
+        return self._instance
+
+    def is_initialized(self) -> bool:
+        return self._initialized
+
+    def discard(self) -> Optional[T]:
+        """Forget the built object so the next use builds a new one; returns the old one"""
+        with self._lock:
+            instance = self._instance
+            self.__dict__.update(_instance=None, _initialized=False, _init_seconds=None)
+        return instance
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self.instance(), attr)
+
+    def __setattr__(self, attr: str, value: Any):
+        setattr(self.instance(), attr, value)
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        return self.instance()(*args, **kwargs)
+
+    def __repr__(self) -> str:
+        state = "initialized" if self._initialized else "not initialized"
+        return f"<LazyObject {self._name} ({state})>"
+
+
+lazy_objects: Dict[str, LazyObject] = {}
+
+
+def lazy(name: str, factory: Callable[[], T]) -> LazyObject[T]:
+    """Register an object that is built by factory on first use"""
+    if name in lazy_objects:
+        raise ValueError(f"Lazy object {name} is already registered")
+    lazy_objects[name] = obj = LazyObject(name, factory)
+    return obj
+
+
+def lazy_stats() -> Dict[str, Dict[str, Any]]:
+    return {
+        name: {"initialized": obj.is_initialized(), "init_seconds": obj._init_seconds}
+        for name, obj in lazy_objects.items()
+    }
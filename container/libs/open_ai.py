@@ -1,12 +1,10 @@
 import os
-from openai import OpenAI
+from libs.provider_clients import get_openai_client
 from typing import List, Dict, Any, Optional, Generator
 from data_classes.common_classes import Message, Language, Agent
 from services.handle_agent import get_agent_by_id
 from data_classes.common_classes import StreamEvent
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-# Initialize OpenAI client
-client = OpenAI(api_key=OPENAI_API_KEY)
 
 def generate_openai_answer(
     agent: Agent,
@@ -47,7 +45,7 @@ def generate_openai_answer(
             chat_messages.append({"role": msg.role, "content": msg.content})
 
         if stream:
-            generator = client.chat.completions.create(
+            generator = get_openai_client(OPENAI_API_KEY).chat.completions.create(
                 model=base_model, 
                 messages=chat_messages,
                 temperature=base_temperature,
@@ -63,7 +61,7 @@ def generate_openai_answer(
                 yield StreamEvent(type="end_of_stream", data="", metadata=contexts)
             return generate()
         else:
-            response = client.chat.completions.create(
+            response = get_openai_client(OPENAI_API_KEY).chat.completions.create(
                 model=base_model, 
                 messages=chat_messages,
                 temperature=base_temperature,
@@ -77,7 +75,7 @@ def generate_openai_answer(
 
 def basic_openai_answer(query: str, model: str = "gpt-4o", temperature: float = 0) -> str:
     try:
-        response = client.chat.completions.create(
+        response = get_openai_client(OPENAI_API_KEY).chat.completions.create(
             model=model,
             messages=[{"role": "user", "content": query}],
             temperature=temperature,
@@ -92,7 +90,7 @@ def basic_openai_answer(query: str, model: str = "gpt-4o", temperature: float =
 
 def create_voice_chat_session(model: str, instruction: str) -> str:
     # Gọi API để tạo session (ephemeral key, session id, WebRTC URLs)
-    ephemeral_key_response = client.realtime.client_secrets.create(
+    ephemeral_key_response = get_openai_client(OPENAI_API_KEY).realtime.client_secrets.create(
         session={
             "type": "realtime",
             "model": model,
@@ -1,8 +1,8 @@
 import os
 from typing import List
-from pypdf import PdfReader
 from langchain.schema import Document
 from libs.chunker import semantic_chunk_text
+from libs.pdf_pages import iter_pdf_pages
 
 
 # Allowed file extensions
@@ -20,15 +20,8 @@ def read_pdf(file_path: str) -> str:
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"PDF file not found at: {file_path}")
     
-    # Initialize PDF reader
-    reader = PdfReader(file_path)
-    text = ""
-    
     # Extract text from each page
-    for page in reader.pages:
-        text += page.extract_text() + "\n\n"
-    
-    return text
+    return "".join(page + "\n\n" for page in iter_pdf_pages(file_path))
 
 def process_pdf(
     text: str,
@@ -87,12 +80,5 @@ def read_pdf_from_buffer(file_buffer) -> str:
     Returns:
         str: Extracted text from the PDF
     """
-    # Initialize PDF reader with the buffer
-    reader = PdfReader(file_buffer)
-    text = ""
-    
     # Extract text from each page
-    for page in reader.pages:
-        text += page.extract_text() + "\n\n"
-    
-    return text
+    return "".join(page + "\n\n" for page in iter_pdf_pages(file_buffer))
@@ -0,0 +1,43 @@
+"""
+Page-level PDF text extraction.
+
+Kept free of LangChain/OpenAI imports on purpose: extract_pdf_pages runs in
+process-pool workers, which import this module on start.
+"""
+
+from typing import Generator, List
+
+from pypdf import PdfReader
+
+
+def iter_pdf_pages(source) -> Generator[str, None, None]:
+    """
+    Yield the text of each page, extracting one page at a time.
+
+    Args:
+        source: Path or file buffer containing PDF data
+    """
+    reader = PdfReader(source)
+    for page in reader.pages:
+        yield page.extract_text() or ""
+
+
+def count_pdf_pages(source) -> int:
+    return len(PdfReader(source).pages)
+
+
+def extract_pdf_pages(path: str, start: int, end: int) -> List[str]:
+    """
+    Extract the text of pages [start, end) of the PDF at path.
+
+    Args:
+        path: Path to the PDF file
+        start: Index of the first page
+        end: Index after the last page
+
+    Returns:
+        Text of each page in the range
+    """
+    reader = PdfReader(path)
+    end = min(end, len(reader.pages))
+    return [reader.pages[i].extract_text() or "" for i in range(start, end)]
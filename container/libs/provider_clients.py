@@ -0,0 +1,147 @@
+"""
+Process-wide registry of LLM provider clients.
+
+Building a google.genai or OpenAI client sets up auth and a fresh HTTP
+connection pool, so doing it per message throws away warm connections. The
+registry builds one client per provider configuration (Gemini project and
+location, OpenAI API key and base URL) on first use and hands the same
+instance to every thread; both SDKs are thread-safe.
+
+A background thread pings every client each PROVIDER_HEALTH_CHECK_INTERVAL
+seconds and rebuilds those that fail, so a broken connection pool or expired
+auth state is replaced before a user request hits it. Set the interval to 0
+to disable health checks. A replaced client is closed
+PROVIDER_CLIENT_CLOSE_DELAY seconds later, so requests still streaming on it
+can finish.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+PROVIDER_HEALTH_CHECK_INTERVAL = float(os.getenv("PROVIDER_HEALTH_CHECK_INTERVAL", 300))
+PROVIDER_CLIENT_CLOSE_DELAY = float(os.getenv("PROVIDER_CLIENT_CLOSE_DELAY", 600))
+
+
+def close_client(client: Any):
+    """Release a client's connection pool; both SDKs expose close()"""
+    close = getattr(client, "close", None)
+    if close is None:
+        return
+    try:
+        close()
+    except Exception as e:
+        logger.error(f"Error closing provider client: {str(e)}")
+
+
+def client_label(key: Hashable) -> str:
+    """Loggable name of a registry key: the provider and a hash of the rest, which may hold an API key"""
+    if not isinstance(key, tuple) or not key:
+        return hashlib.sha256(repr(key).encode()).hexdigest()[:12]
+    return f"{key[0]}:{hashlib.sha256(repr(key[1:]).encode()).hexdigest()[:12]}"
+
+
+class ProviderClientRegistry:
+    def __init__(self, health_check_interval: float = PROVIDER_HEALTH_CHECK_INTERVAL):
+        self.health_check_interval = health_check_interval
+        self._clients: Dict[Hashable, Any] = {}
+        self._factories: Dict[Hashable, Callable[[], Any]] = {}
+        self._health_checks: Dict[Hashable, Callable[[Any], Any]] = {}
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+
+    def get(self, key: Hashable, factory: Callable[[], Any], health_check: Optional[Callable[[Any], Any]] = None) -> Any:
+        """Return the client registered under key, building it with factory on first use."""
+        with self._lock:
+            if self._pid != os.getpid():
+                # Connection pools must not be shared across a fork
+                self._clients.clear()
+                self._pid = os.getpid()
+                if self.health_check_interval > 0:
+                    threading.Thread(target=self._run_health_checks, name="provider-health-check", daemon=True).start()
+            client = self._clients.get(key)
+            if client is None:
+                client = factory()
+                self._clients[key] = client
+                self._factories[key] = factory
+                if health_check:
+                    self._health_checks[key] = health_check
+            return client
+
+    def reconnect(self, key: Hashable):
+        """
+        Replace the client under key with a freshly built one. The old one is
+        closed after PROVIDER_CLIENT_CLOSE_DELAY seconds, since other threads
+        may still be streaming on it.
+        """
+        with self._lock:
+            factory = self._factories.get(key)
+        if factory is None:
+            return
+        client = factory()
+        with self._lock:
+            old_client = self._clients.get(key)
+            self._clients[key] = client
+        if old_client is not None:
+            timer = threading.Timer(PROVIDER_CLIENT_CLOSE_DELAY, close_client, args=(old_client,))
+            timer.daemon = True
+            timer.start()
+
+    def _run_health_checks(self):
+        pid = os.getpid()
+        while self._pid == pid:
+            time.sleep(self.health_check_interval)
+            with self._lock:
+                checks = [(key, self._clients.get(key), check) for key, check in self._health_checks.items()]
+            for key, client, check in checks:
+                if client is None:
+                    continue
+                try:
+                    check(client)
+                except Exception as e:
+                    logger.error(f"Health check failed for provider client {client_label(key)}, reconnecting: {str(e)}")
+                    try:
+                        self.reconnect(key)
+                    except Exception as e:
+                        logger.error(f"Error reconnecting provider client {client_label(key)}: {str(e)}")
+
+
+provider_clients = ProviderClientRegistry()
+
+
+def get_gemini_client(project: Optional[str] = None, location: Optional[str] = None):
+    """Shared google.genai client on Vertex AI for a project/location."""
+    project = project or os.getenv("GOOGLE_PROJECT_ID")
+    location = location or os.getenv("GOOGLE_RAG_LOCATION")
+
+    def build():
+        from google.genai import Client
+        return Client(vertexai=True, project=project, location=location)
+
+    def ping(client):
+        next(iter(client.models.list(config={"page_size": 1})), None)
+
+    return provider_clients.get(("gemini", project, location), build, ping)
+
+
+def get_openai_client(api_key: Optional[str] = None, base_url: Optional[str] = None):
+    """Shared OpenAI client for an API key and base URL."""
+    api_key = api_key or os.getenv("OPENAI_API_KEY")
+
+    def build():
+        from openai import OpenAI
+        return OpenAI(api_key=api_key, base_url=base_url)
+
+    def ping(client):
+        client.models.list()
+
+    return provider_clients.get(("openai", api_key, base_url), build, ping)
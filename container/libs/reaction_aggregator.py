@@ -0,0 +1,228 @@
+"""
+Write-behind aggregation of reaction toggles (likes on feeds, comments, ...).
+
+Toggling a reaction reads the object's stored reactions, so the direction
+is right whichever worker handled the previous click, and only updates an
+in-memory buffer: per object, the latest wanted state of each user who
+toggled since the last flush. A background thread flushes every
+REACTION_FLUSH_INTERVAL seconds, or as soon as REACTION_MAX_PENDING toggles
+are waiting. Flushing re-reads each touched object, applies this process's
+buffered changes on top of the stored array and writes the merged array and
+count back with one write per object, so many likes on a hot object cost one
+write per interval, and changes made by other workers in between are kept.
+
+The database has no conditional write, so two workers flushing the same
+object at once can overwrite each other. Each flush reads the object back
+after writing it and queues again the changes that did not stick; they are
+wanted states, not toggles, so applying them twice is harmless.
+
+Reads see buffered state immediately: overlay() applies unflushed changes to
+rows fetched from the database.
+
+The storage is passed in as load/store callables, so this module has no
+database dependency.
+"""
+
+import atexit
+import logging
+import os
+import threading
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+REACTION_FLUSH_INTERVAL = float(os.getenv("REACTION_FLUSH_INTERVAL", 1.0))
+REACTION_MAX_PENDING = int(os.getenv("REACTION_MAX_PENDING", 500))
+# Flush attempts before the buffered changes of an object are dropped
+REACTION_MAX_RETRIES = int(os.getenv("REACTION_MAX_RETRIES", 5))
+
+
+def apply_changes(user_ids: List[str], changes: Optional[Dict[str, bool]]) -> List[str]:
+    """Apply per-user reaction changes to a list of user IDs, keeping its order"""
+    merged = list(user_ids)
+    for user_id, reacted in (changes or {}).items():
+        if reacted and user_id not in merged:
+            merged.append(user_id)
+        elif not reacted and user_id in merged:
+            merged.remove(user_id)
+    return merged
+
+
+class ReactionAggregator:
+    def __init__(
+        self,
+        name: str,
+        load: Callable[[str], List[str]],
+        store: Callable[[str, List[str]], None],
+        property_name: str = "like_ids",
+        count_property: Optional[str] = "like_count",
+        flush_interval: float = REACTION_FLUSH_INTERVAL,
+        max_pending: int = REACTION_MAX_PENDING,
+    ):
+        """
+        Args:
+            name: Name used in logs and thread names
+            load: Returns the stored user IDs of an object; raises if it does not exist
+            store: Writes the merged user IDs of an object
+            property_name: Row key holding the user IDs, used by overlay()
+            count_property: Row key set to the number of user IDs by overlay()
+        """
+        self.name = name
+        self.load = load
+        self.store = store
+        self.property_name = property_name
+        self.count_property = count_property
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        # object ID -> user ID -> reacted; latest wanted state per user
+        self._pending: Dict[str, Dict[str, bool]] = {}
+        # Changes taken by a running flush, still visible to readers until written
+        self._flushing: Dict[str, Dict[str, bool]] = {}
+        self._pending_count = 0
+        self._failures: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pid: Optional[int] = None
+        self.toggles = 0
+        self.writes = 0
+
+    def _ensure_started(self):
+        # Called with self._lock held. A forked worker inherits the buffers but
+        # not the thread.
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            threading.Thread(target=self._run, name=f"reactions-{self.name}", daemon=True).start()
+
+    def _reacted(self, object_id: str, user_id: str, stored: List[str]) -> bool:
+        # Called with self._lock held
+        for changes in (self._pending.get(object_id), self._flushing.get(object_id)):
+            if changes and user_id in changes:
+                return changes[user_id]
+        return user_id in stored
+
+    def toggle(self, object_id: str, user_id: str) -> bool:
+        """
+        Toggle a user's reaction on an object.
+
+        Returns:
+            True if the user now reacts to the object, False if the reaction was removed
+        """
+        # Always fresh: a copy cached here would miss clicks handled by other workers
+        stored = self.load(object_id)
+        with self._lock:
+            self._ensure_started()
+            reacted = not self._reacted(object_id, user_id, stored)
+            changes = self._pending.setdefault(object_id, {})
+            if user_id not in changes:
+                self._pending_count += 1
+            changes[user_id] = reacted
+            self.toggles += 1
+            if self._pending_count >= self.max_pending:
+                self._wake.set()
+        return reacted
+
+    def _merge(self, object_id: str, user_ids: List[str]) -> List[str]:
+        # Called with self._lock held
+        merged = apply_changes(user_ids, self._flushing.get(object_id))
+        return apply_changes(merged, self._pending.get(object_id))
+
+    def current(self, object_id: str, user_ids: Optional[List[str]]) -> List[str]:
+        """Stored user IDs of an object with unflushed changes applied"""
+        with self._lock:
+            return self._merge(object_id, user_ids or [])
+
+    def overlay(self, rows: List[dict], id_key: str = "uuid") -> List[dict]:
+        """Apply unflushed changes to rows read from the database, in place"""
+        with self._lock:
+            for row in rows:
+                row[self.property_name] = self._merge(str(row[id_key]), row.get(self.property_name) or [])
+                if self.count_property:
+                    row[self.count_property] = len(row[self.property_name])
+        return rows
+
+    def flush(self):
+        """Write every buffered change now"""
+        with self._flush_lock:
+            with self._lock:
+                self._flushing, self._pending = self._pending, {}
+                self._pending_count = 0
+                object_ids = list(self._flushing)
+            for object_id in object_ids:
+                try:
+                    stored = self.load(object_id)
+                    with self._lock:
+                        merged = apply_changes(stored, self._flushing[object_id])
+                    self.store(object_id, merged)
+                    self.writes += 1
+                    written = self.load(object_id)
+                    with self._lock:
+                        changes = self._flushing.pop(object_id)
+                    lost = {user_id: reacted for user_id, reacted in changes.items() if (user_id in written) != reacted}
+                    if not lost:
+                        self._failures.pop(object_id, None)
+                        continue
+                    # Overwritten by another worker's flush: apply them again
+                    self._failures[object_id] = self._failures.get(object_id, 0) + 1
+                    if self._failures[object_id] > REACTION_MAX_RETRIES:
+                        logger.error(f"Dropping {self.name} reactions of {object_id} after {self._failures.pop(object_id)} attempts: overwritten")
+                        continue
+                    self._requeue(object_id, lost)
+                except Exception as e:
+                    self._failures[object_id] = self._failures.get(object_id, 0) + 1
+                    with self._lock:
+                        changes = self._flushing.pop(object_id)
+                    if self._failures[object_id] > REACTION_MAX_RETRIES:
+                        logger.error(f"Dropping {self.name} reactions of {object_id} after {self._failures.pop(object_id)} attempts: {str(e)}")
+                        continue
+                    logger.error(f"Failed to flush {self.name} reactions of {object_id}: {str(e)}")
+                    self._requeue(object_id, changes)
+
+    def _requeue(self, object_id: str, changes: Dict[str, bool]):
+        """Keep changes for the next flush; newer toggles win"""
+        with self._lock:
+            pending = self._pending.setdefault(object_id, {})
+            for user_id, reacted in changes.items():
+                if user_id not in pending:
+                    pending[user_id] = reacted
+                    self._pending_count += 1
+
+    def _run(self):
+        pid = os.getpid()
+        while self._pid == pid:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            if self._pending:
+                self.flush()
+
+    def shutdown(self):
+        """Flush buffered changes of this process"""
+        if self._pid != os.getpid():
+            return
+        self.flush()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "pending": self._pending_count,
+                "toggles": self.toggles,
+                "writes": self.writes,
+            }
+
+
+reaction_aggregators: List[ReactionAggregator] = []
+
+
+def create_reaction_aggregator(name: str, load: Callable[[str], List[str]], store: Callable[[str, List[str]], None], **kwargs) -> ReactionAggregator:
+    """Create an aggregator that is flushed by shutdown_reaction_aggregators()"""
+    aggregator = ReactionAggregator(name, load, store, **kwargs)
+    reaction_aggregators.append(aggregator)
+    return aggregator
+
+
+def shutdown_reaction_aggregators():
+    for aggregator in reaction_aggregators:
+        aggregator.shutdown()
+
+
+atexit.register(shutdown_reaction_aggregators)
@@ -0,0 +1,74 @@
+"""
+Caches in front of document retrieval (search_documents).
+
+- vectors: normalized query -> query embedding. Embeddings do not depend on
+  the indexed documents, so these live long and survive invalidation.
+- results: (normalized query, limit) -> top-k documents. Cleared whenever
+  documents are added, updated or removed in this process; other workers pick
+  up changes once RETRIEVAL_RESULT_CACHE_TTL expires. Searches read the
+  generation before querying and store their results with store_results(),
+  which drops them if the cache was invalidated in the meantime.
+"""
+
+import os
+import threading
+import unicodedata
+from typing import Any, Dict, List, Tuple
+
+from libs.ttl_cache import TTLCache
+
+RETRIEVAL_VECTOR_CACHE_TTL = float(os.getenv("RETRIEVAL_VECTOR_CACHE_TTL", 86400))
+RETRIEVAL_VECTOR_CACHE_SIZE = int(os.getenv("RETRIEVAL_VECTOR_CACHE_SIZE", 10000))
+RETRIEVAL_RESULT_CACHE_TTL = float(os.getenv("RETRIEVAL_RESULT_CACHE_TTL", 300))
+RETRIEVAL_RESULT_CACHE_SIZE = int(os.getenv("RETRIEVAL_RESULT_CACHE_SIZE", 2000))
+
+
+def normalize_query(query: str) -> str:
+    """Fold case, Unicode form, whitespace and trailing punctuation so repeats share an entry"""
+    query = unicodedata.normalize("NFC", query).casefold()
+    return " ".join(query.split()).rstrip("?!.。 ")
+
+
+class RetrievalCache:
+    def __init__(self):
+        self.vectors: TTLCache[List[float]] = TTLCache(maxsize=RETRIEVAL_VECTOR_CACHE_SIZE, ttl=RETRIEVAL_VECTOR_CACHE_TTL)
+        self.results: TTLCache[List[Dict[str, Any]]] = TTLCache(maxsize=RETRIEVAL_RESULT_CACHE_SIZE, ttl=RETRIEVAL_RESULT_CACHE_TTL)
+        self.embedding_calls = 0
+        self.embedding_calls_saved = 0
+        # Bumped by every invalidation
+        self.generation = 0
+        self._lock = threading.Lock()
+
+    def result_key(self, query: str, limit: int) -> Tuple[str, int]:
+        return normalize_query(query), limit
+
+    def count_embedding(self, saved: bool):
+        with self._lock:
+            if saved:
+                self.embedding_calls_saved += 1
+            else:
+                self.embedding_calls += 1
+
+    def invalidate(self):
+        """Drop cached results after documents change"""
+        with self._lock:
+            self.generation += 1
+            self.results.clear()
+
+    def store_results(self, key: Tuple[str, int], documents: List[Dict[str, Any]], generation: int):
+        """Cache the results of a search that started at `generation`, unless documents changed since"""
+        with self._lock:
+            if generation == self.generation:
+                self.results.set(key, documents)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "vectors": self.vectors.stats(),
+                "results": self.results.stats(),
+                "embedding_calls": self.embedding_calls,
+                "embedding_calls_saved": self.embedding_calls_saved,
+            }
+
+
+retrieval_cache = RetrievalCache()
@@ -0,0 +1,53 @@
+"""
+Retry with exponential backoff and jitter, for calls that fail transiently
+(dropped connections, timeouts, a busy upstream).
+"""
+
+import asyncio
+import random
+import time
+from typing import Any, Awaitable, Callable, Optional, Tuple, Type, TypeVar
+
+T = TypeVar("T")
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 30.0) -> float:
+    """Exponential backoff with jitter, capped at `cap` seconds"""
+    return min(base * 2 ** attempt, cap) * (0.5 + random.random() / 2)
+
+
+def retry_call(
+    func: Callable[..., T],
+    *args: Any,
+    retries: int = 3,
+    retry_on: Tuple[Type[BaseException], ...] = (Exception,),
+    base_delay: float = 0.1,
+    **kwargs: Any,
+) -> T:
+    """Call func, retrying up to `retries` times on the given exceptions"""
+    for attempt in range(retries + 1):
+        try:
+            return func(*args, **kwargs)
+        except retry_on:
+            if attempt == retries:
+                raise
+            time.sleep(backoff_delay(attempt, base=base_delay))
+
+
+async def retry_async(
+    func: Callable[..., Awaitable[T]],
+    *args: Any,
+    retries: int = 3,
+    retry_on: Tuple[Type[BaseException], ...] = (Exception,),
+    base_delay: float = 0.1,
+    timeout: Optional[float] = None,
+    **kwargs: Any,
+) -> T:
+    """Await func(*args, **kwargs), with a per-attempt timeout, retrying on the given exceptions"""
+    for attempt in range(retries + 1):
+        try:
+            return await asyncio.wait_for(func(*args, **kwargs), timeout)
+        except (asyncio.TimeoutError, *retry_on):
+            if attempt == retries:
+                raise
+            await asyncio.sleep(backoff_delay(attempt, base=base_delay))
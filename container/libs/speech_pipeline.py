@@ -0,0 +1,206 @@
+"""
+Building blocks for streaming text-to-speech.
+
+SentenceSegmenter cuts text into pieces that are synthesized one request
+each: sentences, or clauses of sentences longer than max_chars, for both
+Vietnamese and English. It is incremental: feed() takes text as it arrives
+(e.g. LLM tokens) and returns the segments completed so far, so synthesis of
+the first sentence can start before the rest exists. The first segment has
+a lower limit so the first audio comes back sooner.
+
+synthesize_in_order() runs a synthesize function over segments on an
+executor with a bounded lookahead and yields the results in segment order,
+each as soon as it and every segment before it are done.
+
+speakable_text() strips the markdown of LLM answers before they are read out.
+
+None of this depends on a TTS provider.
+"""
+
+import os
+import re
+from collections import deque
+from concurrent.futures import Executor, Future
+from typing import Callable, Deque, Generator, Iterable, List, TypeVar
+
+T = TypeVar("T")
+
+TTS_SEGMENT_MAX_CHARS = int(os.getenv("TTS_SEGMENT_MAX_CHARS", 300))
+TTS_FIRST_SEGMENT_MAX_CHARS = int(os.getenv("TTS_FIRST_SEGMENT_MAX_CHARS", 120))
+# Shorter sentences ("Vâng.", "1.") are merged into the next one
+TTS_SEGMENT_MIN_CHARS = int(os.getenv("TTS_SEGMENT_MIN_CHARS", 20))
+# Segments being synthesized ahead of the one being played, per stream
+TTS_MAX_INFLIGHT = int(os.getenv("TTS_MAX_INFLIGHT", 4))
+
+# End of a sentence: terminal punctuation, optional closing quotes/brackets,
+# then whitespace (so "3.14" and "v1.2" are not cut), or a line break.
+SENTENCE_END = re.compile(r"[.!?…]+[\"'”’»)\]]*\s+|\n+\s*")
+# End of a clause, to cut sentences that are too long
+CLAUSE_END = re.compile(r"[,;:—–]\s+|\s[-–—]\s+")
+LAST_WORD = re.compile(r"(\S+)$")
+# Markdown that should not be read out: links keep their text, images and
+# code fences go, emphasis/heading/quote/list markers are dropped
+MARKDOWN_LINK = re.compile(r"!?\[([^\]]*)\]\([^)]*\)")
+MARKDOWN_FENCE = re.compile(r"```.*?(```|$)", re.DOTALL)
+MARKDOWN_MARKERS = re.compile(r"[*_`#>|~]+|^\s*(?:[-+]|\d+[.)])\s+", re.MULTILINE)
+
+# Words ending with a period that do not end a sentence (lowercased, without
+# the final period)
+ABBREVIATIONS = {
+    # English
+    "mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "vs", "etc", "e.g", "i.e", "no", "fig", "vol", "ch",
+    # Vietnamese: thành phố, tiến sĩ, thạc sĩ, phó giáo sư, giáo sư, bác sĩ, thượng tọa, hòa thượng, quận, phường
+    "tp", "ts", "ths", "pgs", "gs", "bs", "tt", "ht", "q", "p",
+}
+
+
+def is_abbreviation(text: str, end: int) -> bool:
+    """Whether the period at text[end] belongs to an abbreviation or an initial"""
+    if text[end] != "." or (end + 1 < len(text) and text[end + 1] == "."):
+        return False
+    match = LAST_WORD.search(text, 0, end)
+    if not match:
+        return False
+    word = match.group(1).lstrip("\"'“‘«([")
+    # Initials such as "Thích N. Hạnh" or "J. Smith"
+    if len(word) == 1 and word.isupper():
+        return True
+    return word.lower() in ABBREVIATIONS
+
+
+def split_long(text: str, limit: int) -> List[str]:
+    """
+    Cut text into pieces of at most `limit` characters, at clause ends if
+    possible, else at spaces. Pieces are slices of text, whitespace included,
+    so they join back into the original.
+    """
+    pieces = []
+    while len(text) > limit:
+        cut = 0
+        for match in CLAUSE_END.finditer(text, 0, limit + 1):
+            cut = match.end()
+        if not cut:
+            cut = text.rfind(" ", 0, limit + 1) + 1
+        if not cut:
+            cut = limit
+        pieces.append(text[:cut])
+        text = text[cut:]
+    pieces.append(text)
+    return pieces
+
+
+class SentenceSegmenter:
+    def __init__(
+        self,
+        max_chars: int = TTS_SEGMENT_MAX_CHARS,
+        first_max_chars: int = TTS_FIRST_SEGMENT_MAX_CHARS,
+        min_chars: int = TTS_SEGMENT_MIN_CHARS,
+    ):
+        self.max_chars = max_chars
+        self.first_max_chars = min(first_max_chars, max_chars)
+        self.min_chars = min_chars
+        self._buffer = ""
+        # A sentence too short to synthesize on its own, waiting for the next
+        self._short = ""
+        self._emitted = 0
+
+    def _limit(self) -> int:
+        return self.first_max_chars if self._emitted == 0 else self.max_chars
+
+    def feed(self, text: str) -> List[str]:
+        """Add text; returns the segments it completed"""
+        self._buffer += text
+        sentences = []
+        start = 0
+        for match in SENTENCE_END.finditer(self._buffer):
+            if is_abbreviation(self._buffer, match.start()):
+                continue
+            sentences.append(self._buffer[start:match.end()])
+            start = match.end()
+        self._buffer = self._buffer[start:]
+        segments = self._segments(sentences)
+        # A sentence that goes on and on is cut at clauses without waiting for its end
+        if len(self._short) + len(self._buffer) > self._limit():
+            *pieces, self._buffer = self._cut(self._buffer)
+            segments.extend(self._segments(pieces))
+        return segments
+
+    def flush(self) -> List[str]:
+        """Segments of whatever text is left, once no more text will come"""
+        rest, self._buffer = self._buffer, ""
+        segments = self._segments([rest])
+        if self._short:
+            segments.append(self._short)
+            self._short = ""
+        return segments
+
+    def _segments(self, sentences: List[str]) -> List[str]:
+        segments = []
+        for sentence in sentences:
+            sentence = sentence.strip()
+            if not sentence:
+                continue
+            if self._short:
+                sentence = f"{self._short} {sentence}"
+                self._short = ""
+            if len(sentence) < self.min_chars:
+                self._short = sentence
+                continue
+            for piece in self._cut(sentence):
+                piece = piece.strip()
+                if piece:
+                    segments.append(piece)
+                    self._emitted += 1
+        return segments
+
+    def _cut(self, text: str) -> List[str]:
+        """
+        split_long at the current limit: until the first segment is out, only
+        the head is cut at first_max_chars and the rest at max_chars.
+        """
+        if self._emitted == 0 and len(text) > self.first_max_chars:
+            head = split_long(text, self.first_max_chars)[0]
+            return [head, *split_long(text[len(head):], self.max_chars)]
+        return split_long(text, self._limit())
+
+
+def speakable_text(text: str) -> str:
+    """Text of a markdown segment as it should be read out; empty if nothing is left to say"""
+    text = MARKDOWN_FENCE.sub(" ", text)
+    text = MARKDOWN_LINK.sub(lambda match: match.group(1), text)
+    text = MARKDOWN_MARKERS.sub(" ", text)
+    text = " ".join(text.split())
+    return text if any(c.isalnum() for c in text) else ""
+
+
+def split_sentences(text: str, **kwargs) -> List[str]:
+    """Segments of a complete text"""
+    segmenter = SentenceSegmenter(**kwargs)
+    return segmenter.feed(text) + segmenter.flush()
+
+
+def synthesize_in_order(
+    synthesize: Callable[[str], T],
+    segments: Iterable[str],
+    executor: Executor,
+    max_inflight: int = TTS_MAX_INFLIGHT,
+) -> Generator[T, None, None]:
+    """
+    Yield synthesize(segment) for every segment, in order.
+
+    Up to max_inflight segments are synthesized at once on the executor, so
+    later sentences are ready by the time earlier ones have been played.
+    `segments` may be a generator; it is consumed as the lookahead allows.
+    Segments not yet yielded are cancelled if the consumer stops early.
+    """
+    pending: Deque[Future] = deque()
+    try:
+        for segment in segments:
+            pending.append(executor.submit(synthesize, segment))
+            while pending and (len(pending) >= max_inflight or pending[0].done()):
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
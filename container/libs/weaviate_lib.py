@@ -1,16 +1,36 @@
+import asyncio
+import base64
+import json
 import os
-from typing import List, Dict, Any, Optional, TypeVar
+import threading
+from typing import Iterable, List, Dict, Any, Optional, Tuple, TypeVar
 import weaviate
+import weaviate.exceptions
 from weaviate.auth import Auth
 import weaviate.classes as wvc
-from weaviate.collections.classes.grpc import Sorting
+from weaviate.collections.classes.grpc import Sort, Sorting
 from weaviate.collections.classes.filters import _Filters, Filter
 from datetime import datetime
+from libs.retrieval_cache import retrieval_cache
+from libs.provider_clients import get_openai_client
+from libs.lazy import lazy
+from libs.retry import retry_async, retry_call
 # Environment variables
 WEAVIATE_URL = os.getenv("WEAVIATE_URL")
 WEAVIATE_API_KEY = os.getenv("WEAVIATE_API_KEY")
 EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+# Most IDs per contains_any query when batch loading
+BATCH_LOADER_CHUNK_SIZE = int(os.getenv("BATCH_LOADER_CHUNK_SIZE", 100))
+# HTTP connection pool, shared by the threads of a worker
+WEAVIATE_POOL_CONNECTIONS = int(os.getenv("WEAVIATE_POOL_CONNECTIONS", 20))
+WEAVIATE_POOL_MAXSIZE = int(os.getenv("WEAVIATE_POOL_MAXSIZE", 100))
+# Timeouts in seconds
+WEAVIATE_INIT_TIMEOUT = float(os.getenv("WEAVIATE_INIT_TIMEOUT", 10))
+WEAVIATE_QUERY_TIMEOUT = float(os.getenv("WEAVIATE_QUERY_TIMEOUT", 30))
+WEAVIATE_INSERT_TIMEOUT = float(os.getenv("WEAVIATE_INSERT_TIMEOUT", 90))
+# Retries of idempotent calls on connection errors and timeouts
+WEAVIATE_RETRIES = int(os.getenv("WEAVIATE_RETRIES", 3))
 headers = {
     "X-OpenAI-Api-Key": OPENAI_API_KEY,
 }
@@ -29,15 +49,166 @@ if error_message:
     print('❌ Error initializing Weaviate client, missing required environment variables: ' + error_message)
     exit(1)
 
-client = weaviate.connect_to_weaviate_cloud(
+def additional_config() -> wvc.init.AdditionalConfig:
+    return wvc.init.AdditionalConfig(
+        connection=wvc.init.ConnectionConfig(
+            session_pool_connections=WEAVIATE_POOL_CONNECTIONS,
+            session_pool_maxsize=WEAVIATE_POOL_MAXSIZE,
+            session_pool_max_retries=WEAVIATE_RETRIES,
+        ),
+        timeout=wvc.init.Timeout(
+            init=WEAVIATE_INIT_TIMEOUT,
+            query=WEAVIATE_QUERY_TIMEOUT,
+            insert=WEAVIATE_INSERT_TIMEOUT,
+        ),
+    )
+
+# Errors worth retrying: the request may not have reached Weaviate, or it is
+# overloaded. Names differ between client versions.
+TRANSIENT_ERRORS = tuple(
+    getattr(weaviate.exceptions, name)
+    for name in ("WeaviateConnectionError", "WeaviateTimeoutError", "WeaviateGRPCUnavailableError")
+    if hasattr(weaviate.exceptions, name)
+)
+
+# Connected on first use, so importing this module does not open connections
+client = lazy("weaviate", lambda: weaviate.connect_to_weaviate_cloud(
     cluster_url=WEAVIATE_URL,                     # Weaviate URL: "REST Endpoint" in Weaviate Cloud console
     auth_credentials=Auth.api_key(WEAVIATE_API_KEY),  # Weaviate API key: "ADMIN" API key in Weaviate Cloud console
     headers=headers,
+    additional_config=additional_config(),
     skip_init_checks=True
-)
+))
+def connect_client():
+    """Re-open the shared client, e.g. in a freshly forked worker process."""
+    if client.is_initialized() and not client.is_connected():
+        client.connect()
+
 def close_client():
-    client.close()
-COLLECTION_DOCUMENTS = "Documents"
+    if client.is_initialized():
+        client.close()
+
+# Collection handles are cheap but not free to build; every helper reuses them
+_collections: Dict[str, Any] = {}
+
+def get_collection(collection_name: str):
+    """Cached handle of a collection on the shared client"""
+    collection = _collections.get(collection_name)
+    if collection is None:
+        collection = _collections[collection_name] = client.collections.get(collection_name)
+    return collection
+
+def with_retry(func, *args, **kwargs):
+    """Run an idempotent Weaviate call, retrying transient errors with jittered backoff"""
+    return retry_call(func, *args, retries=WEAVIATE_RETRIES, retry_on=TRANSIENT_ERRORS, **kwargs)
+
+# ----------------------------------------------------------
+# ASYNC CLIENT
+# ----------------------------------------------------------
+# For coroutines (ASGI streams, agents) so that queries are awaited instead of
+# holding a thread. An async client is bound to the event loop it connected on,
+# so there is one per loop: the ASGI server's and libs.event_loop's.
+# loop -> (client, lock serialising its connect)
+_async_clients: Dict[asyncio.AbstractEventLoop, Tuple[Any, asyncio.Lock]] = {}
+_async_collections: Dict[Tuple[asyncio.AbstractEventLoop, str], Any] = {}
+_async_clients_pid: Optional[int] = None
+_async_clients_lock = threading.Lock()
+
+async def get_async_client():
+    """Connected async client of the running event loop, created on first use"""
+    global _async_clients_pid
+    loop = asyncio.get_running_loop()
+    with _async_clients_lock:
+        # A forked worker must not reuse the parent's connections
+        if _async_clients_pid != os.getpid():
+            _async_clients.clear()
+            _async_collections.clear()
+            _async_clients_pid = os.getpid()
+        if loop not in _async_clients:
+            _async_clients[loop] = (
+                weaviate.use_async_with_weaviate_cloud(
+                    cluster_url=WEAVIATE_URL,
+                    auth_credentials=Auth.api_key(WEAVIATE_API_KEY),
+                    headers=headers,
+                    additional_config=additional_config(),
+                    skip_init_checks=True,
+                ),
+                asyncio.Lock(),
+            )
+        async_client, connect_lock = _async_clients[loop]
+    if not async_client.is_connected():
+        async with connect_lock:
+            if not async_client.is_connected():
+                await asyncio.wait_for(async_client.connect(), WEAVIATE_INIT_TIMEOUT)
+    return async_client
+
+async def close_async_client():
+    """Close the async client of the running event loop"""
+    loop = asyncio.get_running_loop()
+    with _async_clients_lock:
+        if _async_clients_pid != os.getpid():
+            return
+        async_client, _ = _async_clients.pop(loop, (None, None))
+        for key in [key for key in _async_collections if key[0] is loop]:
+            del _async_collections[key]
+    if async_client is not None:
+        await async_client.close()
+
+async def async_get_collection(collection_name: str):
+    """Cached handle of a collection on the async client"""
+    async_client = await get_async_client()
+    key = (asyncio.get_running_loop(), collection_name)
+    collection = _async_collections.get(key)
+    if collection is None:
+        collection = _async_collections[key] = async_client.collections.get(collection_name)
+    return collection
+
+async def async_with_retry(func, *args, timeout: Optional[float] = WEAVIATE_QUERY_TIMEOUT, **kwargs):
+    """Await an idempotent Weaviate call with a per-call timeout, retrying transient errors"""
+    return await retry_async(func, *args, retries=WEAVIATE_RETRIES, retry_on=TRANSIENT_ERRORS, timeout=timeout, **kwargs)
+
+async def async_search_non_vector_collection(
+    collection_name: str,
+    limit: int = 100,
+    properties: Optional[List[str]] = None,
+    filters: Optional[_Filters] = None,
+    offset: Optional[int] = None,
+    sort: Optional[Sorting] = None,
+    timeout: Optional[float] = WEAVIATE_QUERY_TIMEOUT,
+) -> list[dict]:
+    """Async search_non_vector_collection"""
+    collection = await async_get_collection(collection_name)
+    response = await async_with_retry(
+        collection.query.fetch_objects,
+        limit=limit,
+        return_properties=properties,
+        filters=filters,
+        offset=offset,
+        sort=sort,
+        timeout=timeout,
+    )
+    return [{"uuid": str(obj.uuid), **obj.properties} for obj in response.objects]
+
+async def async_get_object_by_id(collection_name: str, uuid: str, timeout: Optional[float] = WEAVIATE_QUERY_TIMEOUT) -> Optional[dict]:
+    """Properties of an object with its uuid, or None if it does not exist"""
+    collection = await async_get_collection(collection_name)
+    obj = await async_with_retry(collection.query.fetch_object_by_id, uuid, timeout=timeout)
+    if obj is None:
+        return None
+    return {"uuid": str(obj.uuid), **obj.properties}
+
+async def async_get_collection_count(collection_name: str, filters: Optional[_Filters] = None, timeout: Optional[float] = WEAVIATE_QUERY_TIMEOUT) -> int:
+    collection = await async_get_collection(collection_name)
+    response = await async_with_retry(collection.aggregate.over_all, filters=filters, total_count=True, timeout=timeout)
+    return response.total_count
+
+async def async_update_collection_object(collection_name: str, uuid: str, properties: Dict[str, Any], timeout: Optional[float] = WEAVIATE_INSERT_TIMEOUT) -> bool:
+    collection = await async_get_collection(collection_name)
+    await async_with_retry(collection.data.update, properties=properties, uuid=uuid, timeout=timeout)
+    invalidate_retrieval_cache(collection_name)
+    return True
+# Set to the target of migrate_documents_collection once it has run
+COLLECTION_DOCUMENTS = os.getenv("WEAVIATE_DOCUMENTS_COLLECTION", "Documents")
 COLLECTION_MESSAGES = "Messages"
 COLLECTION_CHATS = "Sections"
 COLLECTION_USERS = "Users"
@@ -55,34 +226,123 @@ COLLECTION_FEEDS = "Feeds"
 COLLECTION_FEED_COMMENTS = "FeedComments"
 COLLECTION_STORIES = "Stories"
 COLLECTION_CATEGORIES = "Categories"
+COLLECTION_PENDING_APPROVALS = "PendingApprovals"
+
+
+def add_missing_properties(collection_name: str, properties: List[wvc.config.Property]) -> None:
+    """Add the properties a collection does not have yet"""
+    collection = get_collection(collection_name)
+    existing = {prop.name for prop in collection.config.get().properties}
+    for prop in properties:
+        if prop.name not in existing:
+            collection.config.add_property(prop)
+            print(f"🙌🏼 Property {prop.name} added to {collection_name}")
+
+DOCUMENT_TEXT_PROPERTIES = ["title", "content", "description", "category", "language", "source", "author", "knowledge_type", "content_hash"]
+
+def create_documents_collection(name: str) -> None:
+    """
+    Create a Documents collection whose vectorizer embeds the content alone,
+    without the collection name or the other properties, so vectors computed
+    by the app from the chunk text (see ingest_pdf) match the vectorizer's.
+    """
+    client.collections.create(
+        name=name,
+        vectorizer_config=wvc.config.Configure.Vectorizer.text2vec_openai(
+            model=EMBEDDING_MODEL,
+            vectorize_collection_name=False
+        ),
+        properties=[
+            *[
+                wvc.config.Property(
+                    name=prop,
+                    data_type=wvc.config.DataType.TEXT,
+                    skip_vectorization=prop != "content",
+                    vectorize_property_name=False
+                )
+                for prop in DOCUMENT_TEXT_PROPERTIES
+            ],
+            wvc.config.Property(name="created_at", data_type=wvc.config.DataType.DATE),
+            wvc.config.Property(name="updated_at", data_type=wvc.config.DataType.DATE),
+            wvc.config.Property(name="file_id", data_type=wvc.config.DataType.UUID), # optional
+        ]
+    )
 
+_documents_content_vectors: Dict[str, bool] = {}
+
+def documents_vectorize_content_only(name: str = COLLECTION_DOCUMENTS) -> bool:
+    """
+    Whether the collection's vectorizer embeds only the content property.
+
+    Collections created before create_documents_collection also embed the
+    collection name and every text property, so explicit vectors of the
+    content alone would land elsewhere in the vector space than the objects
+    the vectorizer embedded. Migrate them with migrate_documents_collection.
+    """
+    if name not in _documents_content_vectors:
+        config = get_collection(name).config.get()
+        vectorizer = config.vectorizer_config
+        content_only = vectorizer is not None and not vectorizer.vectorize_collection_name
+        for prop in config.properties:
+            if prop.data_type not in (wvc.config.DataType.TEXT, wvc.config.DataType.TEXT_ARRAY):
+                continue
+            settings = prop.vectorizer_config
+            if prop.name == "content":
+                content_only = content_only and settings is not None and not settings.skip and not settings.vectorize_property_name
+            elif settings is None or not settings.skip:
+                content_only = False
+        _documents_content_vectors[name] = content_only
+    return _documents_content_vectors[name]
+
+def migrate_documents_collection(target: str, batch_size: int = 200) -> int:
+    """
+    Copy COLLECTION_DOCUMENTS into a new collection that vectorizes the
+    content alone (create_documents_collection). Weaviate re-vectorizes every
+    copied object, so all chunks share one vector space again.
+
+    Migration: run
+        python -c "from libs.weaviate_lib import migrate_documents_collection; migrate_documents_collection('DocumentsV2')"
+    then set WEAVIATE_DOCUMENTS_COLLECTION=DocumentsV2 and restart. Files
+    ingested between the copy and the restart have to be uploaded again.
+    The old collection can be deleted once the new one is in use.
+
+    Returns:
+        Number of objects copied
+    """
+    if not client.collections.exists(target):
+        create_documents_collection(target)
+    source = get_collection(COLLECTION_DOCUMENTS)
+    destination = get_collection(target)
+    copied = 0
+    with destination.batch.fixed_size(batch_size=batch_size) as batch:
+        for obj in source.iterator():
+            batch.add_object(properties=obj.properties, uuid=obj.uuid)
+            copied += 1
+            if copied % 10000 == 0:
+                print(f"Copied {copied} documents to {target}")
+    if destination.batch.failed_objects:
+        print(f"Number of failed copies: {len(destination.batch.failed_objects)}")
+    print(f"🙌🏼 Copied {copied} documents to {target}")
+    return copied
 
 def initialize_schema() -> None:
     """Initialize the Weaviate schema if it doesn't exist."""
     print("Initializing schema...")
     exists = client.collections.exists(COLLECTION_DOCUMENTS)
     if not exists:
-        client.collections.create(
-            name=COLLECTION_DOCUMENTS,
-            vectorizer_config=wvc.config.Configure.Vectorizer.text2vec_openai(
-                model=EMBEDDING_MODEL
-            ),
-            properties=[
-                wvc.config.Property(name="title", data_type=wvc.config.DataType.TEXT),
-                wvc.config.Property(name="content", data_type=wvc.config.DataType.TEXT),
-                wvc.config.Property(name="description", data_type=wvc.config.DataType.TEXT),
-                wvc.config.Property(name="category", data_type=wvc.config.DataType.TEXT),
-                wvc.config.Property(name="language", data_type=wvc.config.DataType.TEXT),
-                wvc.config.Property(name="source", data_type=wvc.config.DataType.TEXT),
-                wvc.config.Property(name="author", data_type=wvc.config.DataType.TEXT),
-                wvc.config.Property(name="knowledge_type", data_type=wvc.config.DataType.TEXT),
-                wvc.config.Property(name="created_at", data_type=wvc.config.DataType.DATE),
-                wvc.config.Property(name="updated_at", data_type=wvc.config.DataType.DATE),
-                wvc.config.Property(name="file_id", data_type=wvc.config.DataType.UUID), # optional    
-            ]
-        )
+        create_documents_collection(COLLECTION_DOCUMENTS)
         print("🙌🏼 Collection Documents created successfully")
 
+    # add content_hash property to Documents collection
+    try:
+        documents_collection = get_collection(COLLECTION_DOCUMENTS)
+
+        documents_collection.config.add_property(
+            wvc.config.Property(name="content_hash", data_type=wvc.config.DataType.TEXT),
+        )
+    except Exception as e:
+        print(f"Error adding content_hash property to Documents collection: {e}")
+
     # ----------------------------------------------------------
     # MESSAGES COLLECTION
     # ----------------------------------------------------------
@@ -113,7 +373,7 @@ def initialize_schema() -> None:
         print("🙌🏼 Collection Messages created successfully")
     # add thought property to Messages collection
     try:
-        messages_collection = client.collections.get(COLLECTION_MESSAGES)
+        messages_collection = get_collection(COLLECTION_MESSAGES)
 
         messages_collection.config.add_property(
             wvc.config.Property(name="like_user_ids", data_type=wvc.config.DataType.TEXT),
@@ -129,6 +389,18 @@ def initialize_schema() -> None:
         )
     except Exception as e:
         print(f"Error adding thought property to Messages collection: {e}")
+
+    # reactions as arrays with denormalized counts, replacing the comma-joined
+    # like_user_ids/dislike_user_ids (copied over by backfill_message_reactions)
+    try:
+        add_missing_properties(COLLECTION_MESSAGES, [
+            wvc.config.Property(name="liked_by", data_type=wvc.config.DataType.TEXT_ARRAY),
+            wvc.config.Property(name="disliked_by", data_type=wvc.config.DataType.TEXT_ARRAY),
+            wvc.config.Property(name="like_count", data_type=wvc.config.DataType.INT),
+            wvc.config.Property(name="dislike_count", data_type=wvc.config.DataType.INT),
+        ])
+    except Exception as e:
+        print(f"Error adding reaction properties to Messages collection: {e}")
     
     # ----------------------------------------------------------
     # FINE TUNE COLLECTIONS
@@ -198,7 +470,7 @@ def initialize_schema() -> None:
         print("🙌🏼 Collection Sections created successfully")
     # add thought property to Chats collection
     try:
-        chats_collection = client.collections.get(COLLECTION_CHATS)
+        chats_collection = get_collection(COLLECTION_CHATS)
         chats_collection.config.add_property(
             wvc.config.Property(name="agent_id", data_type=wvc.config.DataType.UUID),
         )
@@ -230,7 +502,7 @@ def initialize_schema() -> None:
 
     # add thought property to Users collection
     try:
-        users_collection = client.collections.get(COLLECTION_USERS)
+        users_collection = get_collection(COLLECTION_USERS)
 
         users_collection.config.add_property(
             wvc.config.Property(name="last_login_at", data_type=wvc.config.DataType.DATE),
@@ -430,6 +702,15 @@ def initialize_schema() -> None:
         )
         print("🙌🏼 Collection FeedComments created successfully")
 
+    # like counts written with like_ids by the reaction aggregators
+    for collection_name in (COLLECTION_FEEDS, COLLECTION_FEED_COMMENTS):
+        try:
+            add_missing_properties(collection_name, [
+                wvc.config.Property(name="like_count", data_type=wvc.config.DataType.INT),
+            ])
+        except Exception as e:
+            print(f"Error adding like_count property to {collection_name} collection: {e}")
+
     # ----------------------------------------------------------
     # Categories COLLECTION
     # ----------------------------------------------------------
@@ -449,7 +730,7 @@ def initialize_schema() -> None:
         print("🙌🏼 Collection Categories created successfully")
 
     try:
-        categories_collection = client.collections.get(COLLECTION_CATEGORIES)
+        categories_collection = get_collection(COLLECTION_CATEGORIES)
 
         categories_collection.config.add_property(
             wvc.config.Property(name="language", data_type=wvc.config.DataType.TEXT),
@@ -479,7 +760,7 @@ def initialize_schema() -> None:
 
     # add thought property to Stories collection
     try:
-        stories_collection = client.collections.get(COLLECTION_STORIES)
+        stories_collection = get_collection(COLLECTION_STORIES)
 
         stories_collection.config.add_property(
             wvc.config.Property(name="audio_url", data_type=wvc.config.DataType.TEXT),
@@ -493,6 +774,37 @@ def initialize_schema() -> None:
     except Exception as e:
         print(f"Error adding thought property to Stories collection: {e}")
 
+    # narration rendered by render_story_audio: audio_hash is the audio cache
+    # key of the text it was rendered from, empty when audio_url was set by hand
+    try:
+        add_missing_properties(COLLECTION_STORIES, [
+            wvc.config.Property(name="audio_hash", data_type=wvc.config.DataType.TEXT),
+            wvc.config.Property(name="audio_rendered_at", data_type=wvc.config.DataType.DATE),
+        ])
+    except Exception as e:
+        print(f"Error adding audio properties to Stories collection: {e}")
+
+    # ----------------------------------------------------------
+    # PENDING_APPROVALS COLLECTION
+    # ----------------------------------------------------------
+    # Agent builder tool calls waiting for the user's approval, keyed by
+    # approval id, so the answer may reach any worker
+    exists = client.collections.exists(COLLECTION_PENDING_APPROVALS)
+    if not exists:
+        client.collections.create(
+            name=COLLECTION_PENDING_APPROVALS,
+            properties=[
+                wvc.config.Property(name="tool_name", data_type=wvc.config.DataType.TEXT),
+                wvc.config.Property(name="tool_description", data_type=wvc.config.DataType.TEXT),
+                wvc.config.Property(name="arguments", data_type=wvc.config.DataType.TEXT),
+                wvc.config.Property(name="reasoning", data_type=wvc.config.DataType.TEXT),
+                wvc.config.Property(name="timestamp", data_type=wvc.config.DataType.TEXT),
+                wvc.config.Property(name="execution_state", data_type=wvc.config.DataType.TEXT),
+                wvc.config.Property(name="created_at", data_type=wvc.config.DataType.DATE),
+            ]
+        )
+        print("🙌🏼 Collection PendingApprovals created successfully")
+
     print("🙌🏼 Schema initialized successfully")
 
 
@@ -501,7 +813,8 @@ def upload_documents(documents: List[Dict[str, str]]) -> Dict[str, Any]:
     Upload documents to Weaviate.
     
     Args:
-        documents: List of dictionaries containing document data
+        documents: List of dictionaries containing document data, optionally
+            with a precomputed "vector" from the same model as the vectorizer
     
     Returns:
         Response from Weaviate
@@ -528,16 +841,20 @@ def upload_documents(documents: List[Dict[str, str]]) -> Dict[str, Any]:
             data_object["source"] = doc["source"]
         if "knowledge_type" in doc:
             data_object["knowledge_type"] = doc["knowledge_type"]
+        if "content_hash" in doc:
+            data_object["content_hash"] = doc["content_hash"]
         
         data_objects.append(data_object)
     
     # response = 
-    collection = client.collections.get(COLLECTION_DOCUMENTS)
+    collection = get_collection(COLLECTION_DOCUMENTS)
 
     with collection.batch.fixed_size(batch_size=200) as batch:
-        for data_object in data_objects:
+        for doc, data_object in zip(documents, data_objects):
+            # Precomputed vectors skip the vectorizer
             batch.add_object(
                 properties=data_object,
+                vector=doc.get("vector"),
             )
             if batch.number_errors > 10:
                 print("Batch import stopped due to excessive errors.")
@@ -547,13 +864,29 @@ def upload_documents(documents: List[Dict[str, str]]) -> Dict[str, Any]:
         print(f"Number of failed imports: {len(failed_objects)}")
         print(f"First failed object: {failed_objects[0]}")
 
-    
+    retrieval_cache.invalidate()
     return failed_objects
 
+def embed_query(query: str) -> List[float]:
+    """Embed a search query with the model the Documents vectorizer uses, reusing cached vectors."""
+    key = retrieval_cache.result_key(query, 0)[0]
+    vector = retrieval_cache.vectors.get(key)
+    if vector is not None:
+        retrieval_cache.count_embedding(saved=True)
+        return vector
+    response = get_openai_client(OPENAI_API_KEY).embeddings.create(model=EMBEDDING_MODEL, input=query)
+    vector = response.data[0].embedding
+    retrieval_cache.count_embedding(saved=False)
+    retrieval_cache.vectors.set(key, vector)
+    return vector
+
 def search_documents(query: str, limit: int = 3) -> list[dict]:
     """
     Search for relevant documents using vector similarity.
 
+    Top-k results are cached per normalized query until documents change, and
+    query embeddings are cached separately, see libs/retrieval_cache.py.
+
     Args:
         query: Search query string
         limit: Maximum number of results to return
@@ -561,15 +894,32 @@ def search_documents(query: str, limit: int = 3) -> list[dict]:
     Returns:
         List of matching documents
     """
-    collection = client.collections.get(COLLECTION_DOCUMENTS)
-    response = collection.query.near_text(
-        query=query,
-        limit=limit,
-        certainty=0.7,
-        
-    )
+    key = retrieval_cache.result_key(query, limit)
+    cached = retrieval_cache.results.get(key)
+    if cached is not None:
+        retrieval_cache.count_embedding(saved=True)
+        return [dict(document) for document in cached]
+
+    # Results of a search overlapping an invalidation are not cached
+    generation = retrieval_cache.generation
+    collection = get_collection(COLLECTION_DOCUMENTS)
+    try:
+        response = with_retry(collection.query.near_vector,
+            near_vector=embed_query(query),
+            limit=limit,
+            certainty=0.7,
+        )
+    except Exception as e:
+        print(f"Error embedding query, falling back to near_text: {str(e)}")
+        response = with_retry(collection.query.near_text,
+            query=query,
+            limit=limit,
+            certainty=0.7,
+        )
     # Each object in response.objects contains .properties with your fields
-    return [obj.properties for obj in response.objects]
+    documents = [obj.properties for obj in response.objects]
+    retrieval_cache.store_results(key, documents, generation)
+    return [dict(document) for document in documents]
 
 def search_non_vector_collection(
     collection_name: str,
@@ -594,8 +944,8 @@ def search_non_vector_collection(
     Returns:
         List of matching collection
     """
-    collection = client.collections.get(collection_name)
-    response = collection.query.fetch_objects(
+    collection = get_collection(collection_name)
+    response = with_retry(collection.query.fetch_objects,
         limit=limit,
         return_properties=properties,
         filters=filters,
@@ -605,13 +955,260 @@ def search_non_vector_collection(
     # Each object in response.objects contains .properties with your fields, and uuid
     return [{"uuid": str(obj.uuid), **obj.properties} for obj in response.objects]
 
+class CursorError(Exception):
+    def __init__(self, message: str, status_code: int = 400):
+        self.message = message
+        self.status_code = status_code
+        super().__init__(self.message)
+
+def encode_cursor(state: Dict[str, Any]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(state, separators=(",", ":")).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    try:
+        state = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except Exception:
+        raise CursorError("Invalid cursor")
+    if not isinstance(state, dict):
+        raise CursorError("Invalid cursor")
+    return state
+
+def search_collection_page(
+    collection_name: str,
+    limit: int = 100,
+    properties: List[str] = [],
+    filters: Optional[_Filters] = None,
+    cursor: Optional[str] = None,
+    offset: Optional[int] = None,
+    sort_property: Optional[str] = "created_at",
+    ascending: bool = False,
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    Fetch one page of a collection and an opaque cursor for the next page.
+
+    Sorted pages use a keyset on sort_property: the cursor holds the last
+    value returned and how many objects with exactly that value were already
+    returned, so the next page filters on the value instead of skipping all
+    earlier objects. With sort_property=None objects come in UUID order using
+    Weaviate's `after` cursor, which cannot be combined with filters.
+
+    Either way the cost of a page does not grow with its depth. offset is only
+    used when there is no cursor, so offset-based clients still get a cursor
+    to continue from.
+
+    Args:
+        collection_name: Name of the collection to search
+        limit: Maximum number of results to return
+        properties: List of properties to return
+        filters: Filters to apply to the search
+        cursor: Cursor returned with the previous page
+        offset: Offset of the first page when there is no cursor
+        sort_property: Property to sort by, or None for UUID order
+        ascending: Sort direction
+
+    Returns:
+        Tuple of (objects, cursor for the next page or None on the last page)
+
+    Raises:
+        CursorError: If the cursor is malformed or was made for another sort
+    """
+    state = decode_cursor(cursor) if cursor else {}
+    if state.get("sort", sort_property) != sort_property or state.get("asc", ascending) != ascending:
+        raise CursorError("Cursor does not match this listing")
+    collection = get_collection(collection_name)
+
+    if sort_property is None:
+        if filters is not None:
+            raise ValueError("UUID order paging cannot be combined with filters")
+        response = with_retry(collection.query.fetch_objects,
+            limit=limit,
+            return_properties=properties,
+            after=state.get("after"),
+            offset=None if cursor else offset,
+        )
+        objects = [{"uuid": str(obj.uuid), **obj.properties} for obj in response.objects]
+        if len(objects) < limit:
+            return objects, None
+        return objects, encode_cursor({"sort": None, "asc": ascending, "after": objects[-1]["uuid"]})
+
+    if sort_property not in properties:
+        properties = [*properties, sort_property]
+    boundary = None
+    skip = offset or 0
+    if "value" in state:
+        boundary = datetime.fromisoformat(state["value"]) if state.get("date") else state["value"]
+        prop = Filter.by_property(sort_property)
+        boundary_filter = prop.greater_or_equal(boundary) if ascending else prop.less_or_equal(boundary)
+        filters = boundary_filter if filters is None else filters & boundary_filter
+        skip = state.get("skip", 0)
+
+    response = with_retry(collection.query.fetch_objects,
+        limit=limit,
+        return_properties=properties,
+        filters=filters,
+        offset=skip or None,
+        sort=Sort.by_property(sort_property, ascending=ascending),
+    )
+    objects = [{"uuid": str(obj.uuid), **obj.properties} for obj in response.objects]
+    last = objects[-1].get(sort_property) if objects else None
+    if len(objects) < limit or last is None:
+        return objects, None
+
+    if boundary is not None or not skip:
+        # Objects with the last value already returned: this page's, plus the
+        # earlier pages' when the page started inside the same run of values
+        ties = sum(1 for obj in objects if obj.get(sort_property) == last)
+        if boundary is not None and last == boundary:
+            ties += skip
+    else:
+        # First page at an offset: the run of equal values may start before it
+        prop = Filter.by_property(sort_property)
+        before = prop.greater_than(last) if not ascending else prop.less_than(last)
+        ties = skip + len(objects) - get_collection_count(
+            collection_name, before if filters is None else filters & before
+        )
+    return objects, encode_cursor({
+        "sort": sort_property,
+        "asc": ascending,
+        "value": last.isoformat() if isinstance(last, datetime) else last,
+        "date": isinstance(last, datetime),
+        "skip": ties,
+    })
+
 def get_object_by_id(collection_name: str, uuid: str) -> dict:
-    collection = client.collections.get(collection_name)
-    response = collection.query.fetch_objects(
+    collection = get_collection(collection_name)
+    response = with_retry(collection.query.fetch_objects,
         filters=Filter.by_id().equal(uuid)
     )
     return response.objects[0].properties
 
+def fetch_objects_by_ids(
+    collection_name: str,
+    ids: Iterable[str],
+    properties: Optional[List[str]] = None,
+) -> Dict[str, dict]:
+    """
+    Fetch many objects by ID with one contains_any query per
+    BATCH_LOADER_CHUNK_SIZE IDs.
+
+    Args:
+        collection_name: Name of the collection
+        ids: Object IDs; duplicates and empty values are ignored
+        properties: Properties to return, or None for all of them
+
+    Returns:
+        Dict of ID -> {"uuid", **properties} for the IDs that exist
+    """
+    ids = list(dict.fromkeys(str(object_id) for object_id in ids if object_id))
+    collection = get_collection(collection_name)
+    found: Dict[str, dict] = {}
+    for start in range(0, len(ids), BATCH_LOADER_CHUNK_SIZE):
+        chunk = ids[start:start + BATCH_LOADER_CHUNK_SIZE]
+        response = with_retry(collection.query.fetch_objects,
+            limit=len(chunk),
+            return_properties=properties,
+            filters=Filter.by_id().contains_any(chunk),
+        )
+        for obj in response.objects:
+            found[str(obj.uuid)] = {"uuid": str(obj.uuid), **obj.properties}
+    return found
+
+class BatchLoader:
+    """
+    Batches and caches lookups by ID, so that joining related objects onto a
+    page of results costs one query per collection instead of one per row.
+
+    Create one per request: it caches every object it loaded, including
+    misses, for its lifetime.
+    """
+
+    def __init__(self):
+        self._cache: Dict[Tuple[str, Optional[Tuple[str, ...]]], Dict[str, Optional[dict]]] = {}
+
+    def load_many(
+        self,
+        collection_name: str,
+        ids: Iterable[str],
+        properties: Optional[List[str]] = None,
+    ) -> Dict[str, Optional[dict]]:
+        """Load objects by ID, querying only the IDs not loaded yet. Missing IDs map to None."""
+        key = (collection_name, tuple(properties) if properties is not None else None)
+        cache = self._cache.setdefault(key, {})
+        ids = [str(object_id) for object_id in ids if object_id]
+        missing = [object_id for object_id in ids if object_id not in cache]
+        if missing:
+            found = fetch_objects_by_ids(collection_name, missing, properties)
+            for object_id in missing:
+                cache[object_id] = found.get(object_id)
+        return {object_id: cache[object_id] for object_id in ids}
+
+    def load(self, collection_name: str, object_id: str, properties: Optional[List[str]] = None) -> Optional[dict]:
+        if not object_id:
+            return None
+        return self.load_many(collection_name, [object_id], properties)[str(object_id)]
+
+    def load_grouped(
+        self,
+        collection_name: str,
+        property_name: str,
+        values: Iterable[str],
+        properties: List[str],
+        filters: Optional[_Filters] = None,
+        limit_per_value: Optional[int] = None,
+        page_size: int = 1000,
+    ) -> Dict[str, List[dict]]:
+        """
+        Load the objects whose property_name is one of values (one-to-many),
+        newest first, grouped by value. Uses one contains_any query per
+        BATCH_LOADER_CHUNK_SIZE values, paged with a created_at keyset, and
+        stops paging once every value has limit_per_value objects.
+
+        Not cached: the result depends on filters.
+        """
+        values = list(dict.fromkeys(str(value) for value in values if value))
+        groups: Dict[str, List[dict]] = {value: [] for value in values}
+        for start in range(0, len(values), BATCH_LOADER_CHUNK_SIZE):
+            chunk = values[start:start + BATCH_LOADER_CHUNK_SIZE]
+            chunk_filters = Filter.by_property(property_name).contains_any(chunk)
+            if filters is not None:
+                chunk_filters = chunk_filters & filters
+            cursor = None
+            while True:
+                objects, cursor = search_collection_page(
+                    collection_name,
+                    limit=page_size,
+                    properties=[*properties, property_name] if property_name not in properties else properties,
+                    filters=chunk_filters,
+                    cursor=cursor,
+                )
+                for obj in objects:
+                    group = groups.get(str(obj.get(property_name)))
+                    if group is not None and (limit_per_value is None or len(group) < limit_per_value):
+                        group.append(obj)
+                full = limit_per_value is not None and all(len(groups[value]) >= limit_per_value for value in chunk)
+                if not cursor or full:
+                    break
+        return groups
+
+    def join(
+        self,
+        rows: List[dict],
+        key: str,
+        target: str,
+        collection_name: str,
+        properties: Optional[List[str]] = None,
+        default: Any = None,
+    ) -> List[dict]:
+        """
+        Set row[target] to the object whose ID is row[key], for every row,
+        with one batched load.
+        """
+        loaded = self.load_many(collection_name, [row.get(key) for row in rows], properties)
+        for row in rows:
+            related = loaded.get(str(row.get(key))) if row.get(key) else None
+            row[target] = related if related is not None else default
+        return rows
+
 def search_vector_collection(
     collection_name: str,
     query: str,
@@ -636,8 +1233,8 @@ def search_vector_collection(
     Returns:
         List of matching collection
     """
-    collection = client.collections.get(collection_name)
-    response = collection.query.near_text(
+    collection = get_collection(collection_name)
+    response = with_retry(collection.query.near_text,
         query=query,
         limit=limit,
         return_properties=properties,
@@ -650,19 +1247,25 @@ def search_vector_collection(
 
 T = TypeVar('T', bound=Dict[str, Any])
 
+def invalidate_retrieval_cache(collection_name: str):
+    """Cached search results are stale once Documents change"""
+    if collection_name == COLLECTION_DOCUMENTS:
+        retrieval_cache.invalidate()
+
 def insert_to_collection(
     collection_name: str,
     properties: T,
     uuid: Optional[str] = None
 ) -> str:
     # Get the collection
-    collection = client.collections.get(collection_name)
+    collection = get_collection(collection_name)
 
     # Insert a single object
     if uuid:
         uuid = collection.data.insert(properties=properties, uuid=uuid)
     else:
         uuid = collection.data.insert(properties=properties)
+    invalidate_retrieval_cache(collection_name)
 
     return uuid
 
@@ -671,20 +1274,44 @@ def insert_to_collection_in_batch(
     properties: List[T]
 ) -> List[str]:
     # Get the collection
-    collection = client.collections.get(collection_name)
+    collection = get_collection(collection_name)
     # Insert a single object
     uuids = collection.data.insert_many(properties)
+    invalidate_retrieval_cache(collection_name)
     return uuids
 
+def insert_objects_with_ids(
+    collection_name: str,
+    objects: Dict[str, T]
+) -> Dict[str, str]:
+    """
+    Insert objects under caller-chosen UUIDs in one insert_many request.
+
+    Args:
+        collection_name: Name of the collection
+        objects: Properties keyed by the UUID to store them under
+
+    Returns:
+        Error messages keyed by UUID for the objects that failed
+    """
+    collection = get_collection(collection_name)
+    uuids = list(objects.keys())
+    response = collection.data.insert_many([
+        wvc.data.DataObject(properties=objects[uuid], uuid=uuid) for uuid in uuids
+    ])
+    invalidate_retrieval_cache(collection_name)
+    return {uuids[index]: error.message for index, error in response.errors.items()}
+
 def update_collection_object(
     collection_name: str,
     uuid: str,
     properties: T
 ) -> bool:
     # Get the collection
-    collection = client.collections.get(collection_name)
+    collection = get_collection(collection_name)
     # Update a single object
-    collection.data.update(properties=properties, uuid=uuid)
+    with_retry(collection.data.update, properties=properties, uuid=uuid)
+    invalidate_retrieval_cache(collection_name)
     return True
 
 def delete_collection_object(
@@ -692,9 +1319,10 @@ def delete_collection_object(
     uuid: str
 ) -> str:
     # Get the collection
-    collection = client.collections.get(collection_name)
+    collection = get_collection(collection_name)
     # Delete a single object
-    collection.data.delete_by_id(uuid)
+    with_retry(collection.data.delete_by_id, uuid)
+    invalidate_retrieval_cache(collection_name)
     return uuid
 
 def delete_collection_objects_many(
@@ -702,9 +1330,10 @@ def delete_collection_objects_many(
     filters: Optional[_Filters] = None
 ) -> bool:
     # Get the collection
-    collection = client.collections.get(collection_name)
+    collection = get_collection(collection_name)
     # Delete a single object
-    collection.data.delete_many(where=filters)
+    with_retry(collection.data.delete_many, where=filters)
+    invalidate_retrieval_cache(collection_name)
     return True
 
 def get_collection_count(
@@ -721,10 +1350,10 @@ def get_collection_count(
     Returns:
         Total count of objects matching the filters
     """
-    collection = client.collections.get(collection_name)
+    collection = get_collection(collection_name)
     
     # Use aggregate to get count
-    response = collection.aggregate.over_all(
+    response = with_retry(collection.aggregate.over_all,
         filters=filters
     )
     
@@ -735,8 +1364,8 @@ def get_aggregate(
     collection_name: str,
     filters: Filter
 ):
-    users = client.collections.get(collection_name)
-    response = users.aggregate.over_all(
+    users = get_collection(collection_name)
+    response = with_retry(users.aggregate.over_all,
         filters=filters,
         total_count=True
     )
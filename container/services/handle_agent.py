@@ -1,7 +1,7 @@
 import json
 from typing import List, Dict, Any, Optional
 from langchain_core.prompts import ChatPromptTemplate
-from libs.weaviate_lib import client, insert_to_collection, update_collection_object, delete_collection_object, COLLECTION_AGENTS
+from libs.weaviate_lib import get_collection, insert_to_collection, update_collection_object, delete_collection_object, COLLECTION_AGENTS, async_get_object_by_id, async_update_collection_object
 from datetime import datetime, UTC
 import uuid
 import weaviate.classes as wvc
@@ -78,7 +78,7 @@ def list_agents(author: str = "system", limit: int = 10, language: Optional[str]
         List of agent configurations
     """
     try:
-        collection = client.collections.get(COLLECTION_AGENTS)
+        collection = get_collection(COLLECTION_AGENTS)
         
         # filters = wvc.query.Filter.by_property("author").equal(author)
         filters = []
@@ -130,7 +130,7 @@ def get_agent_by_id(agent_id: str) -> Dict[str, Any]:
         Agent configuration
     """
     try:
-        collection = client.collections.get(COLLECTION_AGENTS)
+        collection = get_collection(COLLECTION_AGENTS)
         response = collection.query.fetch_object_by_id(agent_id)
         
         if response:
@@ -142,6 +142,28 @@ def get_agent_by_id(agent_id: str) -> Dict[str, Any]:
     except Exception as e:
         return {"error": f"Failed to get agent: {str(e)}"}
 
+async def async_get_agent_by_id(agent_id: str) -> Dict[str, Any]:
+    """get_agent_by_id for coroutines, awaiting Weaviate instead of holding a thread"""
+    try:
+        agent_data = await async_get_object_by_id(COLLECTION_AGENTS, agent_id)
+        if agent_data:
+            return agent_data
+        else:
+            return {"error": "Agent not found"}
+    except Exception as e:
+        return {"error": f"Failed to get agent: {str(e)}"}
+
+def agent_update_data(**kwargs) -> Dict[str, Any]:
+    update_data = {}
+    for key, value in kwargs.items():
+        if key in ["name", "description", "system_prompt", "model", "temperature", "language", "system_prompt", "corpus_id", "status"]:
+            update_data[key] = value
+        elif key in ["tools", "conversation_starters", "tags"]:
+            update_data[key] = json.dumps(value) if isinstance(value, list) else value
+    
+    update_data["updated_at"] = datetime.now()
+    return update_data
+
 def update_agent(agent_id: str, **kwargs) -> Dict[str, Any]:
     """
     Update an existing agent's configuration.
@@ -160,14 +182,7 @@ def update_agent(agent_id: str, **kwargs) -> Dict[str, Any]:
             return current_agent
         
         # Update fields
-        update_data = {}
-        for key, value in kwargs.items():
-            if key in ["name", "description", "system_prompt", "model", "temperature", "language", "system_prompt", "corpus_id", "status"]:
-                update_data[key] = value
-            elif key in ["tools", "conversation_starters", "tags"]:
-                update_data[key] = json.dumps(value) if isinstance(value, list) else value
-        
-        update_data["updated_at"] = datetime.now()
+        update_data = agent_update_data(**kwargs)
         
         # Update in Weaviate
         success = update_collection_object(COLLECTION_AGENTS, agent_id, update_data)
@@ -179,6 +194,19 @@ def update_agent(agent_id: str, **kwargs) -> Dict[str, Any]:
     except Exception as e:
         return {"error": f"Failed to update agent: {str(e)}"}
 
+async def async_update_agent(agent_id: str, **kwargs) -> Dict[str, Any]:
+    """update_agent for coroutines"""
+    try:
+        current_agent = await async_get_agent_by_id(agent_id)
+        if "error" in current_agent:
+            return current_agent
+        
+        update_data = agent_update_data(**kwargs)
+        await async_update_collection_object(COLLECTION_AGENTS, agent_id, update_data)
+        return {"message": f"Agent '{agent_id}' updated successfully", "updated_fields": list(update_data.keys())}
+    except Exception as e:
+        return {"error": f"Failed to update agent: {str(e)}"}
+
 def delete_agent(agent_id: str) -> Dict[str, Any]:
     """
     Delete an agent by ID.
@@ -215,7 +243,7 @@ def search_agents(query: str, limit: int = 5) -> List[Dict[str, Any]]:
         List of matching agents
     """
     try:
-        collection = client.collections.get(COLLECTION_AGENTS)
+        collection = get_collection(COLLECTION_AGENTS)
         response = collection.query.near_text(
             query=query,
             limit=limit,
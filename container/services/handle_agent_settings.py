@@ -1,5 +1,5 @@
 from typing import List, Dict, Any, Optional
-from libs.weaviate_lib import client, insert_to_collection, update_collection_object, delete_collection_object, COLLECTION_AGENT_SETTINGS
+from libs.weaviate_lib import get_collection, insert_to_collection, update_collection_object, delete_collection_object, COLLECTION_AGENT_SETTINGS
 from datetime import datetime
 import uuid
 import weaviate.classes as wvc
@@ -54,7 +54,7 @@ def list_agent_settings(agent_id: Optional[str] = None, limit: int = 100) -> Lis
         List of agent setting configurations
     """
     try:
-        collection = client.collections.get(COLLECTION_AGENT_SETTINGS)
+        collection = get_collection(COLLECTION_AGENT_SETTINGS)
         
         if agent_id:
             filters = wvc.query.Filter.by_property("agent_id").equal(agent_id)
@@ -88,7 +88,7 @@ def get_agent_setting(setting_id: str) -> Dict[str, Any]:
         Setting configuration
     """
     try:
-        collection = client.collections.get(COLLECTION_AGENT_SETTINGS)
+        collection = get_collection(COLLECTION_AGENT_SETTINGS)
         response = collection.query.fetch_object_by_id(setting_id)
         
         if response:
@@ -112,7 +112,7 @@ def get_agent_setting_by_key(agent_id: str, key: str) -> Dict[str, Any]:
         Setting configuration
     """
     try:
-        collection = client.collections.get(COLLECTION_AGENT_SETTINGS)
+        collection = get_collection(COLLECTION_AGENT_SETTINGS)
         
         filters = (
             wvc.query.Filter.by_property("agent_id").equal(agent_id) &
@@ -199,7 +199,7 @@ def delete_agent_settings_by_agent(agent_id: str) -> Dict[str, Any]:
         Success/error message
     """
     try:
-        collection = client.collections.get(COLLECTION_AGENT_SETTINGS)
+        collection = get_collection(COLLECTION_AGENT_SETTINGS)
         
         filters = wvc.query.Filter.by_property("agent_id").equal(agent_id)
         success = collection.data.delete_many(filters=filters)
@@ -224,7 +224,7 @@ def search_agent_settings(query: str, agent_id: Optional[str] = None, limit: int
         List of matching settings
     """
     try:
-        collection = client.collections.get(COLLECTION_AGENT_SETTINGS)
+        collection = get_collection(COLLECTION_AGENT_SETTINGS)
         
         if agent_id:
             filters = wvc.query.Filter.by_property("agent_id").equal(agent_id)
@@ -4,20 +4,78 @@ import secrets
 import hashlib
 import hmac
 import json
+import os
+import threading
+import time
+import atexit
 from werkzeug.security import generate_password_hash
 from data_classes.common_classes import ApiKey, CreateApiKeyRequest, UpdateApiKeyRequest, ApiKeyStatus
 from libs.weaviate_lib import search_non_vector_collection, insert_to_collection, update_collection_object, delete_collection_object, COLLECTION_API_KEYS
 from weaviate.collections.classes.filters import Filter
+from libs.ttl_cache import TTLCache
 import logging
 
 logger = logging.getLogger(__name__)
 
+# A revoked or deleted key stays usable on other workers for at most this many seconds
+API_KEY_CACHE_TTL = float(os.getenv('API_KEY_CACHE_TTL', 60))
+API_KEY_CACHE_SIZE = int(os.getenv('API_KEY_CACHE_SIZE', 10000))
+API_KEY_LAST_USED_FLUSH_INTERVAL = float(os.getenv('API_KEY_LAST_USED_FLUSH_INTERVAL', 30))
+
 class ApiKeyError(Exception):
     def __init__(self, message: str, status_code: int = 400):
         self.message = message
         self.status_code = status_code
         super().__init__(self.message)
 
+class LastUsedRecorder:
+    """
+    Buffers last_used_at per API key in memory and writes them to Weaviate in
+    periodic batches, so validating a key does not cost a write.
+
+    Repeated uses of a key between two flushes collapse into one update.
+    """
+
+    def __init__(self, flush_interval: float = API_KEY_LAST_USED_FLUSH_INTERVAL):
+        self.flush_interval = flush_interval
+        self._pending: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._flusher_pid: Optional[int] = None
+
+    def record(self, api_key_id: str):
+        with self._lock:
+            self._pending[api_key_id] = datetime.now(UTC).strftime("%Y-%m-%dT%H:%M:%SZ")
+            # A forked worker inherits the buffer but not the flusher thread
+            if self._flusher_pid != os.getpid():
+                self._flusher_pid = os.getpid()
+                threading.Thread(target=self._run, name="api-key-last-used", daemon=True).start()
+
+    def discard(self, api_key_id: str):
+        with self._lock:
+            self._pending.pop(api_key_id, None)
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for api_key_id, last_used_at in pending.items():
+            try:
+                update_collection_object(
+                    collection_name=COLLECTION_API_KEYS,
+                    uuid=api_key_id,
+                    properties={"last_used_at": last_used_at}
+                )
+            except Exception as e:
+                logger.error(f"Error updating last_used_at for API key {api_key_id}: {str(e)}")
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+validated_api_keys: TTLCache[Dict[str, Any]] = TTLCache(maxsize=API_KEY_CACHE_SIZE, ttl=API_KEY_CACHE_TTL)
+last_used_recorder = LastUsedRecorder()
+atexit.register(last_used_recorder.flush)
+
 def generate_api_key() -> str:
     """Generate a secure API key"""
     return f"pk_{secrets.token_urlsafe(32)}"
@@ -143,6 +201,9 @@ def update_api_key(api_key_id: str, user_id: str, request: UpdateApiKeyRequest)
         
         if not success:
             raise ApiKeyError("Failed to update API key", 500)
+
+        # Status, permissions or expiry may have changed
+        validated_api_keys.delete(existing_key.get("key_hash"))
         
         # Return updated API key (without the actual key)
         updated_key = get_api_key_by_id(api_key_id)
@@ -173,6 +234,9 @@ def delete_api_key(api_key_id: str, user_id: str) -> bool:
         
         if not success:
             raise ApiKeyError("Failed to delete API key", 500)
+
+        validated_api_keys.delete(existing_key.get("key_hash"))
+        last_used_recorder.discard(api_key_id)
         
         return True
         
@@ -195,30 +259,38 @@ def validate_api_key(api_key: str) -> Optional[Dict[str, Any]]:
     """Validate an API key and return user info if valid"""
     try:
         key_hash = hash_api_key(api_key)
+
+        api_key_data = validated_api_keys.get(key_hash)
+        if api_key_data is None:
+            # Search for the API key
+            filters = Filter.by_property("key_hash").equal(key_hash)
+            api_keys = search_non_vector_collection(
+                collection_name=COLLECTION_API_KEYS,
+                filters=filters,
+                limit=1,
+                properties=["user_id", "status", "permissions", "expires_at", "last_used_at"]
+            )
+
+            if not api_keys:
+                return None
+
+            api_key_data = api_keys[0]
+
+            # Check if key is active
+            if api_key_data.get("status") != ApiKeyStatus.ACTIVE.value:
+                return None
+
+            validated_api_keys.set(key_hash, api_key_data)
         
-        # Search for the API key
-        filters = Filter.by_property("key_hash").equal(key_hash)
-        api_keys = search_non_vector_collection(
-            collection_name=COLLECTION_API_KEYS,
-            filters=filters,
-            limit=1,
-            properties=["user_id", "status", "permissions", "expires_at", "last_used_at"]
-        )
-        
-        if not api_keys:
-            return None
-        
-        api_key_data = api_keys[0]
-        
-        # Check if key is active
-        if api_key_data.get("status") != ApiKeyStatus.ACTIVE.value:
-            return None
-        
-        # Check if key is expired
+        # Check if key is expired, cached keys included
         expires_at = api_key_data.get("expires_at")
         if expires_at:
-            expires_datetime = datetime.fromisoformat(expires_at.replace('Z', '+00:00'))
+            if isinstance(expires_at, str):
+                expires_datetime = datetime.fromisoformat(expires_at.replace('Z', '+00:00'))
+            else:
+                expires_datetime = expires_at if expires_at.tzinfo else expires_at.replace(tzinfo=UTC)
             if datetime.now(UTC) > expires_datetime:
+                validated_api_keys.delete(key_hash)
                 # Mark as expired
                 api_key_uuid = api_key_data.get("uuid")
                 if api_key_uuid:
@@ -229,14 +301,10 @@ def validate_api_key(api_key: str) -> Optional[Dict[str, Any]]:
                     )
                 return None
         
-        # Update last used timestamp
+        # Update last used timestamp, written in the next batch
         api_key_uuid = api_key_data.get("uuid")
         if api_key_uuid:
-            update_collection_object(
-                collection_name=COLLECTION_API_KEYS,
-                uuid=api_key_uuid,
-                properties={"last_used_at": datetime.now(UTC).strftime("%Y-%m-%dT%H:%M:%SZ")}
-            )
+            last_used_recorder.record(api_key_uuid)
         
         return {
             "user_id": api_key_data.get("user_id"),
@@ -1,6 +1,14 @@
-from typing import List, Dict, Any, Generator, Optional
+from typing import List, Dict, Any, Generator, Optional, Callable, Tuple
+import base64
 import json
-from libs.weaviate_lib import search_documents, insert_to_collection_in_batch, insert_to_collection, COLLECTION_MESSAGES
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from libs.weaviate_lib import search_documents, insert_to_collection_in_batch, COLLECTION_MESSAGES
 from data_classes.common_classes import AskRequest, Message, ApprovalStatus, Agent, Language, AgentProvider, StreamEvent
 from agents.buddha_agent import generate_answer
 from datetime import datetime, timedelta
@@ -14,6 +22,22 @@ from constants.separators import ENDING_SEPARATOR, STARTING_SEPARATOR
 from utils.string_utils import get_text_after_separator
 from services.handle_sections import get_section_by_id, update_section
 from agents.context_agent import generate_context
+from libs.ttl_cache import TTLCache
+from libs.background_jobs import background_jobs
+from services.handle_tts import SPEECH_VOICES, SpeechSegment, SpeechStream
+
+logger = logging.getLogger(__name__)
+
+# Threads shared by all requests for the lookups that run before the first token
+ASK_PREFETCH_WORKERS = int(os.getenv("ASK_PREFETCH_WORKERS", 16))
+prefetch_executor = ThreadPoolExecutor(max_workers=ASK_PREFETCH_WORKERS, thread_name_prefix="ask-prefetch")
+
+# Serializes the context refreshes of one chat section in this process
+section_context_locks = [threading.Lock() for _ in range(64)]
+
+# agent_id -> provider, so contexts are only prefetched for agents that use them
+agent_providers: TTLCache[str] = TTLCache(maxsize=1024, ttl=300)
+
 class AskError(Exception):
     def __init__(self, message: str, status_code: int = 400):
         self.message = message
@@ -64,6 +88,79 @@ def get_agent(agent_id: str, language: Language) -> Agent:
         conversation_starters=agent["conversation_starters"],
     )
 
+@dataclass
+class PreparedAsk:
+    agent: Agent
+    provider: AgentProvider
+    chat_section: Optional[Dict[str, Any]] = None
+    context: Optional[str] = None
+    contexts: Optional[List[Dict[str, str]]] = None
+    # stage -> milliseconds
+    timings: Dict[str, float] = field(default_factory=dict)
+
+def prepare_request(
+    body: AskRequest,
+    last_user_message: Message,
+    contexts_providers: Tuple[str, ...] = (AgentProvider.OPENAI.value,),
+) -> PreparedAsk:
+    """
+    Run the lookups needed before generation at the same time: the agent, the
+    chat section and, for agents of contexts_providers, the retrieved documents.
+
+    Which provider an agent uses is only known once it is fetched, so contexts
+    are fetched alongside the agent when the provider is one of
+    contexts_providers or not known yet, and after it otherwise. Each lookup
+    runs at most once per request.
+    """
+    started = time.perf_counter()
+    timings: Dict[str, float] = {}
+
+    def submit(func: Callable, *args) -> Future:
+        def run():
+            stage_started = time.perf_counter()
+            return func(*args), (time.perf_counter() - stage_started) * 1000
+        return prefetch_executor.submit(run)
+
+    def wait(stage: str, future: Future):
+        # Timings are written here, on the calling thread: a speculative
+        # lookup that is never waited for must not touch them
+        result, ms = future.result()
+        timings[stage] = ms
+        return result
+
+    agent_future = submit(get_agent, body.agent_id, body.language)
+    section_future = submit(get_section_by_id, body.session_id) if body.session_id else None
+    contexts_future = None
+    cached_provider = agent_providers.get(body.agent_id)
+    if cached_provider is None or cached_provider in contexts_providers:
+        contexts_future = submit(get_contexts, last_user_message)
+
+    agent = wait("agent", agent_future)
+    if not agent:
+        raise AskError("Agent not found", 404)
+    provider = check_model(agent.model)
+    agent_providers.set(body.agent_id, provider.value)
+
+    contexts = None
+    if provider.value in contexts_providers:
+        if contexts_future is None:
+            contexts_future = submit(get_contexts, last_user_message)
+        contexts = wait("contexts", contexts_future)
+
+    chat_section = wait("section", section_future) if section_future else None
+    context = chat_section.get("context", None) if chat_section else None
+
+    timings["total"] = (time.perf_counter() - started) * 1000
+    logger.info(f"Prepared ask for agent {body.agent_id}: " + ", ".join(f"{stage}={ms:.0f}ms" for stage, ms in timings.items()))
+    return PreparedAsk(
+        agent=agent,
+        provider=provider,
+        chat_section=chat_section,
+        context=context,
+        contexts=contexts,
+        timings=timings,
+    )
+
 def handle_insert_messages(body: AskRequest, last_user_message: Message, answer: str):
     user_time = datetime.now()
     # Insert messages to the database
@@ -89,25 +186,25 @@ def handle_ask_non_streaming(body: AskRequest) -> str:
         if not body.agent_id:
             raise AskError("Agent ID is required", 400)
         last_user_message, previous_assistant_message = prepare_ask(body)
-        contexts = get_contexts(last_user_message)
-        agent = get_agent(body.agent_id or "", body.language)
-        provider = check_model(agent.model)
+        # Gemini answers here are grounded on the retrieved documents too
+        prepared = prepare_request(
+            body, last_user_message,
+            contexts_providers=(AgentProvider.OPENAI.value, AgentProvider.GOOGLE_VERTEX.value)
+        )
         # 2. generate answer
-        match provider.value:
+        match prepared.provider.value:
             case AgentProvider.OPENAI.value:
-                contexts = get_contexts(last_user_message)
-                
                 response: str = generate_openai_answer(
-                    agent = agent,
+                    agent = prepared.agent,
                     messages = body.messages, 
-                    contexts = contexts, 
+                    contexts = prepared.contexts, 
                     stream = False
                 )
             case AgentProvider.GOOGLE_VERTEX.value:
                 response: str = generate_gemini_response(
-                    agent = agent,
+                    agent = prepared.agent,
                     messages = body.messages, 
-                    context = contexts,
+                    context = format_contexts(prepared.contexts),
                     stream = False
                 )
         # answer = generate_answer(body.messages, contexts, body.options, body.language, body.model)
@@ -132,6 +229,27 @@ def get_contexts(last_user_message: Message) -> List[Dict[str, str]]:
     ]
     return contexts
 
+def format_contexts(contexts: Optional[List[Dict[str, str]]]) -> str:
+    """Retrieved documents as prompt text, in the format generate_openai_answer uses"""
+    return "\n\n".join(f"Source: {ctx['title']}\nContent: {ctx['content']}" for ctx in contexts or [])
+
+def refresh_section_context(session_id: str, user_prompt: str):
+    """
+    Regenerate the behavior rules of a chat section from the latest user prompt.
+
+    Refreshes of one section run one at a time, each from the context stored
+    by the one before, so quick turns do not overwrite each other's rules.
+    """
+    with section_context_locks[hash(session_id) % len(section_context_locks)]:
+        section = get_section_by_id(session_id)
+        previous_context = section.get("context") if section else None
+        new_context = generate_context(user_prompt, previous_context)
+        if new_context:
+            update_section(
+                section_id=session_id,
+                context=new_context,
+            )
+
 def format_response(chunk: StreamEvent, text_only: bool) -> str:
     if text_only:
         if ENDING_SEPARATOR in chunk.data:
@@ -141,13 +259,68 @@ def format_response(chunk: StreamEvent, text_only: bool) -> str:
     else:
         return f"data: {chunk.to_dict_json()}"
 
+def speech_params(body: AskRequest) -> Dict[str, Any]:
+    """SpeechStream arguments from the request options, validated before streaming starts"""
+    language = body.language.value if isinstance(body.language, Language) else body.language
+    voice_name, language_code = SPEECH_VOICES.get(language, SPEECH_VOICES[Language.VI.value])
+    params = {
+        "voice_name": body.options.get("voice_name", voice_name),
+        "language_code": body.options.get("language_code", language_code),
+    }
+    if "speaking_rate" in body.options:
+        try:
+            speaking_rate = float(body.options["speaking_rate"])
+        except (TypeError, ValueError):
+            raise AskError("Speaking rate must be a number", 400)
+        if not (0.25 <= speaking_rate <= 4.0):
+            raise AskError("Speaking rate must be between 0.25 and 4.0", 400)
+        params["speaking_rate"] = speaking_rate
+    return params
+
+def speakable_answer(response: str, spoken: int, final: bool, thinking: bool) -> Tuple[str, int]:
+    """
+    Text of the answer not yet read out, and how much of the response is now
+    spoken.
+
+    A thinking response (Gemini is prompted to reason first, and any response
+    opening with STARTING_SEPARATOR) is held back until ENDING_SEPARATOR: like
+    format_response with text_only, only what follows it is the answer, and
+    without one the response is read out whole once it is final. Any other
+    response is read out as it streams.
+    """
+    answer_start = response.find(ENDING_SEPARATOR)
+    if answer_start >= 0:
+        answer_start += len(ENDING_SEPARATOR)
+        return response[max(answer_start, spoken):], len(response)
+    opening = response.lstrip()
+    # Until enough has arrived to tell whether it opens with the separator
+    undecided = spoken == 0 and STARTING_SEPARATOR.startswith(opening)
+    if not final and (thinking or undecided or opening.startswith(STARTING_SEPARATOR)):
+        return "", spoken
+    return response[spoken:], len(response)
+
+def format_speech(segment: SpeechSegment) -> str:
+    return format_response(StreamEvent(
+        type="audio",
+        data=base64.b64encode(segment.audio).decode("utf-8"),
+        metadata={
+            "index": segment.index,
+            "text": segment.text,
+            "content_type": "audio/mpeg",
+            "audio_key": segment.audio_key,
+            "audio_url": f"/api/v1/tts/audio/{segment.audio_key}",
+        },
+    ), False)
+
 def handle_ask_streaming(body: AskRequest, is_test: bool = False) -> Response:
     try:
         headers = {}
         # 1. prepare
         last_user_message, previous_assistant_message = prepare_ask(body)
+        speech_options = speech_params(body) if body.options and body.options.get('speech') else None
         # 2. generate answer
         def generate():
+            speech: Optional[SpeechStream] = None
             try:
                 if not body.agent_id:
                     raise AskError("Agent ID is required", 400)
@@ -156,20 +329,19 @@ def handle_ask_streaming(body: AskRequest, is_test: bool = False) -> Response:
                 text_only = body.options.get('text_only', False)
                 if not text_only:
                     text_only = False
-                agent = get_agent(body.agent_id, body.language)
-                if not agent:
-                    raise AskError("Agent not found", 404)
-                context: Optional[str] = None
-                if body.session_id:
-                    chat_section = get_section_by_id(body.session_id)
-                    if chat_section:
-                        context = chat_section.get("context", None)
-                    else:
-                        context = None
-                provider = check_model(agent.model)
-                match provider.value:
+                # Spoken answer: audio events for each finished sentence,
+                # interleaved with the text events
+                speech = SpeechStream(**speech_options) if speech_options is not None and not text_only else None
+                spoken = 0
+                prepared = prepare_request(body, last_user_message)
+                agent = prepared.agent
+                chat_section = prepared.chat_section
+                context: Optional[str] = prepared.context
+                # Only the Gemini prompt asks for reasoning before ENDING_SEPARATOR
+                thinking = prepared.provider.value == AgentProvider.GOOGLE_VERTEX.value
+                match prepared.provider.value:
                     case AgentProvider.OPENAI.value:
-                        contexts = get_contexts(last_user_message)
+                        contexts = prepared.contexts
                         
                         stream: Generator[StreamEvent, None, None] = generate_openai_answer(
                             agent = agent,
@@ -192,17 +364,28 @@ def handle_ask_streaming(body: AskRequest, is_test: bool = False) -> Response:
                         content = chunk.data
                         full_response += content
                         yield format_response(chunk, text_only)
+                        if speech:
+                            answer, spoken = speakable_answer(full_response, spoken, False, thinking)
+                            speech.feed(answer)
+                            for segment in speech.ready():
+                                yield format_speech(segment)
                     elif chunk.type == "thought":
                         thought_response += chunk.data
                         yield format_response(chunk, text_only)
                     elif chunk.type == "end_of_stream":
+                        if speech:
+                            answer, spoken = speakable_answer(full_response, spoken, True, thinking)
+                            speech.feed(answer)
+                            for segment in speech.finish():
+                                yield format_speech(segment)
                         # response_content, response_thought = get_text_after_separator(full_response, ENDING_SEPARATOR)
                         
                         # After streaming is complete, save the messages
                         user_time = datetime.now()
                         # test agent dont save messages:
+                        question_id = None
+                        response_answer_id = None
                         if not is_test:
-                            response_answer_id = None
                             
                             # if body.context:
                             #     response_answer_id = insert_to_collection(
@@ -230,8 +413,13 @@ def handle_ask_streaming(body: AskRequest, is_test: bool = False) -> Response:
                             #             }
                             #         )
                             # else:
-                            response_answer_id = insert_to_collection(
+                            # Written in the background; the ids are fixed here so the
+                            # client gets them now and retries never duplicate a message
+                            response_answer_id = str(uuid.uuid4())
+                            question_id = str(uuid.uuid4())
+                            background_jobs.insert(
                                 collection_name=COLLECTION_MESSAGES,
+                                uuid=response_answer_id,
                                 properties={
                                     "session_id": body.session_id,
                                     "content": full_response,
@@ -241,14 +429,15 @@ def handle_ask_streaming(body: AskRequest, is_test: bool = False) -> Response:
                                     "agent_id": body.agent_id,
                                 }
                             )
-                            question_id = insert_to_collection(
+                            background_jobs.insert(
                                 collection_name=COLLECTION_MESSAGES,
+                                uuid=question_id,
                                 properties={
                                     "session_id": body.session_id,
                                     "content": last_user_message.content,
                                     "role": last_user_message.role,
                                     "created_at": user_time.strftime("%Y-%m-%dT%H:%M:%SZ"),
-                                    "response_answer_id": str(response_answer_id),
+                                    "response_answer_id": response_answer_id,
                                     "approval_status": ApprovalStatus.PENDING.value,
                                     "agent_id": body.agent_id,
                                 }
@@ -258,22 +447,24 @@ def handle_ask_streaming(body: AskRequest, is_test: bool = False) -> Response:
                             "response_answer_id": str(response_answer_id),
                         }
                         yield format_response(chunk, text_only)
-                        if body.session_id:
-                            new_context = generate_context(last_user_message.content, context)
-                            if new_context:
-                                if chat_section:
-                                    update_section(
-                                        section_id=body.session_id,
-                                        context=new_context,
-                                    )
-                                # else:
-                                #     insert_to_collection(
-                                #         collection_name=COLLECTION_CHATS,
-                                #         properties={"context": new_context},
-                                #     )
+                        if body.session_id and chat_section:
+                            background_jobs.submit(
+                                refresh_section_context,
+                                body.session_id,
+                                last_user_message.content,
+                            )
+                if speech:
+                    # Providers normally end with end_of_stream, which drains this earlier
+                    answer, spoken = speakable_answer(full_response, spoken, True, thinking)
+                    speech.feed(answer)
+                    for segment in speech.finish():
+                        yield format_speech(segment)
                 
             except Exception as e:
                 raise AskError(str(e), 500)
+            finally:
+                if speech:
+                    speech.close()
 
         return Response(
             stream_with_context(generate()),
@@ -3,12 +3,15 @@ from typing import Optional, Dict, Any
 import jwt
 from werkzeug.security import generate_password_hash, check_password_hash
 from data_classes.common_classes import User, AuthRequest, PasswordResetRequest, ResetPasswordRequest, PasswordResetToken
-from libs.weaviate_lib import search_non_vector_collection, insert_to_collection, COLLECTION_TOKEN_BLACKLIST, update_collection_object
+from libs.weaviate_lib import search_non_vector_collection, search_collection_page, insert_to_collection, COLLECTION_TOKEN_BLACKLIST, update_collection_object
 from weaviate.collections.classes.filters import Filter
 from services.handle_email import send_password_reset_email, send_password_reset_confirmation_email, EmailError
 import os
 import uuid
 import secrets
+import hashlib
+import threading
+import time
 from data_classes.common_classes import UserRole
 
 # JWT Configuration
@@ -16,12 +19,152 @@ JWT_SECRET = os.getenv('JWT_SECRET', 'your-secret-key')  # In production, use a
 JWT_ALGORITHM = 'HS256'
 JWT_EXPIRATION = timedelta(days=1)  # Token expires in 1 day
 
+# Tokens revoked by another worker are picked up within this many seconds
+BLACKLIST_REFRESH_INTERVAL = float(os.getenv('BLACKLIST_REFRESH_INTERVAL', 5))
+BLACKLIST_REFRESH_OVERLAP = timedelta(seconds=60)
+BLACKLIST_PAGE_SIZE = 1000
+
 class AuthError(Exception):
     def __init__(self, message: str, status_code: int = 401):
         self.message = message
         self.status_code = status_code
         super().__init__(self.message)
 
+def hash_token(token: str) -> str:
+    """Hash a token so raw JWTs are not kept in memory"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+class TokenBlacklistCache:
+    """
+    In-process copy of the TokenBlacklist collection, keyed by token hash.
+
+    The first lookup loads every revoked token that has not expired yet. After
+    that, at most once per refresh interval, only tokens blacklisted since the
+    last refresh are fetched. Entries are evicted once their expires_at passes,
+    since an expired token is rejected by jwt.decode anyway.
+
+    Every lookup is counted: hits found the token in the blacklist, misses did
+    not. refreshes counts the reloads from Weaviate.
+    """
+
+    def __init__(self, refresh_interval: float = BLACKLIST_REFRESH_INTERVAL):
+        self.refresh_interval = refresh_interval
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self._expires_at: Dict[str, datetime] = {}
+        self._last_blacklisted_at: Optional[datetime] = None
+        self._last_refresh: Optional[float] = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+    def contains(self, token: str) -> bool:
+        """Check a token against the cache, refreshing it first if it is stale"""
+        self._refresh_if_stale()
+        key = hash_token(token)
+        now = datetime.now(UTC)
+        with self._lock:
+            expires_at = self._expires_at.get(key)
+            if expires_at is not None and expires_at <= now:
+                del self._expires_at[key]
+                expires_at = None
+            if expires_at is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+            return expires_at is not None
+
+    def add(self, token: str, expires_at: datetime):
+        """Record a token revoked by this process without waiting for a refresh"""
+        with self._lock:
+            self._expires_at[hash_token(token)] = expires_at
+
+    def invalidate(self):
+        """Force the next lookup to fetch newly blacklisted tokens"""
+        with self._lock:
+            if self._last_refresh is not None:
+                self._last_refresh = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / total if total else 0.0,
+                "refreshes": self.refreshes,
+                "size": len(self._expires_at),
+            }
+
+    def _is_stale(self) -> bool:
+        return self._last_refresh is None or time.monotonic() - self._last_refresh >= self.refresh_interval
+
+    def _refresh_if_stale(self) -> bool:
+        if not self._is_stale():
+            return False
+        if self._last_refresh is None:
+            # Nothing loaded yet, every caller has to wait for the first load
+            self._refresh_lock.acquire()
+        elif not self._refresh_lock.acquire(blocking=False):
+            # Another thread is already refreshing, serve what we have
+            return False
+        try:
+            if not self._is_stale():
+                return False
+            self._refresh()
+            return True
+        finally:
+            self._refresh_lock.release()
+
+    def _refresh(self):
+        now = datetime.now(UTC)
+        filters = Filter.by_property("expires_at").greater_than(now)
+        if self._last_blacklisted_at is not None:
+            # Look back a little: a token written by another worker can become
+            # visible after newer ones. Re-reading an entry is harmless.
+            since = self._last_blacklisted_at - BLACKLIST_REFRESH_OVERLAP
+            filters = filters & Filter.by_property("blacklisted_at").greater_or_equal(since)
+        entries = []
+        loaded = False
+        try:
+            # Keyset pages on blacklisted_at: offset paging stops working past
+            # Weaviate's QUERY_MAXIMUM_RESULTS (10k by default)
+            cursor = None
+            while True:
+                page, cursor = search_collection_page(
+                    collection_name=COLLECTION_TOKEN_BLACKLIST,
+                    filters=filters,
+                    limit=BLACKLIST_PAGE_SIZE,
+                    cursor=cursor,
+                    properties=["token", "blacklisted_at", "expires_at"],
+                    sort_property="blacklisted_at",
+                    ascending=True
+                )
+                entries.extend(page)
+                if not cursor:
+                    break
+            loaded = True
+        except Exception as e:
+            print(f"Error refreshing token blacklist: {str(e)}")
+            # Keep serving the cached entries and retry after the next interval
+            entries = []
+
+        with self._lock:
+            for entry in entries:
+                self._expires_at[hash_token(entry["token"])] = entry["expires_at"]
+                blacklisted_at = entry.get("blacklisted_at")
+                if blacklisted_at and (self._last_blacklisted_at is None or blacklisted_at > self._last_blacklisted_at):
+                    self._last_blacklisted_at = blacklisted_at
+            if loaded and self._last_blacklisted_at is None:
+                # Empty blacklist, the next refresh only needs new entries
+                self._last_blacklisted_at = now
+            for key in [key for key, expires_at in self._expires_at.items() if expires_at <= now]:
+                del self._expires_at[key]
+            self._last_refresh = time.monotonic()
+            self.refreshes += 1
+
+token_blacklist_cache = TokenBlacklistCache()
+
 def create_jwt_token(user_id: str, role: str) -> str:
     """Create a JWT token for a user"""
     print('user_id:')
@@ -70,7 +213,12 @@ def blacklist_token(token: str, user_id: str) -> bool:
             collection_name=COLLECTION_TOKEN_BLACKLIST,
             properties=token_data
         )
-        
+
+        if blacklist_id is not None:
+            # Reject the token in this process right away
+            token_blacklist_cache.add(token, exp_datetime)
+            token_blacklist_cache.invalidate()
+
         return blacklist_id is not None
     except Exception as e:
         print(f"Error blacklisting token: {str(e)}")
@@ -78,19 +226,7 @@ def blacklist_token(token: str, user_id: str) -> bool:
 
 def is_token_blacklisted(token: str) -> bool:
     """Check if a token is blacklisted"""
-    try:
-        filters = Filter.by_property("token").equal(token)
-        blacklisted_tokens = search_non_vector_collection(
-            collection_name=COLLECTION_TOKEN_BLACKLIST,
-            filters=filters,
-            limit=1,
-            properties=["token", "blacklisted_at", "expires_at"]
-        )
-        
-        return len(blacklisted_tokens) > 0
-    except Exception as e:
-        print(f"Error checking token blacklist: {str(e)}")
-        return False
+    return token_blacklist_cache.contains(token)
 
 def cleanup_expired_blacklisted_tokens():
     """Clean up expired tokens from blacklist"""
@@ -1,9 +1,16 @@
+import os
 from datetime import datetime, UTC
 from warnings import filters
-from libs.weaviate_lib import COLLECTION_CATEGORIES, COLLECTION_STORIES, delete_collection_object, search_non_vector_collection, update_collection_object, insert_to_collection, delete_collection_objects_many
+from libs.weaviate_lib import COLLECTION_CATEGORIES, COLLECTION_STORIES, BatchLoader, delete_collection_object, search_non_vector_collection, update_collection_object, insert_to_collection, delete_collection_objects_many
 from weaviate.classes.query import Filter
 from data_classes.common_classes import CreateCategoryRequest, StoryStatus
 
+# Most stories expanded into each category when listing categories with stories
+CATEGORY_STORIES_LIMIT = int(os.getenv("CATEGORY_STORIES_LIMIT", 100))
+STORY_PROPERTIES = ["author", "title", "content", "language", "category_id", "status", "created_at", "updated_at", "image_url", "audio_url"]
+# Listing cards do not show the story text
+STORY_SUMMARY_PROPERTIES = [prop for prop in STORY_PROPERTIES if prop != "content"]
+
 class CategoryError(Exception):
     def __init__(self, message: str, status_code: int = 400):
         self.message = message
@@ -25,8 +32,22 @@ def create_category(request: CreateCategoryRequest) -> str:
     category_id = insert_to_collection(COLLECTION_CATEGORIES, data)
     return category_id
 
-def get_all_categories(limit: int, offset: int, include_stories: bool, filters: dict) -> list[dict]:
-    """Get all categories with pagination"""
+def get_all_categories(
+    limit: int,
+    offset: int,
+    include_stories: bool,
+    filters: dict,
+    stories_limit: int = CATEGORY_STORIES_LIMIT,
+    stories_summary: bool = False,
+) -> list[dict]:
+    """
+    Get all categories with pagination
+
+    With include_stories, each category gets its newest published stories
+    (at most stories_limit). Stories of all categories on the page are
+    fetched together and grouped in memory; stories_summary leaves out the
+    story content.
+    """
     weaviate_filters = []
     for key, value in filters.items():
         weaviate_filters.append(Filter.by_property(key).equal(value))
@@ -40,10 +61,17 @@ def get_all_categories(limit: int, offset: int, include_stories: bool, filters:
     properties = ["name", "description","type", "author_group", "language", "created_at", "updated_at"]
     categories = search_non_vector_collection(COLLECTION_CATEGORIES, limit=limit, offset=offset, properties=properties, filters=combined_filter)
     if include_stories:
+        # Published stories of every category on the page, in one batched load
+        stories = BatchLoader().load_grouped(
+            COLLECTION_STORIES,
+            "category_id",
+            [category["uuid"] for category in categories],
+            properties=STORY_SUMMARY_PROPERTIES if stories_summary else STORY_PROPERTIES,
+            filters=Filter.by_property("status").equal(StoryStatus.PUBLISHED.value),
+            limit_per_value=max(1, min(stories_limit, CATEGORY_STORIES_LIMIT)),
+        )
         for category in categories:
-            filters = Filter.by_property("category_id").equal(category["uuid"]).__and__(Filter.by_property("status").equal(StoryStatus.PUBLISHED.value))
-            story_properties = ["author", "title", "content", "language", "category_id", "status", "created_at", "updated_at", "image_url", "audio_url"]
-            category["stories"] = search_non_vector_collection(COLLECTION_STORIES, filters=filters, properties=story_properties)
+            category["stories"] = stories.get(category["uuid"], [])
     return categories
 
 def update_category(category_id: str, updated_data: dict) -> None:
@@ -1,11 +1,11 @@
 from datetime import datetime, UTC
 from warnings import filters
 from data_classes.common_classes import CreateFeedRequest, FeedType
-from libs.weaviate_lib import COLLECTION_FEEDS, delete_collection_object, search_non_vector_collection, update_collection_object, insert_to_collection, delete_collection_objects_many
-from weaviate.classes.query import Filter, Sort
+from libs.weaviate_lib import COLLECTION_AGENTS, COLLECTION_FEEDS, COLLECTION_USERS, BatchLoader, delete_collection_object, search_non_vector_collection, search_collection_page, update_collection_object, insert_to_collection, delete_collection_objects_many
+from weaviate.classes.query import Filter
 
-from services.handle_agent import get_agent_by_id
-from services.handle_user import get_user_by_id
+from libs.reaction_aggregator import create_reaction_aggregator
+from services.handle_user import USER_INFO_PROPERTIES
 
 class FeedError(Exception):
     def __init__(self, message: str, status_code: int = 400):
@@ -33,8 +33,8 @@ def create_feed_entry(feed_data: CreateFeedRequest) -> None:
     return feed_id
 
 # List Operations
-def get_new_feeds(limit: int, offset: int, filters: dict) -> list[dict]:
-    """Get new feeds"""
+def get_new_feeds(limit: int, offset: int, filters: dict, cursor: str | None = None, loader: BatchLoader | None = None) -> tuple[list[dict], str | None]:
+    """Get new feeds with their user and agent info, and the cursor for the next page"""
     weaviate_filters = []
     for key, value in filters.items():
         weaviate_filters.append(Filter(key).eq(value))
@@ -46,26 +46,21 @@ def get_new_feeds(limit: int, offset: int, filters: dict) -> list[dict]:
     else:
         combined_filter = None
 
-    sort = Sort.by_property("created_at", False)
-    feeds = search_non_vector_collection(COLLECTION_FEEDS, filters=combined_filter, limit=limit, offset=offset, sort=sort, properties=["user_id", "content", "user_question", "agent_id", "agent_content", "like_ids", "retweet_ids", "type", "created_at", "updated_at"])
+    feeds, next_cursor = search_collection_page(COLLECTION_FEEDS, filters=combined_filter, limit=limit, offset=offset, cursor=cursor, properties=["user_id", "content", "user_question", "agent_id", "agent_content", "like_ids", "retweet_ids", "type", "created_at", "updated_at"])
+    feed_likes.overlay(feeds)
 
-    # Get user info for each feed
-    for feed in feeds:
-        user_info = get_user_by_id(feed["user_id"])
-        feed["user_info"] = user_info
-
-    # Get agent info for each feed if agent_id is present
-    for feed in feeds:
-        agent_info = get_agent_by_id(feed["agent_id"])
-        feed["agent_info"] = agent_info
-    return feeds
+    # Join user and agent info with one query per collection for the whole page
+    loader = loader or BatchLoader()
+    loader.join(feeds, "user_id", "user_info", COLLECTION_USERS, properties=USER_INFO_PROPERTIES)
+    loader.join(feeds, "agent_id", "agent_info", COLLECTION_AGENTS, default={"error": "Agent not found"})
+    return feeds, next_cursor
 
 # Read Operations
-def get_feeds_by_user_id(user_id: str, limit: int, offset: int) -> list[dict]:
-    """Get feeds by user ID"""
-    filters = Filter("user_id").eq(user_id)
-    feeds = search_non_vector_collection(COLLECTION_FEEDS, filters=filters, limit=limit, offset=offset, sort_by="created_at", sort_order="desc")
-    return feeds
+def get_feeds_by_user_id(user_id: str, limit: int, offset: int, cursor: str | None = None) -> tuple[list[dict], str | None]:
+    """Get feeds by user ID, newest first, and the cursor for the next page"""
+    filters = Filter.by_property("user_id").equal(user_id)
+    feeds, next_cursor = search_collection_page(COLLECTION_FEEDS, filters=filters, limit=limit, offset=offset, cursor=cursor, properties=["user_id", "content", "user_question", "agent_id", "agent_content", "like_ids", "retweet_ids", "type", "created_at", "updated_at"])
+    return feed_likes.overlay(feeds), next_cursor
 
 # Update Operations
 def update_feed_entry(feed_id: str, updated_data: dict) -> None:
@@ -87,22 +82,22 @@ def delete_feeds_by_user_id(user_id: str) -> None:
     return 'Feeds deleted successfully'
 
 # Social Interactions
-def like_feed_entry(feed_id: str, user_id: str) -> None:
-    """Toggle like or dislike a feed entry"""
+def load_feed_like_ids(feed_id: str) -> list[str]:
     filters = Filter.by_id().equal(feed_id)
     feeds = search_non_vector_collection(COLLECTION_FEEDS, filters=filters, limit=1, properties=["like_ids"])
     if not feeds:
         raise FeedError(f"Feed with ID {feed_id} not found", 404)
-    
-    feed = feeds[0]
-    like_ids: list[str] = feed.get("like_ids", [])
-    if user_id in like_ids:
-        like_ids.remove(user_id)
-    else:
-        like_ids.append(user_id)
+    return feeds[0].get("like_ids") or []
+
+def store_feed_like_ids(feed_id: str, like_ids: list[str]) -> None:
+    update_feed_entry(feed_id, {"like_ids": like_ids, "like_count": len(like_ids)})
+
+# Likes are buffered and written in batches; see libs/reaction_aggregator.py
+feed_likes = create_reaction_aggregator("feeds", load_feed_like_ids, store_feed_like_ids)
 
-    update_data = {"like_ids": like_ids}
-    update_feed_entry(feed_id, update_data)
+def like_feed_entry(feed_id: str, user_id: str) -> None:
+    """Toggle like or dislike a feed entry"""
+    feed_likes.toggle(feed_id, user_id)
     return 'Feed liked successfully'
     
 
@@ -143,4 +138,4 @@ def get_feed_by_id(feed_id: str) -> dict:
     if not feeds:
         raise FeedError(f"Feed with ID {feed_id} not found", 404)
     
-    return feeds[0]
\ No newline at end of file
+    return feed_likes.overlay(feeds)[0]
\ No newline at end of file
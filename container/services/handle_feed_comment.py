@@ -1,8 +1,10 @@
 from datetime import datetime, UTC
 from warnings import filters
-from libs.weaviate_lib import COLLECTION_FEED_COMMENTS, search_non_vector_collection, update_collection_object, insert_to_collection, delete_collection_objects_many, delete_collection_object
+from libs.weaviate_lib import COLLECTION_FEED_COMMENTS, COLLECTION_USERS, BatchLoader, search_non_vector_collection, update_collection_object, insert_to_collection, delete_collection_objects_many, delete_collection_object
 from weaviate.classes.query import Filter, Sort
 from data_classes.common_classes import CreateCommentFeedRequest
+from libs.reaction_aggregator import create_reaction_aggregator
+from services.handle_user import USER_INFO_PROPERTIES
 
 class FeedCommentError(Exception):
     def __init__(self, message: str, status_code: int = 400):
@@ -26,11 +28,13 @@ def create_feed_comment(comment_data: CreateCommentFeedRequest) -> None:
     return comment_id
 
 # List Comments for a Feed
-def get_comments_by_feed_id(feed_id: str, limit: int, offset: int) -> list[dict]:
-    """Get comments by feed ID"""
+def get_comments_by_feed_id(feed_id: str, limit: int, offset: int, loader: BatchLoader | None = None) -> list[dict]:
+    """Get comments by feed ID, with the commenter's user info"""
     filters = Filter.by_property("feed_id").equal(feed_id)
     sort = Sort.by_creation_time(ascending=True)
     comments = search_non_vector_collection(COLLECTION_FEED_COMMENTS, filters=filters, limit=limit, offset=offset, sort=sort, properties=["user_id", "feed_id", "content", "like_ids", "created_at", "updated_at"])
+    comment_likes.overlay(comments)
+    (loader or BatchLoader()).join(comments, "user_id", "user_info", COLLECTION_USERS, properties=USER_INFO_PROPERTIES)
     return comments
 
 # Update Comment
@@ -54,24 +58,20 @@ def delete_comments_by_feed_id(feed_id: str) -> None:
     return f'Deleted comments associated with feed ID {feed_id}'
 
 # Like in comments
-def like_feed_comment(comment_id: str, user_id: str) -> None:
-    """Toggle Like a comment"""
+def load_comment_like_ids(comment_id: str) -> list[str]:
     filters = Filter.by_id().equal(comment_id)
-    comments = search_non_vector_collection(COLLECTION_FEED_COMMENTS, filters=filters, properties=["like_ids"])
-    
+    comments = search_non_vector_collection(COLLECTION_FEED_COMMENTS, filters=filters, limit=1, properties=["like_ids"])
     if not comments:
         raise FeedCommentError("Comment not found", 404)
-    
-    comment = comments[0]
-    like_ids: list[str] = comment.get("like_ids", [])
-    
-    if user_id in like_ids:
-        # User has already liked the comment, so we remove the like
-        like_ids.remove(user_id)
-    else:
-        # User is liking the comment for the first time
-        like_ids.append(user_id)
+    return comments[0].get("like_ids") or []
+
+def store_comment_like_ids(comment_id: str, like_ids: list[str]) -> None:
+    update_collection_object(COLLECTION_FEED_COMMENTS, comment_id, {"like_ids": like_ids, "like_count": len(like_ids), "updated_at": datetime.now(UTC).strftime("%Y-%m-%dT%H:%M:%SZ")})
 
-    update_collection_object(COLLECTION_FEED_COMMENTS, comment_id, {"like_ids": like_ids, "updated_at": datetime.now(UTC).strftime("%Y-%m-%dT%H:%M:%SZ")})
+# Likes are buffered and written in batches; see libs/reaction_aggregator.py
+comment_likes = create_reaction_aggregator("feed-comments", load_comment_like_ids, store_comment_like_ids)
 
+def like_feed_comment(comment_id: str, user_id: str) -> None:
+    """Toggle Like a comment"""
+    comment_likes.toggle(comment_id, user_id)
     return 'Comment liked successfully'
\ No newline at end of file
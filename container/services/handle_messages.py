@@ -1,18 +1,18 @@
 from data_classes.common_classes import Message
 from typing import List, Optional
-from libs.weaviate_lib import search_vector_collection, search_non_vector_collection, update_collection_object, delete_collection_object, get_object_by_id, COLLECTION_MESSAGES, insert_to_collection_in_batch, COLLECTION_DOCUMENTS
-from typing import Dict, Any
+from libs.weaviate_lib import search_vector_collection, search_non_vector_collection, search_collection_page, update_collection_object, delete_collection_object, get_object_by_id, fetch_objects_by_ids, COLLECTION_MESSAGES, insert_to_collection_in_batch, COLLECTION_DOCUMENTS, close_client
+from typing import Dict, Any, Generator
 from weaviate.collections.classes.filters import Filter
 from weaviate.collections.classes.grpc import Sort
 from datetime import datetime
+import argparse
+import json
 import logging
+import threading
 from data_classes.common_classes import ApprovalStatus
 from libs.weaviate_lib import insert_to_collection
-from libs.jsonl_converter import convert_json_to_jsonl, save_jsonl_to_file, convert_messages_to_fine_tune_format, validate_fine_tune_data
-from google.cloud import aiplatform
-from google.cloud.aiplatform_v1.types import training_pipeline
-from google.cloud.aiplatform_v1.services.pipeline_service import PipelineServiceClient
-from google.cloud.aiplatform_v1.types import pipeline_service
+from libs.jsonl_converter import convert_json_to_jsonl, save_jsonl_to_file, convert_messages_to_fine_tune_format, validate_fine_tune_data, JsonlShardWriter, write_fine_tune_dataset, FINE_TUNE_SHARD_RECORDS
+import os
 import uuid
 from libs.google_vertex import upload_to_gcs, create_fine_tuning_job
 
@@ -24,6 +24,59 @@ class MessageError(Exception):
         self.status_code = status_code
         super().__init__(self.message)
 
+# Reactions are stored as TEXT_ARRAY liked_by/disliked_by with like_count and
+# dislike_count. Rows written before that only have the comma-joined
+# like_user_ids/dislike_user_ids strings until backfill_message_reactions
+# converts them; like_count is set exactly on converted rows.
+REACTION_PROPERTIES = ["liked_by", "disliked_by", "like_count", "dislike_count", "like_user_ids", "dislike_user_ids"]
+BACKFILL_BATCH_SIZE = 500
+# Writes of one reaction before giving up on it being overwritten
+REACTION_WRITE_ATTEMPTS = 3
+FINE_TUNE_EXPORT_BATCH_SIZE = int(os.getenv("FINE_TUNE_EXPORT_BATCH_SIZE", 500))
+FINE_TUNE_BUCKET = os.getenv("FINE_TUNE_BUCKET", "buddha-ai-bucket")
+# Newest approved pairs a fine-tuning job started over HTTP trains on, so the
+# export fits in the request; run `python -m services.handle_messages
+# --fine-tune` to train on all of them
+FINE_TUNE_MAX_PAIRS = int(os.getenv("FINE_TUNE_MAX_PAIRS", 1000))
+# Serializes read-modify-write of one message's reactions in this process
+reaction_locks = [threading.Lock() for _ in range(64)]
+
+def split_user_ids(value) -> List[str]:
+    """Parse a legacy comma-joined user ID string"""
+    if isinstance(value, list):
+        return [uid for uid in value if uid and uid.strip()]
+    return [uid for uid in (value or "").split(",") if uid.strip()]
+
+def reaction_properties(like_list: List[str], dislike_list: List[str]) -> Dict[str, Any]:
+    """Properties to write for a reaction state"""
+    return {
+        "liked_by": like_list,
+        "disliked_by": dislike_list,
+        "like_count": len(like_list),
+        "dislike_count": len(dislike_list),
+    }
+
+def normalize_reactions(message: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Expose a message's reactions as like_user_ids/dislike_user_ids lists with
+    like_count/dislike_count, whichever format the row is stored in.
+    """
+    if not message:
+        return message
+    if message.get("like_count") is not None:
+        like_list = list(message.get("liked_by") or [])
+        dislike_list = list(message.get("disliked_by") or [])
+    else:
+        like_list = split_user_ids(message.get("like_user_ids"))
+        dislike_list = split_user_ids(message.get("dislike_user_ids"))
+    message.pop("liked_by", None)
+    message.pop("disliked_by", None)
+    message["like_user_ids"] = like_list
+    message["dislike_user_ids"] = dislike_list
+    message["like_count"] = len(like_list)
+    message["dislike_count"] = len(dislike_list)
+    return message
+
 def handle_chat(session_id: str) -> Dict[str, Any]:
     # Get messages from the database
     messages = get_messages(session_id, 30)
@@ -49,15 +102,11 @@ def get_messages(session_id: str, limit: int = 10) -> List[Message]:
         collection_name="Messages",
         filters=filters,
         limit=limit,
-        properties=["content", "role", "created_at", "thought", "like_user_ids", "dislike_user_ids", "feedback", "agent_id"],
+        properties=["content", "role", "created_at", "thought", *REACTION_PROPERTIES, "feedback", "agent_id"],
         sort=Sort.by_property("created_at", ascending=True).by_property("role", ascending=False)
     )
-    # turn joined likes into array dict
     for message in messages:
-        if message.get("like_user_ids"):
-            message["like_user_ids"] = message["like_user_ids"].split(",")
-        if message.get("dislike_user_ids"):
-            message["dislike_user_ids"] = message["dislike_user_ids"].split(",")
+        normalize_reactions(message)
         
     return messages
 
@@ -69,7 +118,8 @@ def get_messages_list(
     agent_id: Optional[str] = None,
     search: Optional[str] = None,
     include_related: bool = True,
-    approval_status: Optional[str] = None
+    approval_status: Optional[str] = None,
+    cursor: Optional[str] = None
 ) -> Dict[str, Any]:
     """
     Get a list of messages with pagination and filtering.
@@ -83,6 +133,7 @@ def get_messages_list(
         search: Search in message content
         include_related: Whether to include related messages (default: False for performance)
         approval_status: Filter by approval status (APPROVED, PENDING, REJECTED)
+        cursor: Cursor from the previous page; takes precedence over offset (not used with search)
     Returns:
         Dictionary containing messages and pagination info
     """
@@ -125,6 +176,7 @@ def get_messages_list(
                 filters = approval_status_filter
                 
         # Get messages
+        next_cursor = None
         if search:
             # Use vector search for content search
             messages = search_vector_collection(
@@ -133,17 +185,17 @@ def get_messages_list(
                 limit=limit,
                 filters=filters,
                 offset=offset,
-                properties=["content", "role", "created_at", "session_id", "agent_id", "feedback", "response_answer_id", "approval_status", "edited_content", "thought", "like_user_ids", "dislike_user_ids"]
+                properties=["content", "role", "created_at", "session_id", "agent_id", "feedback", "response_answer_id", "approval_status", "edited_content", "thought", *REACTION_PROPERTIES]
             )
         else:
-            # Use non-vector search for regular queries
-            messages = search_non_vector_collection(
+            # Use non-vector search for regular queries, paged with a created_at keyset
+            messages, next_cursor = search_collection_page(
                 collection_name=COLLECTION_MESSAGES,
                 limit=limit,
                 filters=filters,
                 offset=offset,
-                properties=["content", "role", "created_at", "session_id", "agent_id", "feedback", "response_answer_id", "approval_status", "edited_content", "thought", "like_user_ids", "dislike_user_ids"],
-                sort=Sort.by_property("created_at", ascending=False)
+                cursor=cursor,
+                properties=["content", "role", "created_at", "session_id", "agent_id", "feedback", "response_answer_id", "approval_status", "edited_content", "thought", *REACTION_PROPERTIES]
             )
         
         # Attach related messages only if requested
@@ -152,18 +204,16 @@ def get_messages_list(
         else:
             messages_with_related = messages
 
-        # turn joined likes into array dict
         for message in messages_with_related:
-            if message['related_message'] and message['related_message'].get("like_user_ids"):
-                message["related_message"]["like_user_ids"] = message["related_message"]["like_user_ids"].split(",")
-            if message['related_message'] and message['related_message'].get("dislike_user_ids"):
-                message["related_message"]["dislike_user_ids"] = message["related_message"]["dislike_user_ids"].split(",")
+            normalize_reactions(message)
+            normalize_reactions(message.get("related_message"))
         
         return {
             "messages": messages_with_related,
             "limit": limit,
             "offset": offset,
-            "count": len(messages)
+            "count": len(messages),
+            "next_cursor": next_cursor
         }
         
     except Exception as e:
@@ -190,7 +240,7 @@ def attach_related_messages(messages):
                 collection_name=COLLECTION_MESSAGES,
                 filters=filters,
                 limit=len(response_ids) + 3,
-                properties=["content", "role", "created_at", "session_id", "agent_id", "feedback", "response_answer_id", "approval_status", "edited_content", "thought", "like_user_ids", "dislike_user_ids"]
+                properties=["content", "role", "created_at", "session_id", "agent_id", "feedback", "response_answer_id", "approval_status", "edited_content", "thought", *REACTION_PROPERTIES]
             )
             for msg in related_results:
                 related_messages[msg["uuid"]] = msg
@@ -222,7 +272,7 @@ def get_message_by_id(message_id: str) -> Dict[str, Any]:
         if not message:
             return {"error": "Message not found"}
         
-        return {"message": message}
+        return {"message": normalize_reactions(dict(message))}
     except (IndexError, Exception) as e:
         if isinstance(e, IndexError):
             return {"error": "Message not found"}
@@ -247,11 +297,19 @@ def update_message(message_id: str, **kwargs) -> Dict[str, Any]:
         
         # Update fields
         update_data = {}
-        allowed_fields = ["content", "role", "mode", "feedback", "approval_status", "edited_content", "thought", "response_answer_id", "like_user_ids", "dislike_user_ids"]
+        allowed_fields = ["content", "role", "mode", "feedback", "approval_status", "edited_content", "thought", "response_answer_id", *REACTION_PROPERTIES]
         
         for key, value in kwargs.items():
             if key in allowed_fields:
                 update_data[key] = value
+
+        # Reactions are written in the array format
+        if "like_user_ids" in update_data or "dislike_user_ids" in update_data:
+            current = current_message["message"]
+            update_data.update(reaction_properties(
+                split_user_ids(update_data.pop("like_user_ids", current["like_user_ids"])),
+                split_user_ids(update_data.pop("dislike_user_ids", current["dislike_user_ids"])),
+            ))
         
         if not update_data:
             return {"error": "No valid fields to update"}
@@ -418,67 +476,201 @@ def fine_tune_messages(messages: List[Dict[str, Any]], base_model: str = "gemini
         return {"error": f"Failed to fine tune messages: {str(e)}"}
 
 
+def iter_approved_q_and_a_pages(
+    batch_size: int = FINE_TUNE_EXPORT_BATCH_SIZE,
+    limit: Optional[int] = None
+) -> Generator[List[Dict[str, Any]], None, None]:
+    """
+    Yield approved questions a page at a time, newest first, each with its
+    answer attached as related_message; at most limit questions if set.
+
+    Pages follow a created_at keyset cursor, and the answers of a page are
+    fetched together, so every page costs the same two queries however deep
+    the export is. Only the current page is held in memory.
+    """
+    filters = Filter.by_property("approval_status").equal(ApprovalStatus.APPROVED.value) & Filter.by_property("response_answer_id").is_none(False)
+    cursor = None
+    remaining = limit
+    while True:
+        messages, cursor = search_collection_page(
+            collection_name=COLLECTION_MESSAGES,
+            limit=batch_size if remaining is None else min(batch_size, remaining),
+            filters=filters,
+            cursor=cursor,
+            properties=["content", "role", "response_answer_id"]
+        )
+        answers = fetch_objects_by_ids(
+            COLLECTION_MESSAGES,
+            (message["response_answer_id"] for message in messages),
+            properties=["content", "role"]
+        )
+        for message in messages:
+            message["related_message"] = answers.get(str(message["response_answer_id"]))
+        yield messages
+        if remaining is not None:
+            remaining -= len(messages)
+        if not cursor or remaining == 0:
+            return
+
+def export_fine_tune_dataset(
+    directory: Optional[str] = None,
+    shard_records: int = FINE_TUNE_SHARD_RECORDS,
+    compress: bool = False,
+    batch_size: int = FINE_TUNE_EXPORT_BATCH_SIZE,
+    limit: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Write every approved Q&A pair to JSONL shards as it is read from Messages.
+
+    Examples are converted and validated page by page; invalid ones are
+    skipped and counted. Memory stays flat whatever the number of pairs.
+
+    Args:
+        directory: Directory of the shards (default: ./temp)
+        shard_records: Examples per shard; 0 writes a single file
+        compress: Write gzip-compressed shards
+        batch_size: Messages read per query
+        limit: Newest approved questions to export (default: all)
+
+    Returns:
+        Dictionary with the shard paths and counts of messages, pairs and invalid examples
+    """
+    with JsonlShardWriter(directory=directory, shard_records=shard_records, compress=compress) as writer:
+        stats = write_fine_tune_dataset(iter_approved_q_and_a_pages(batch_size, limit), writer)
+    logger.info(f"Fine-tuning export: {stats} in {len(writer.paths)} shards")
+    return {"paths": writer.paths, **stats}
+
+def upload_fine_tune_dataset(
+    shard_records: int = FINE_TUNE_SHARD_RECORDS,
+    compress: bool = True,
+    bucket_name: str = FINE_TUNE_BUCKET,
+    limit: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Export the approved Q&A pairs, the newest limit ones if set, and upload
+    the shards to GCS. Local shards are removed once uploaded.
+
+    Returns:
+        Dictionary with the uploaded shard URIs and the export counts
+    """
+    export = export_fine_tune_dataset(shard_records=shard_records, compress=compress, limit=limit)
+    uris = []
+    for path in export.pop("paths"):
+        uris.append(upload_to_gcs(path, bucket_name))
+        os.remove(path)
+    logger.info(f"Fine-tuning dataset uploaded to {', '.join(uris) or 'nowhere (no pairs)'}")
+    return {"uris": uris, **export}
+
+def fine_tune_approved_messages(
+    base_model: str = "gemini-2.5-flash",
+    limit: Optional[int] = FINE_TUNE_MAX_PAIRS
+) -> Dict[str, Any]:
+    """
+    Fine tune on the newest limit approved Q&A pairs, or all of them if limit
+    is None, streamed from Messages to a JSONL file instead of being loaded
+    into memory first.
+
+    Vertex AI takes one uncompressed JSONL file per tuning job, so the
+    dataset is written as a single shard.
+
+    Returns:
+        Dictionary containing fine-tuning job information
+    """
+    try:
+        export = upload_fine_tune_dataset(shard_records=0, compress=False, limit=limit)
+        if not export["pairs"]:
+            return {"error": "No valid conversation pairs found for fine-tuning"}
+        
+        training_data_path = export["uris"][0]
+        job_info = create_fine_tuning_job(
+            training_data_path=training_data_path,
+            base_model=base_model,
+            model_display_name=f"fine_tuned_model_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+            hyperparameters={
+                "epoch_count": 3,
+                "batch_size": 4,
+                "learning_rate": 0.0001
+            }
+        )
+        
+        return {
+            "message": "Fine-tuning job created successfully",
+            "job_info": job_info,
+            "training_pairs_count": export["pairs"],
+            "invalid_pairs_count": export["invalid"],
+            "training_data_path": training_data_path
+        }
+        
+    except Exception as e:
+        logger.error(f"Error fine tuning approved messages: {str(e)}")
+        return {"error": f"Failed to fine tune messages: {str(e)}"}
+
+
+def read_reactions(message_id: str) -> Optional[Dict[str, Any]]:
+    """A message's stored reactions, normalized, or None if it does not exist"""
+    messages = search_non_vector_collection(
+        collection_name=COLLECTION_MESSAGES,
+        filters=Filter.by_id().equal(message_id),
+        limit=1,
+        properties=REACTION_PROPERTIES
+    )
+    return normalize_reactions(messages[0]) if messages else None
+
+def toggle_reaction(message_id: str, user_id: str, reaction: str) -> Dict[str, Any]:
+    """
+    Toggle a user's like or dislike on a message with a single write.
+
+    Adding a reaction removes the opposite one. Reads and writes of one
+    message's reactions are serialized in this process. Weaviate has no
+    conditional write, so another worker (or the reaction backfill) can
+    overwrite the write: the message is read back, and the user's reaction is
+    applied again on top of the stored state if it did not stick.
+
+    Args:
+        message_id: The UUID of the message
+        user_id: The UUID of the user reacting
+        reaction: "like" or "dislike"
+
+    Returns:
+        Reaction state: like_user_ids, dislike_user_ids, like_count, dislike_count
+    """
+    toggled_key, opposite_key = ("like_user_ids", "dislike_user_ids") if reaction == "like" else ("dislike_user_ids", "like_user_ids")
+    with reaction_locks[hash(message_id) % len(reaction_locks)]:
+        state = read_reactions(message_id)
+        if not state:
+            raise MessageError("Message not found", 404)
+        reacted = user_id not in state[toggled_key]
+        for _ in range(REACTION_WRITE_ATTEMPTS):
+            toggled = [uid for uid in state[toggled_key] if uid != user_id] + ([user_id] if reacted else [])
+            opposite = [uid for uid in state[opposite_key] if not (reacted and uid == user_id)]
+            like_list, dislike_list = (toggled, opposite) if reaction == "like" else (opposite, toggled)
+            update_collection_object(COLLECTION_MESSAGES, message_id, reaction_properties(like_list, dislike_list))
+            state = read_reactions(message_id)
+            if not state:
+                raise MessageError("Message not found", 404)
+            if (user_id in state[toggled_key]) == reacted and not (reacted and user_id in state[opposite_key]):
+                break
+            logger.warning(f"Reaction of {user_id} on message {message_id} was overwritten, applying it again")
+    return state
+
 def like_message(message_id: str, user_id: str) -> Dict[str, Any]:
     """
-    Like a message by adding user_id to like_user_ids and removing from dislike_user_ids.
+    Toggle a like: add user_id to the likes (removing a dislike), or remove it if already liked.
     
     Args:
         message_id: The UUID of the message
         user_id: The UUID of the user liking the message
     
     Returns:
-        Success/error message with updated message data
+        Success/error message with the updated reaction state
     """
     try:
-        # Get current message to verify it exists
-        current_message = get_message_by_id(message_id)
-        if "error" in current_message:
-            return current_message
-        
-        message_data = current_message.get("message", {})
-        
-        # Get current like and dislike lists
-        like_user_ids = message_data.get("like_user_ids", "")
-        dislike_user_ids = message_data.get("dislike_user_ids", "")
-        
-        # Convert comma-separated strings to lists
-        like_list = like_user_ids.split(",") if like_user_ids else []
-        dislike_list = dislike_user_ids.split(",") if dislike_user_ids else []
-        
-        # Remove empty strings
-        like_list = [uid for uid in like_list if uid.strip()]
-        dislike_list = [uid for uid in dislike_list if uid.strip()]
-        
-        # Check if user already liked
-        if user_id in like_list:
-            # remove user from like_list
-            like_list.remove(user_id)
-        
-        # Add user to likes and remove from dislikes
-        if user_id not in like_list:
-            like_list.append(user_id)
-            if user_id in dislike_list:
-                dislike_list.remove(user_id)
-        
-        
-        # Convert back to comma-separated strings
-        update_data = {
-            "like_user_ids": ",".join(like_list),
-            "dislike_user_ids": ",".join(dislike_list)
+        return {
+            "message": "Message liked successfully",
+            "data": toggle_reaction(message_id, user_id, "like")
         }
-        
-        # Update in Weaviate
-        success = update_collection_object(COLLECTION_MESSAGES, message_id, update_data)
-        
-        if success:
-            # Get updated message
-            updated_message = get_message_by_id(message_id)
-            return {
-                "message": "Message liked successfully",
-                "data": updated_message.get("message")
-            }
-        else:
-            return {"error": "Failed to like message"}
+    except MessageError as e:
+        return {"error": e.message}
     except Exception as e:
         logger.error(f"Error liking message: {str(e)}")
         return {"error": f"Failed to like message: {str(e)}"}
@@ -486,69 +678,99 @@ def like_message(message_id: str, user_id: str) -> Dict[str, Any]:
 
 def dislike_message(message_id: str, user_id: str) -> Dict[str, Any]:
     """
-    Dislike a message by adding user_id to dislike_user_ids and removing from like_user_ids.
+    Toggle a dislike: add user_id to the dislikes (removing a like), or remove it if already disliked.
     
     Args:
         message_id: The UUID of the message
         user_id: The UUID of the user disliking the message
     
     Returns:
-        Success/error message with updated message data
+        Success/error message with the updated reaction state
     """
     try:
-        # Get current message to verify it exists
-        current_message = get_message_by_id(message_id)
-        if "error" in current_message:
-            return current_message
-        
-        message_data = current_message.get("message", {})
-        
-        # Get current like and dislike lists
-        like_user_ids = message_data.get("like_user_ids", "")
-        dislike_user_ids = message_data.get("dislike_user_ids", "")
-        
-        # Convert comma-separated strings to lists
-        like_list = like_user_ids.split(",") if like_user_ids else []
-        dislike_list = dislike_user_ids.split(",") if dislike_user_ids else []
-        
-        # Remove empty strings
-        like_list = [uid for uid in like_list if uid.strip()]
-        dislike_list = [uid for uid in dislike_list if uid.strip()]
-        
-        # Check if user already disliked
-        if user_id in dislike_list:
-            # remove user from dislike_list
-            dislike_list.remove(user_id)
-        
-        # Add user to dislikes and remove from likes
-        if user_id not in dislike_list:
-            dislike_list.append(user_id)
-            if user_id in like_list:
-                like_list.remove(user_id)
-        
-        # Convert back to comma-separated strings
-        update_data = {
-            "like_user_ids": ",".join(like_list),
-            "dislike_user_ids": ",".join(dislike_list)
+        return {
+            "message": "Message disliked successfully",
+            "data": toggle_reaction(message_id, user_id, "dislike")
         }
-        
-        # Update in Weaviate
-        success = update_collection_object(COLLECTION_MESSAGES, message_id, update_data)
-        
-        if success:
-            # Get updated message
-            updated_message = get_message_by_id(message_id)
-            if updated_message["message"].get("like_user_ids"):
-                updated_message["message"]["like_user_ids"] = updated_message["message"]["like_user_ids"].split(",")
-            if updated_message["message"].get("dislike_user_ids"):
-                updated_message["message"]["dislike_user_ids"] = updated_message["message"]["dislike_user_ids"].split(",")
-        
-            return {
-                "message": "Message disliked successfully",
-                "data": updated_message.get("message")
-            }
-        else:
-            return {"error": "Failed to dislike message"}
+    except MessageError as e:
+        return {"error": e.message}
     except Exception as e:
         logger.error(f"Error disliking message: {str(e)}")
-        return {"error": f"Failed to dislike message: {str(e)}"}
\ No newline at end of file
+        return {"error": f"Failed to dislike message: {str(e)}"}
+
+
+def backfill_message_reactions(batch_size: int = BACKFILL_BATCH_SIZE) -> Dict[str, int]:
+    """
+    Convert the comma-joined reaction strings of every message that has not
+    been converted yet into liked_by/disliked_by arrays with counts.
+
+    Scans Messages in UUID order a batch at a time, so it can be stopped and
+    run again; converted rows are skipped. Each row is read again right
+    before it is converted, under the message's reaction lock, and written
+    with a PATCH of the reaction properties only, so a reaction toggled since
+    the page was read is not overwritten with the legacy state, and nothing
+    else on the message is touched. A toggle on another worker can still land
+    between that read and the write; toggle_reaction reads its write back and
+    applies it again if so.
+
+    Returns:
+        Counts of scanned, converted and failed messages
+    """
+    scanned = 0
+    converted = 0
+    failed = 0
+    cursor = None
+    while True:
+        messages, cursor = search_collection_page(
+            collection_name=COLLECTION_MESSAGES,
+            limit=batch_size,
+            properties=["like_count", "like_user_ids", "dislike_user_ids"],
+            cursor=cursor,
+            sort_property=None
+        )
+        scanned += len(messages)
+        for message in messages:
+            if message.get("like_count") is not None:
+                continue
+            message_id = message["uuid"]
+            with reaction_locks[hash(message_id) % len(reaction_locks)]:
+                try:
+                    current = search_non_vector_collection(
+                        collection_name=COLLECTION_MESSAGES,
+                        filters=Filter.by_id().equal(message_id),
+                        limit=1,
+                        properties=["like_count", "like_user_ids", "dislike_user_ids"]
+                    )
+                    # Deleted, or converted by a toggle since the page was read
+                    if not current or current[0].get("like_count") is not None:
+                        continue
+                    update_collection_object(COLLECTION_MESSAGES, message_id, reaction_properties(
+                        split_user_ids(current[0].get("like_user_ids")),
+                        split_user_ids(current[0].get("dislike_user_ids")),
+                    ))
+                    converted += 1
+                except Exception as e:
+                    logger.error(f"Reaction backfill failed for message {message_id}: {str(e)}")
+                    failed += 1
+        logger.info(f"Reaction backfill: {scanned} messages scanned, {converted} converted, {failed} failed")
+        if not cursor:
+            return {"scanned": scanned, "converted": converted, "failed": failed}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export every approved Q&A pair to JSONL shards in GCS")
+    parser.add_argument("--shard-records", type=int, default=FINE_TUNE_SHARD_RECORDS, help="Examples per shard, 0 for one file")
+    parser.add_argument("--no-compress", action="store_true", help="Write plain JSONL instead of gzip")
+    parser.add_argument("--fine-tune", action="store_true", help="Start a tuning job on every pair instead")
+    parser.add_argument("--base-model", default="gemini-2.5-flash", help="Base model of the tuning job")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    try:
+        if args.fine_tune:
+            result = fine_tune_approved_messages(args.base_model, limit=None)
+        else:
+            result = upload_fine_tune_dataset(shard_records=args.shard_records, compress=not args.no_compress)
+    finally:
+        close_client()
+    print(json.dumps(result, default=str))
+    raise SystemExit(1 if "error" in result else 0)
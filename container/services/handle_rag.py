@@ -1,6 +1,6 @@
 from werkzeug.datastructures import FileStorage 
 from libs.google_vertex import add_file_async, upload_temp_file_async
-from services.handle_agent import get_agent_by_id, update_agent
+from services.handle_agent import async_get_agent_by_id, async_update_agent
 from typing import List, Dict, Any, AsyncGenerator
 import asyncio
 import tempfile
@@ -58,8 +58,10 @@ def upload_files(files: List[FileStorage]) -> Dict[str, Any]:
 
 
 async def handle_upload_file(files: List[FileStorage], agent_id: str) -> AsyncGenerator[Dict[str, Any], None]:
-    agent = get_agent_by_id(agent_id)
-    if not agent:
+    # Weaviate is awaited on the async client; other blocking calls go to a
+    # thread so they don't stall other streams on the shared event loop
+    agent = await async_get_agent_by_id(agent_id)
+    if not agent or "error" in agent:
         print("Agent not found")
         yield {"error": "Agent not found", "status": "error"}
         return
@@ -67,10 +69,10 @@ async def handle_upload_file(files: List[FileStorage], agent_id: str) -> AsyncGe
     if not agent["corpus_id"]:
         print("Creating RAG corpus...")
         yield {"status": "creating_corpus", "message": "Creating RAG corpus..."}
-        rag_corpus = add_corpus(display_name=agent["name"])
+        rag_corpus = await asyncio.to_thread(add_corpus, display_name=agent["name"])
         corpus_id = rag_corpus.name.split("/")[-1]
         agent["corpus_id"] = corpus_id
-        update_agent(agent_id, corpus_id=corpus_id)
+        await async_update_agent(agent_id, corpus_id=corpus_id)
         yield {"status": "corpus_created", "corpus_id": corpus_id, "message": "RAG corpus created successfully"}
     
     successful_count = 0
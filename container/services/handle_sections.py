@@ -6,13 +6,13 @@ from libs.weaviate_lib import (
     COLLECTION_CHATS,
     insert_to_collection,
     search_non_vector_collection,
+    search_collection_page,
     search_vector_collection,
     update_collection_object,
     delete_collection_object,
     get_collection_count
 )
 from weaviate.collections.classes.filters import Filter
-from weaviate.collections.classes.grpc import Sort
 from agents.sumary_agent import generate_summary
 
 def create_section(section: Section) -> Optional[Dict[str, Any]]:
@@ -47,17 +47,17 @@ def create_section(section: Section) -> Optional[Dict[str, Any]]:
     section_uuid = insert_to_collection(COLLECTION_CHATS, properties, section.uuid)
     return get_section_by_id(section_uuid)
 
-def get_sections(email: str, limit: int = 10, offset: int = 0) -> tuple[List[Dict[str, Any]], int]:
-    """Get all sections with pagination and total count"""
+def get_sections(email: str, limit: int = 10, offset: int = 0, cursor: Optional[str] = None) -> tuple[List[Dict[str, Any]], int, Optional[str]]:
+    """Get all sections with pagination, total count and the cursor for the next page"""
     filters = Filter.by_property("author").equal(email)
     
     # Get sections data
-    sections = search_non_vector_collection(
+    sections, next_cursor = search_collection_page(
         collection_name=COLLECTION_CHATS,
         limit=limit,
         offset=offset,
+        cursor=cursor,
         properties=["title", "order", "created_at", "updated_at", "context", "language", "agent_id"],
-        sort=Sort.by_property("created_at", ascending=False),
         filters=filters
     )
     
@@ -67,7 +67,7 @@ def get_sections(email: str, limit: int = 10, offset: int = 0) -> tuple[List[Dic
         filters=filters
     )
     
-    return sections, total_count
+    return sections, total_count, next_cursor
 
 def get_section_by_id(section_id: str) -> Optional[Dict[str, Any]]:
     """Get a section by its ID"""
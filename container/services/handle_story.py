@@ -1,8 +1,9 @@
 from datetime import datetime, UTC
 from warnings import filters
-from libs.weaviate_lib import COLLECTION_CATEGORIES, COLLECTION_FEED_COMMENTS, COLLECTION_STORIES, search_non_vector_collection, update_collection_object, insert_to_collection, delete_collection_object
-from weaviate.classes.query import Filter, Sort
+from libs.weaviate_lib import COLLECTION_CATEGORIES, COLLECTION_FEED_COMMENTS, COLLECTION_STORIES, search_non_vector_collection, search_collection_page, update_collection_object, insert_to_collection, delete_collection_object
+from weaviate.classes.query import Filter
 from data_classes.common_classes import CreateStoryRequest
+from typing import Optional
 
 class StoryError(Exception):
     def __init__(self, message: str, status_code: int = 400):
@@ -34,9 +35,13 @@ def get_all_stories(limit: int, offset: int) -> list[dict]:
     stories = search_non_vector_collection(COLLECTION_STORIES, limit=limit, properties=properties, offset=offset, sort_by="created_at", sort_order="desc")
     return stories
 
-def update_story(story_id: str, updated_data: dict) -> None:
-    """Update a story"""
+def update_story(story_id: str, updated_data: dict, story: Optional[dict] = None) -> None:
+    """Update a story; story is its current state, if already loaded"""
     updated_data["updated_at"] = datetime.now(UTC).strftime("%Y-%m-%dT%H:%M:%SZ")
+    # Audio set by hand is not replaced by render_story_audio. Edit forms send
+    # the current audio_url back, which is not a new one.
+    if "audio_url" in updated_data and (story is None or updated_data["audio_url"] != story.get("audio_url")):
+        updated_data.setdefault("audio_hash", "")
     update_collection_object(COLLECTION_STORIES, story_id, updated_data)
     return 'Story updated successfully'
 
@@ -86,8 +91,8 @@ def get_stories_by_type(story_type: str, limit: int, offset: int) -> list[dict]:
     stories = search_non_vector_collection(COLLECTION_STORIES, filters=filters, limit=limit, offset=offset, sort_by="created_at", sort_order="desc")
     return stories
 
-def get_stories_by_filters(filters: dict, limit: int = 10, offset: int = 0) -> list[dict]:
-    """Get stories by multiple filters with pagination"""
+def get_stories_by_filters(filters: dict, limit: int = 10, offset: int = 0, cursor: str | None = None) -> tuple[list[dict], str | None]:
+    """Get stories by multiple filters with pagination, and the cursor for the next page"""
     weaviate_filters = []
     for key, value in filters.items():
         weaviate_filters.append(Filter(key).eq(value))
@@ -100,5 +105,4 @@ def get_stories_by_filters(filters: dict, limit: int = 10, offset: int = 0) -> l
         combined_filter = None
 
     properties = ["author", "title", "content", "language", "category_id", "status", "created_at", "updated_at", "image_url", "audio_url"]
-    stories = search_non_vector_collection(COLLECTION_STORIES, filters=combined_filter, limit=limit, offset=offset, sort=Sort.by_property("created_at", ascending=False), properties=properties)
-    return stories
\ No newline at end of file
+    return search_collection_page(COLLECTION_STORIES, filters=combined_filter, limit=limit, offset=offset, cursor=cursor, properties=properties)
\ No newline at end of file
@@ -0,0 +1,207 @@
+"""
+Offline narration of the story catalog.
+
+render_story_audio() pages through the stories with a given status and
+synthesizes the ones whose audio is missing or stale, so listeners get a
+file instead of waiting for synthesis on the request path. It is a batch
+job for a scheduler (e.g. a cron job or a Cloud Run job), never run by the
+web workers:
+
+    python -m services.handle_story_audio [--force] [--status published]
+
+A story's audio_hash is the audio cache key of the text it was narrated from
+(title, content, voice, language, rate): a story is rendered again only when
+that key changes. Stories whose audio_url was set by hand have an empty
+audio_hash and are left alone unless force is set.
+
+Artifacts go to the STORY_AUDIO_BUCKET bucket under story-audio/<key>.mp3
+when it is set, else to the audio cache, served by /api/v1/tts/audio/<key>.
+That only works when the job shares TTS_CACHE_DIR with the web workers, and
+the cache evicts its least recently used files, so use a bucket in
+production.
+
+Stories are rendered STORY_AUDIO_CONCURRENCY at a time, each segmented and
+synthesized in parallel on the job's own TTS pool, with retries. Each
+story's audio properties are saved as soon as it is rendered.
+"""
+
+import argparse
+import json
+import logging
+import os
+from concurrent.futures import Executor, ThreadPoolExecutor, as_completed
+from datetime import datetime, UTC
+from typing import Any, Dict, Optional
+
+from google.cloud import texttospeech
+from weaviate.classes.query import Filter
+
+from libs.audio_cache import audio_cache, audio_cache_key
+from libs.google_vertex import upload_bytes_to_gcs
+from libs.retry import retry_call
+from libs.speech_pipeline import TTS_MAX_INFLIGHT, speakable_text, split_sentences, synthesize_in_order
+from libs.weaviate_lib import COLLECTION_STORIES, close_client, search_collection_page, update_collection_object
+from data_classes.common_classes import Language
+from services.handle_tts import SPEECH_VOICES, TTS_AUDIO_MAX_AGE, tts_service
+
+logger = logging.getLogger(__name__)
+
+STORY_AUDIO_STATUS = os.getenv("STORY_AUDIO_STATUS", "published")
+STORY_AUDIO_BUCKET = os.getenv("STORY_AUDIO_BUCKET", "")
+# Stories synthesized at once; each one keeps up to TTS_MAX_INFLIGHT requests
+# in flight, which counts against the project's TTS quota like live traffic
+STORY_AUDIO_CONCURRENCY = int(os.getenv("STORY_AUDIO_CONCURRENCY", 2))
+STORY_AUDIO_RETRIES = int(os.getenv("STORY_AUDIO_RETRIES", 3))
+STORY_AUDIO_PAGE_SIZE = int(os.getenv("STORY_AUDIO_PAGE_SIZE", 50))
+STORY_AUDIO_SPEAKING_RATE = float(os.getenv("STORY_AUDIO_SPEAKING_RATE", 1.0))
+
+
+def story_narration(story: Dict[str, Any]) -> str:
+    """Text read out for a story: its title, then its content without markdown"""
+    lines = f"{story.get('title') or ''}\n{story.get('content') or ''}".splitlines()
+    # Line by line, so paragraphs still end sentences for the segmenter
+    return "\n".join(line for line in (speakable_text(line) for line in lines) if line)
+
+
+def story_voice(story: Dict[str, Any]) -> tuple[str, str]:
+    return SPEECH_VOICES.get(story.get("language"), SPEECH_VOICES[Language.VI.value])
+
+
+def story_audio_key(story: Dict[str, Any]) -> Optional[str]:
+    """Audio cache key of a story's narration, or None if there is nothing to read"""
+    text = story_narration(story)
+    if not text:
+        return None
+    voice_name, language_code = story_voice(story)
+    return audio_cache_key(text, voice_name, language_code, texttospeech.AudioEncoding.MP3, STORY_AUDIO_SPEAKING_RATE)
+
+
+def needs_audio(story: Dict[str, Any], key: Optional[str], force: bool = False) -> bool:
+    if key is None:
+        return False
+    if force or not story.get("audio_url"):
+        return True
+    audio_hash = story.get("audio_hash")
+    # Set by hand
+    if not audio_hash:
+        return False
+    if audio_hash != key:
+        return True
+    # Rendered into the cache, which may have evicted it since
+    return not STORY_AUDIO_BUCKET and story["audio_url"].endswith(f"/{key}") and audio_cache.lookup(key) == (None, None)
+
+
+def render_story(story: Dict[str, Any], tts_executor: Executor) -> str:
+    """Synthesize a story on tts_executor and store the audio; returns its audio_url"""
+    text = story_narration(story)
+    voice_name, language_code = story_voice(story)
+    params = {
+        "voice_name": voice_name,
+        "language_code": language_code,
+        "audio_encoding": texttospeech.AudioEncoding.MP3,
+        "speaking_rate": STORY_AUDIO_SPEAKING_RATE,
+    }
+    key = audio_cache_key(text, voice_name, language_code, params["audio_encoding"], STORY_AUDIO_SPEAKING_RATE)
+    cache_url = f"/api/v1/tts/audio/{key}"
+    if not STORY_AUDIO_BUCKET and audio_cache.lookup(key) != (None, None):
+        return cache_url
+    audio = b"".join(synthesize_in_order(
+        lambda segment: tts_service.synthesize_segment(segment, **params),
+        split_sentences(text),
+        tts_executor,
+    ))
+    if not STORY_AUDIO_BUCKET:
+        audio_cache.put(key, audio)
+        return cache_url
+    return upload_bytes_to_gcs(
+        audio, STORY_AUDIO_BUCKET, f"story-audio/{key}.mp3", "audio/mpeg",
+        cache_control=f"public, max-age={TTS_AUDIO_MAX_AGE}, immutable",
+    )
+
+
+def render_story_audio(
+    force: bool = False,
+    status: str = STORY_AUDIO_STATUS,
+    concurrency: int = STORY_AUDIO_CONCURRENCY,
+) -> Dict[str, int]:
+    """
+    Narrate every story with the given status whose audio is missing or stale.
+
+    Safe to stop and run again: stories rendered by an earlier run are
+    skipped by their audio_hash.
+
+    Args:
+        force: Render every story again, hand-set audio included
+        status: Status of the stories to narrate
+        concurrency: Stories synthesized at once
+
+    Returns:
+        Counts of scanned, rendered, skipped and failed stories
+    """
+    stats = {"scanned": 0, "rendered": 0, "skipped": 0, "failed": 0}
+
+    cursor = None
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="story-audio") as executor, \
+            ThreadPoolExecutor(max_workers=concurrency * TTS_MAX_INFLIGHT, thread_name_prefix="story-tts") as tts_executor:
+        while True:
+            stories, cursor = search_collection_page(
+                COLLECTION_STORIES,
+                limit=STORY_AUDIO_PAGE_SIZE,
+                properties=["title", "content", "language", "audio_url", "audio_hash"],
+                filters=Filter.by_property("status").equal(status),
+                cursor=cursor,
+                ascending=True,
+            )
+            stats["scanned"] += len(stories)
+            futures = {}
+            for story in stories:
+                key = story_audio_key(story)
+                if not needs_audio(story, key, force):
+                    stats["skipped"] += 1
+                    continue
+                future = executor.submit(retry_call, render_story, story, tts_executor, retries=STORY_AUDIO_RETRIES, base_delay=1.0)
+                futures[future] = (story["uuid"], key)
+
+            for future in as_completed(futures):
+                story_id, key = futures[future]
+                try:
+                    audio_url = future.result()
+                except Exception as e:
+                    logger.error(f"Failed to render audio of story {story_id}: {str(e)}")
+                    stats["failed"] += 1
+                    continue
+                # A PATCH of the audio properties only, so an editor's save
+                # since the page was read is kept
+                try:
+                    update_collection_object(COLLECTION_STORIES, story_id, {
+                        "audio_url": audio_url,
+                        "audio_hash": key,
+                        "audio_rendered_at": datetime.now(UTC).strftime("%Y-%m-%dT%H:%M:%SZ"),
+                    })
+                except Exception as e:
+                    logger.error(f"Failed to save audio of story {story_id}: {str(e)}")
+                    stats["failed"] += 1
+                    continue
+                stats["rendered"] += 1
+
+            logger.info(f"Story audio: {stats}")
+            if not cursor:
+                break
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Narrate the stories whose audio is missing or stale")
+    parser.add_argument("--force", action="store_true", help="Render every story again, hand-set audio included")
+    parser.add_argument("--status", default=STORY_AUDIO_STATUS, help="Status of the stories to narrate")
+    parser.add_argument("--concurrency", type=int, default=STORY_AUDIO_CONCURRENCY, help="Stories synthesized at once")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    try:
+        stats = render_story_audio(force=args.force, status=args.status, concurrency=args.concurrency)
+    finally:
+        close_client()
+    print(json.dumps(stats))
+    # Non-zero so the scheduler reports the run and retries it
+    raise SystemExit(1 if stats["failed"] else 0)
@@ -1,31 +1,165 @@
 import os
 import io
 import logging
-from typing import Generator, Optional
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Deque, Generator, Iterable, Optional, Tuple
 from google.cloud import texttospeech
 from google.cloud.texttospeech_v1 import SynthesizeSpeechRequest
-from flask import Response, stream_template
+from flask import Response, request, send_file, stream_template
 from google.oauth2 import service_account
+from data_classes.common_classes import Language
+from libs.audio_cache import audio_cache, audio_cache_key, audio_content_type
+from libs.lazy import lazy
+from libs.speech_pipeline import TTS_MAX_INFLIGHT, TTS_SEGMENT_MAX_CHARS, SentenceSegmenter, speakable_text, split_sentences, synthesize_in_order
 
 import base64
 
 credentials_path = 'adc_cloud.json'
 logger = logging.getLogger(__name__)
-credentials = service_account.Credentials.from_service_account_file(
+
+# Synthesis requests in flight per process, shared by every stream
+TTS_MAX_WORKERS = int(os.getenv("TTS_MAX_WORKERS", 16))
+tts_executor = ThreadPoolExecutor(max_workers=TTS_MAX_WORKERS, thread_name_prefix="tts")
+# Cached audio never changes under its key
+TTS_AUDIO_MAX_AGE = int(os.getenv("TTS_AUDIO_MAX_AGE", 365 * 24 * 3600))
+# Concurrent requests for the same clip synthesize it once
+synthesis_locks = [threading.Lock() for _ in range(64)]
+# Voice and language code per content language, when the caller does not pick a voice
+SPEECH_VOICES = {
+    Language.VI.value: ("vi-VN-Standard-A", "vi-VN"),
+    Language.EN.value: ("en-US-Standard-A", "en-US"),
+}
+# Read on first synthesis, not when the app is imported
+credentials = lazy("tts.credentials", lambda: service_account.Credentials.from_service_account_file(
                 credentials_path
-            )
+            ))
+
+# RIFF and data sizes of a WAV stream whose length is not known yet
+WAV_STREAMING_SIZE = 0xFFFFFFFF
+
+
+def wav_data_offset(audio: bytes) -> Optional[int]:
+    """Offset of the data chunk header of a WAV file, or None if it is not one"""
+    if audio[:4] != b"RIFF" or audio[8:12] != b"WAVE":
+        return None
+    offset = 12
+    while offset + 8 <= len(audio):
+        chunk_id = audio[offset:offset + 4]
+        chunk_size = int.from_bytes(audio[offset + 4:offset + 8], "little")
+        if chunk_id == b"data":
+            return offset
+        offset += 8 + chunk_size + chunk_size % 2
+    return None
+
+
+def strip_wav_header(audio: bytes) -> bytes:
+    """Raw samples of a WAV file, so that it can follow another one in a stream"""
+    offset = wav_data_offset(audio)
+    return audio if offset is None else audio[offset + 8:]
+
+
+def set_wav_sizes(audio: bytes, streaming: bool = False) -> bytes:
+    """
+    A WAV file whose RIFF and data sizes cover all of audio, e.g. segments
+    joined under the first one's header; with streaming, sizes that tell
+    players to read until the stream ends. Other formats are returned as is.
+    """
+    offset = wav_data_offset(audio)
+    if offset is None:
+        return audio
+    riff_size = WAV_STREAMING_SIZE if streaming else len(audio) - 8
+    data_size = WAV_STREAMING_SIZE if streaming else len(audio) - offset - 8
+    return (
+        audio[:4] + riff_size.to_bytes(4, "little") + audio[8:offset + 4]
+        + data_size.to_bytes(4, "little") + audio[offset + 8:]
+    )
+
+
+def join_audio(chunks: Iterable[bytes]) -> bytes:
+    """One file from the chunks of a segmented synthesis"""
+    return set_wav_sizes(b"".join(chunks))
+
 
 class TTSStreamingService:
     def __init__(self):
         """Initialize TTS service with Google Cloud credentials"""
         try:
             # Initialize the TTS client
-            self.client = texttospeech.TextToSpeechClient(credentials=credentials)
+            self.client = texttospeech.TextToSpeechClient(credentials=credentials.instance())
             logger.info("TTS client initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize TTS client: {str(e)}")
             raise
 
+    def synthesize_segment(
+        self,
+        text: str,
+        voice_name: str = "en-US-Standard-A",
+        language_code: str = "en-US",
+        audio_encoding: texttospeech.AudioEncoding = texttospeech.AudioEncoding.MP3,
+        speaking_rate: float = 1.0,
+        pitch: float = 0.0,
+        volume_gain_db: float = 0.0
+    ) -> bytes:
+        """Synthesize one piece of text with a single request"""
+        # Configure the voice
+        voice = texttospeech.VoiceSelectionParams(
+            language_code=language_code,
+            name=voice_name
+        )
+
+        # Configure the audio
+        audio_config = texttospeech.AudioConfig(
+            audio_encoding=audio_encoding,
+            speaking_rate=speaking_rate,
+            pitch=pitch,
+            volume_gain_db=volume_gain_db
+        )
+
+        # Perform the text-to-speech request
+        response = self.client.synthesize_speech(
+            input=texttospeech.SynthesisInput(text=text),
+            voice=voice,
+            audio_config=audio_config
+        )
+        return response.audio_content
+
+    def synthesize_segments(
+        self,
+        segments: Iterable[str],
+        max_inflight: int = TTS_MAX_INFLIGHT,
+        **kwargs
+    ) -> Generator[bytes, None, None]:
+        """
+        Synthesize segments in parallel and yield their audio in order.
+
+        The audio of each segment is yielded as soon as it and every segment
+        before it are ready. MP3 and OGG segments concatenate into a valid
+        stream; for WAV encodings only the first segment keeps its header,
+        with streaming sizes since the total length is not known yet. Use
+        join_audio to store the result as a file.
+
+        Args:
+            segments: Text segments, e.g. from split_sentences; may be a generator
+            max_inflight: Segments synthesized ahead of the one being yielded
+            **kwargs: Other TTS parameters
+
+        Yields:
+            Audio data chunks as bytes
+        """
+        first = True
+        for audio in synthesize_in_order(
+            lambda segment: self.synthesize_segment(segment, **kwargs),
+            segments,
+            tts_executor,
+            max_inflight,
+        ):
+            yield set_wav_sizes(audio, streaming=True) if first else strip_wav_header(audio)
+            first = False
+
     def synthesize_speech_stream(
         self, 
         text: str, 
@@ -34,10 +168,15 @@ class TTSStreamingService:
         audio_encoding: texttospeech.AudioEncoding = texttospeech.AudioEncoding.MP3,
         speaking_rate: float = 1.0,
         pitch: float = 0.0,
-        volume_gain_db: float = 0.0
+        volume_gain_db: float = 0.0,
+        max_chars: int = TTS_SEGMENT_MAX_CHARS
     ) -> Generator[bytes, None, None]:
         """
         Stream synthesized speech audio chunks.
+
+        The text is cut at sentence and clause boundaries and the pieces are
+        synthesized in parallel, so the first audio arrives after one
+        sentence's synthesis rather than the whole text's.
         
         Args:
             text: Text to synthesize
@@ -47,42 +186,21 @@ class TTSStreamingService:
             speaking_rate: Speed of speech (0.25 to 4.0)
             pitch: Pitch adjustment (-20.0 to 20.0)
             volume_gain_db: Volume adjustment (-96.0 to 16.0)
+            max_chars: Longest segment sent in one request
         
         Yields:
             Audio data chunks as bytes
         """
         try:
-            # Configure the voice
-            voice = texttospeech.VoiceSelectionParams(
+            yield from self.synthesize_segments(
+                split_sentences(text, max_chars=max_chars),
+                voice_name=voice_name,
                 language_code=language_code,
-                name=voice_name
-            )
-
-            # Configure the audio
-            audio_config = texttospeech.AudioConfig(
                 audio_encoding=audio_encoding,
                 speaking_rate=speaking_rate,
                 pitch=pitch,
                 volume_gain_db=volume_gain_db
             )
-
-            # Create the synthesis input
-            synthesis_input = texttospeech.SynthesisInput(text=text)
-
-            # Perform the text-to-speech request
-            response = self.client.synthesize_speech(
-                input=synthesis_input,
-                voice=voice,
-                audio_config=audio_config
-            )
-
-            # Stream the audio data
-            audio_content = response.audio_content
-            
-            # For now, we'll yield the entire audio content
-            # In a more advanced implementation, you could chunk it
-            yield audio_content
-
         except Exception as e:
             logger.error(f"Error synthesizing speech: {str(e)}")
             raise
@@ -90,33 +208,22 @@ class TTSStreamingService:
     def synthesize_speech_chunked(
         self, 
         text: str, 
-        chunk_size: int = 1000,  # Characters per chunk
+        chunk_size: int = TTS_SEGMENT_MAX_CHARS,  # Longest segment in characters
         **kwargs
     ) -> Generator[bytes, None, None]:
         """
-        Synthesize speech in chunks for better streaming experience.
+        Synthesize speech in segments of at most chunk_size characters, cut at
+        sentence and clause boundaries.
         
         Args:
             text: Text to synthesize
-            chunk_size: Number of characters per chunk
+            chunk_size: Longest segment in characters
             **kwargs: Other TTS parameters
         
         Yields:
             Audio data chunks as bytes
         """
-        try:
-            # Split text into chunks
-            text_chunks = [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)]
-            
-            for chunk in text_chunks:
-                if chunk.strip():  # Skip empty chunks
-                    # Synthesize each chunk
-                    for audio_chunk in self.synthesize_speech_stream(chunk, **kwargs):
-                        yield audio_chunk
-                        
-        except Exception as e:
-            logger.error(f"Error in chunked speech synthesis: {str(e)}")
-            raise
+        return self.synthesize_speech_stream(text, max_chars=chunk_size, **kwargs)
 
     def get_available_voices(self, language_code: str = "en-US") -> list:
         """
@@ -137,7 +244,160 @@ class TTSStreamingService:
 
 
 # Global TTS service instance
-tts_service = TTSStreamingService()
+tts_service = lazy("tts", TTSStreamingService)
+
+
+def create_cached_audio_response(key: str) -> Optional[Response]:
+    """
+    Serve cached audio, or return None if it is not cached.
+
+    Files on disk are sent with send_file, so the server can use sendfile()
+    instead of copying them through Python. GET requests get Range, ETag and
+    If-None-Match support, so players can seek and repeat listens transfer
+    nothing.
+    """
+    audio, path = audio_cache.lookup(key)
+    if path is not None:
+        with open(path, "rb") as f:
+            content_type = audio_content_type(f.read(4))
+        response = send_file(path, mimetype=content_type, conditional=True, etag=key, max_age=TTS_AUDIO_MAX_AGE)
+    elif audio is not None:
+        response = Response(audio, content_type=audio_content_type(audio))
+        response.set_etag(key)
+        response.cache_control.max_age = TTS_AUDIO_MAX_AGE
+        response.make_conditional(request, accept_ranges=True, complete_length=len(audio))
+    else:
+        return None
+    response.cache_control.immutable = True
+    response.headers["X-Audio-Key"] = key
+    return response
+
+
+def synthesize_to_cache(
+    text: str,
+    voice_name: str = "en-US-Standard-A",
+    language_code: str = "en-US",
+    audio_encoding: texttospeech.AudioEncoding = texttospeech.AudioEncoding.MP3,
+    speaking_rate: float = 1.0,
+    pitch: float = 0.0,
+    volume_gain_db: float = 0.0
+) -> Tuple[str, bytes]:
+    """
+    Audio of a text, synthesized only if it is not cached yet.
+
+    Returns:
+        (cache key, audio data)
+    """
+    key = audio_cache_key(text, voice_name, language_code, audio_encoding, speaking_rate, pitch, volume_gain_db)
+    audio = audio_cache.get(key)
+    if audio is not None:
+        return key, audio
+    with synthesis_locks[hash(key) % len(synthesis_locks)]:
+        audio = audio_cache.get(key)
+        if audio is None:
+            audio = join_audio(tts_service.synthesize_speech_stream(
+                text, voice_name=voice_name, language_code=language_code,
+                audio_encoding=audio_encoding, speaking_rate=speaking_rate,
+                pitch=pitch, volume_gain_db=volume_gain_db
+            ))
+            audio_cache.put(key, audio)
+    return key, audio
+
+
+def synthesize_segment_cached(text: str, **kwargs) -> Tuple[str, bytes]:
+    """
+    synthesize_to_cache for a single segment, with one request and no
+    segmentation, so it can run on tts_executor itself.
+
+    Returns:
+        (cache key, audio data)
+    """
+    params = {
+        "voice_name": "en-US-Standard-A",
+        "language_code": "en-US",
+        "audio_encoding": texttospeech.AudioEncoding.MP3,
+        **kwargs,
+    }
+    key = audio_cache_key(
+        text, params["voice_name"], params["language_code"], params["audio_encoding"],
+        params.get("speaking_rate", 1.0), params.get("pitch", 0.0), params.get("volume_gain_db", 0.0)
+    )
+    audio = audio_cache.get(key)
+    if audio is None:
+        audio = tts_service.synthesize_segment(text, **params)
+        audio_cache.put(key, audio)
+    return key, audio
+
+
+@dataclass
+class SpeechSegment:
+    index: int
+    text: str
+    audio_key: str
+    audio: bytes
+
+
+class SpeechStream:
+    """
+    Speech for text that arrives piece by piece, such as LLM tokens.
+
+    feed() cuts the text into sentences and starts synthesizing each one as
+    soon as it is complete; ready() returns the segments whose audio is done,
+    in order, without waiting; finish() waits for the rest. Synthesis runs on
+    the shared tts_executor, so the stream producing the text never blocks on
+    it.
+    """
+
+    def __init__(self, **kwargs):
+        """
+        Args:
+            **kwargs: TTS parameters (voice_name, language_code, audio_encoding, ...)
+        """
+        self.tts_params = kwargs
+        self.segmenter = SentenceSegmenter()
+        self._pending: Deque[Tuple[int, str, Future]] = deque()
+        self._index = 0
+
+    def _submit(self, segments: Iterable[str]):
+        for segment in segments:
+            text = speakable_text(segment)
+            if not text:
+                continue
+            future = tts_executor.submit(synthesize_segment_cached, text, **self.tts_params)
+            self._pending.append((self._index, text, future))
+            self._index += 1
+
+    def feed(self, text: str):
+        self._submit(self.segmenter.feed(text))
+
+    def _pop(self) -> Optional[SpeechSegment]:
+        index, text, future = self._pending.popleft()
+        try:
+            audio_key, audio = future.result()
+        except Exception as e:
+            # The text still reaches the client; only this sentence goes unspoken
+            logger.error(f"Error synthesizing speech segment {index}: {str(e)}")
+            return None
+        return SpeechSegment(index=index, text=text, audio_key=audio_key, audio=audio)
+
+    def ready(self) -> Generator[SpeechSegment, None, None]:
+        while self._pending and self._pending[0][2].done():
+            segment = self._pop()
+            if segment:
+                yield segment
+
+    def finish(self) -> Generator[SpeechSegment, None, None]:
+        self._submit(self.segmenter.flush())
+        while self._pending:
+            segment = self._pop()
+            if segment:
+                yield segment
+
+    def close(self):
+        """Cancel synthesis not started yet, e.g. when the client went away"""
+        for _, _, future in self._pending:
+            future.cancel()
+        self._pending.clear()
 
 
 def create_audio_stream_response(
@@ -173,21 +433,34 @@ def create_audio_stream_response(
         }
         
         content_type = content_type_map.get(audio_encoding, "audio/mpeg")
+
+        key = audio_cache_key(
+            text, voice_name, language_code, audio_encoding,
+            kwargs.get("speaking_rate", 1.0), kwargs.get("pitch", 0.0), kwargs.get("volume_gain_db", 0.0)
+        )
+        cached = create_cached_audio_response(key)
+        if cached is not None:
+            return cached
         
+        def synthesize_audio():
+            if chunked:
+                return tts_service.synthesize_speech_chunked(
+                    text, voice_name=voice_name, language_code=language_code, 
+                    audio_encoding=audio_encoding, **kwargs
+                )
+            return tts_service.synthesize_speech_stream(
+                text, voice_name=voice_name, language_code=language_code,
+                audio_encoding=audio_encoding, **kwargs
+            )
+
         def generate_audio():
+            chunks = []
             try:
-                if chunked:
-                    for audio_chunk in tts_service.synthesize_speech_chunked(
-                        text, voice_name=voice_name, language_code=language_code, 
-                        audio_encoding=audio_encoding, **kwargs
-                    ):
-                        yield audio_chunk
-                else:
-                    for audio_chunk in tts_service.synthesize_speech_stream(
-                        text, voice_name=voice_name, language_code=language_code,
-                        audio_encoding=audio_encoding, **kwargs
-                    ):
-                        yield audio_chunk
+                for audio_chunk in synthesize_audio():
+                    chunks.append(audio_chunk)
+                    yield audio_chunk
+                # Only complete audio is cached
+                audio_cache.put(key, join_audio(chunks))
             except Exception as e:
                 logger.error(f"Error generating audio stream: {str(e)}")
                 yield b""  # Return empty bytes on error
@@ -198,7 +471,8 @@ def create_audio_stream_response(
             headers={
                 "Cache-Control": "no-cache",
                 "X-Accel-Buffering": "no",  # Disable nginx buffering
-                "Transfer-Encoding": "chunked"
+                "Transfer-Encoding": "chunked",
+                "X-Audio-Key": key
             }
         )
         
@@ -228,13 +502,10 @@ def synthesize_text_to_base64(
         Base64 encoded audio data
     """
     try:
-        audio_content = b""
-        for chunk in tts_service.synthesize_speech_stream(
+        _, audio_content = synthesize_to_cache(
             text, voice_name=voice_name, language_code=language_code,
             audio_encoding=audio_encoding, **kwargs
-        ):
-            audio_content += chunk
-        
+        )
         return base64.b64encode(audio_content).decode('utf-8')
         
     except Exception as e:
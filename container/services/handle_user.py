@@ -1,7 +1,7 @@
 from datetime import datetime, UTC
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from werkzeug.security import generate_password_hash
-from libs.weaviate_lib import get_aggregate, search_non_vector_collection, insert_to_collection, update_collection_object, delete_collection_object
+from libs.weaviate_lib import get_aggregate, search_non_vector_collection, search_collection_page, CursorError, insert_to_collection, update_collection_object, delete_collection_object
 from weaviate.classes.query import Filter
 from weaviate.collections.classes.grpc import Sort
 import uuid
@@ -11,6 +11,9 @@ from concurrent.futures import ThreadPoolExecutor
 from services.handle_permissions import check_user_permissions_by_update_role
 
 
+# Public user fields, as returned by get_user_by_id and joined onto feeds and comments
+USER_INFO_PROPERTIES = ["email", "name", "role", "created_at", "updated_at"]
+
 class UserError(Exception):
     def __init__(self, message: str, status_code: int = 400):
         self.message = message
@@ -52,27 +55,26 @@ def get_user_by_email(email: str) -> Optional[Dict[str, Any]]:
         print(f"Error getting user by email: {str(e)}")
         return None
 
-def get_all_users(limit: int = 100, offset: int = 0, search: str = "") -> List[Dict[str, Any]]:
-    """Get all users with pagination"""
-    sort = Sort.by_property("created_at", ascending=False)
+def get_all_users(limit: int = 100, offset: int = 0, search: str = "", cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Get all users with pagination, and the cursor for the next page"""
     if search:
         filters = Filter.by_property("name").like(search) | Filter.by_property("email").like(search)
     else:
         filters = None
     try:
-        users = search_non_vector_collection(
+        return search_collection_page(
             collection_name="Users",
             limit=limit,
             offset=offset,
+            cursor=cursor,
             properties=["email", "name", "role", "created_at", "updated_at", "last_login_at"],
-            sort=sort,
             filters=filters
         )
-        
-        return users
+    except CursorError:
+        raise
     except Exception as e:
         print(f"Error getting all users: {str(e)}")
-        return []
+        return [], None
 
 def create_user(user_data: Dict[str, Any]) -> str:
     """Create a new user"""
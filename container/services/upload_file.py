@@ -1,69 +1,358 @@
-from libs.pdf_lib import process_pdf, read_pdf_from_buffer, allowed_file
+from libs.pdf_lib import process_pdf, allowed_file
+from libs.pdf_pages import count_pdf_pages, extract_pdf_pages
+from libs.embedding_engine import embedding_engine
 from werkzeug.datastructures import FileStorage
-from typing import List, Tuple, Dict, Any, Optional
-from libs.weaviate_lib import upload_documents, search_non_vector_collection, insert_to_collection, COLLECTION_DOCUMENTS, update_collection_object, delete_collection_object, COLLECTION_FILES, client, delete_collection_objects_many, get_collection_count
+from typing import List, Tuple, Dict, Any, Optional, Generator
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+import hashlib
+import multiprocessing
+import os
+import queue
+import tempfile
+import threading
+from libs.weaviate_lib import upload_documents, search_non_vector_collection, insert_to_collection, COLLECTION_DOCUMENTS, update_collection_object, delete_collection_object, COLLECTION_FILES, delete_collection_objects_many, get_collection_count, EMBEDDING_MODEL, search_collection_page, CursorError, documents_vectorize_content_only
 from weaviate.collections.classes.filters import Filter
 from weaviate.collections.classes.grpc import Sort
 from datetime import datetime
 from data_classes.common_classes import Document, File
 
-def upload_file(files: List[FileStorage], description: str, author: str) -> Tuple[List[dict], int]:
-    if not files:
-        raise Exception("No files uploaded")
+# Ingestion pipeline: page extraction runs on a process pool, chunking happens
+# a window of pages at a time and chunks are uploaded as soon as a batch is full
+INGEST_PROCESSES = int(os.getenv("INGEST_PROCESSES", os.cpu_count() or 1))
+INGEST_FILE_CONCURRENCY = int(os.getenv("INGEST_FILE_CONCURRENCY", 4))
+INGEST_PAGES_PER_TASK = int(os.getenv("INGEST_PAGES_PER_TASK", 8))
+INGEST_CHUNK_WINDOW_PAGES = int(os.getenv("INGEST_CHUNK_WINDOW_PAGES", 16))
+INGEST_UPLOAD_BATCH_SIZE = int(os.getenv("INGEST_UPLOAD_BATCH_SIZE", 200))
+# Page size when listing the chunk hashes of a file, and hashes per delete filter
+INGEST_HASH_PAGE_SIZE = int(os.getenv("INGEST_HASH_PAGE_SIZE", 1000))
 
-    results = []
-    for file in files:
-        if not allowed_file(file.filename):
-            raise Exception(f"File type not allowed for {file.filename}. Only PDF files are accepted.")
-        # Read PDF content from buffer
-        pdf_content = read_pdf_from_buffer(file)
-        
-        # Process the PDF content
-        chunks = process_pdf(
-            text=pdf_content,
+class UploadError(Exception):
+    def __init__(self, message: str, status_code: int = 400):
+        self.message = message
+        self.status_code = status_code
+        super().__init__(self.message)
+
+_extract_pool: Optional[ProcessPoolExecutor] = None
+_extract_pool_pid: Optional[int] = None
+_extract_pool_lock = threading.Lock()
+# Weaviate batches are written from a single thread
+upload_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingest-upload")
+
+def get_extract_pool() -> ProcessPoolExecutor:
+    global _extract_pool, _extract_pool_pid
+    with _extract_pool_lock:
+        if _extract_pool is None or _extract_pool_pid != os.getpid():
+            # spawn: forking a process that runs threads can deadlock the children
+            _extract_pool = ProcessPoolExecutor(
+                max_workers=INGEST_PROCESSES,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            _extract_pool_pid = os.getpid()
+        return _extract_pool
+
+def iter_extracted_pages(path: str) -> Generator[Tuple[int, int, List[str]], None, None]:
+    """Yield (pages done, total pages, page texts) in page order while later pages are still extracting"""
+    total_pages = count_pdf_pages(path)
+    pool = get_extract_pool()
+    futures = [
+        pool.submit(extract_pdf_pages, path, start, start + INGEST_PAGES_PER_TASK)
+        for start in range(0, total_pages, INGEST_PAGES_PER_TASK)
+    ]
+    pages_done = 0
+    try:
+        for future in futures:
+            pages = future.result()
+            pages_done += len(pages)
+            yield pages_done, total_pages, pages
+    finally:
+        for future in futures:
+            future.cancel()
+
+def chunk_hash(content: str) -> str:
+    """Stable hash identifying a chunk by its text"""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+def get_file_chunk_hashes(file_id: str) -> Dict[str, int]:
+    """
+    Get the content hashes of the documents stored for a file.
+
+    Pages through the hashes in order (keyset on content_hash), so files with
+    more chunks than the query limit are listed completely.
+
+    Returns:
+        Dict of content hash -> number of documents with that hash
+    """
+    hashes: Dict[str, int] = {}
+    last_hash = None
+    while True:
+        filters = Filter.by_property("file_id").equal(file_id)
+        if last_hash is not None:
+            filters = filters & Filter.by_property("content_hash").greater_than(last_hash)
+        documents = search_non_vector_collection(
+            collection_name=COLLECTION_DOCUMENTS,
+            limit=INGEST_HASH_PAGE_SIZE,
+            properties=["content_hash"],
+            filters=filters,
+            sort=Sort.by_property("content_hash", ascending=True)
         )
-        file_id = create_file(File(
-            name=file.filename,
-            path=file.filename,
-            author=author
-        ))
-        if not file_id:
-            raise Exception("Failed to create file")
-        # Convert chunks to a serializable format
-        serialized_chunks = [
-            {
-                "content": chunk.page_content,
-                "title": file.filename,
+        for document in documents:
+            if document.get("content_hash"):
+                hashes[document["content_hash"]] = hashes.get(document["content_hash"], 0) + 1
+        if len(documents) < INGEST_HASH_PAGE_SIZE:
+            return hashes
+        last_hash = documents[-1]["content_hash"]
+
+def delete_file_chunks(file_id: str, hashes: List[str]) -> None:
+    """Delete the documents of a file whose content hash is in hashes"""
+    for start in range(0, len(hashes), INGEST_HASH_PAGE_SIZE):
+        delete_collection_objects_many(
+            collection_name=COLLECTION_DOCUMENTS,
+            filters=Filter.by_property("file_id").equal(file_id)
+            & Filter.by_property("content_hash").contains_any(hashes[start:start + INGEST_HASH_PAGE_SIZE])
+        )
+
+def window_text(carry: str, pages: List[str]) -> str:
+    """Text of a window of pages, after the chunk carried over from the previous window"""
+    # The carried chunk has no trailing whitespace: without a separator its
+    # last sentence would run into the first word of the window
+    text = "".join(page + "\n\n" for page in pages)
+    return f"{carry}\n\n{text}" if carry else text
+
+def get_or_create_file(filename: str, author: str, file_id: Optional[str] = None) -> Tuple[str, bool]:
+    """
+    Get the file being revised, or create a new one.
+
+    A file is only revised when its id is given explicitly: files with the
+    same name can be different documents, possibly from different authors.
+
+    Returns:
+        Tuple of (file_id, created)
+    """
+    if file_id:
+        file = get_file_by_id(file_id)
+        if file.author != author:
+            raise Exception(f"File {file_id} belongs to another author")
+        update_collection_object(
+            collection_name=COLLECTION_FILES,
+            uuid=file_id,
+            properties={"updated_at": datetime.now().strftime("%Y-%m-%dT%H:%M:%SZ")}
+        )
+        return file_id, False
+
+    file_id = create_file(File(
+        name=filename,
+        path=filename,
+        author=author
+    ))
+    if not file_id:
+        raise Exception("Failed to create file")
+    return file_id, True
+
+def ingest_pdf(file: FileStorage, description: str, author: str, file_id: Optional[str] = None) -> Generator[Dict[str, Any], None, None]:
+    """
+    Ingest one PDF, yielding progress updates.
+
+    Pages are extracted in parallel and chunked a window at a time. The last
+    chunk of each window is carried into the next one, so no chunk is cut at a
+    window boundary. The semantic chunker's breakpoint thresholds are computed
+    per window, so other boundaries can still shift with the window size. Full batches of chunks are uploaded in the
+    background while the rest of the file is processed.
+
+    Without file_id a new file is created. Passing the id of an existing file
+    re-ingests it as a new revision, incrementally: chunks are keyed by
+    content hash, only chunks that are new are embedded and inserted, chunks
+    that disappeared are deleted once the new ones are uploaded, and unchanged
+    chunks keep their stored documents and vectors.
+    """
+    filename = file.filename
+    file_id, created = get_or_create_file(filename, author, file_id)
+
+    existing_hashes: Dict[str, int] = {}
+    if not created:
+        existing_hashes = get_file_chunk_hashes(file_id)
+        stored = get_collection_count(
+            collection_name=COLLECTION_DOCUMENTS,
+            filters=Filter.by_property("file_id").equal(file_id)
+        )
+        if stored > sum(existing_hashes.values()):
+            # Chunks stored before hashing existed cannot be matched: replace them all once
+            print(f"Re-ingesting {filename}: {stored} chunks without content hash, replacing all chunks")
+            delete_collection_objects_many(
+                collection_name=COLLECTION_DOCUMENTS,
+                filters=Filter.by_property("file_id").equal(file_id)
+            )
+            existing_hashes = {}
+
+    progress = {
+        "filename": filename,
+        "file_id": str(file_id),
+        "status": "processing",
+        "pages_done": 0,
+        "total_pages": 0,
+        "num_chunks": 0,
+        "uploaded_chunks": 0,
+        "unchanged_chunks": 0,
+        "deleted_chunks": 0,
+        "failed_objects": 0,
+    }
+    # Only valid when the chunks are embedded with the Documents vectorizer's
+    # model and the vectorizer embeds the content alone, as the app does
+    embed_chunks = embedding_engine.model == EMBEDDING_MODEL and documents_vectorize_content_only()
+    serialized_chunks: List[Dict[str, Any]] = []
+    pending: List[Dict[str, Any]] = []
+    uploads: List[Tuple[int, Future]] = []
+
+    seen_hashes: set = set()
+
+    def add_chunks(texts: List[str]):
+        new_chunks = []
+        for text in texts:
+            content_hash = chunk_hash(text)
+            if content_hash in seen_hashes:
+                continue
+            seen_hashes.add(content_hash)
+            chunk = {
+                "content": text,
+                "title": filename,
                 "file_id": file_id,
                 "description": description,
                 "author": author,
+                "content_hash": content_hash,
             }
-            for chunk in chunks
-        ]
-        results.append({
-            "filename": file.filename,
-            "num_chunks": len(chunks),
-            "chunks": serialized_chunks
-        })
-        
-        failed_objects = upload_documents(serialized_chunks)
+            serialized_chunks.append(chunk)
+            if content_hash in existing_hashes:
+                progress["unchanged_chunks"] += 1
+            else:
+                new_chunks.append(chunk)
+        # Embed the new chunks here so Weaviate stores these vectors instead of
+        # embedding the same text again
+        vectors = embedding_engine.embed([chunk["content"] for chunk in new_chunks]) if new_chunks and embed_chunks else None
+        for i, chunk in enumerate(new_chunks):
+            pending.append({**chunk, "vector": vectors[i].tolist()} if vectors is not None else chunk)
+        progress["num_chunks"] = len(serialized_chunks)
+        while len(pending) >= INGEST_UPLOAD_BATCH_SIZE:
+            batch = pending[:INGEST_UPLOAD_BATCH_SIZE]
+            del pending[:INGEST_UPLOAD_BATCH_SIZE]
+            uploads.append((len(batch), upload_executor.submit(upload_documents, batch)))
 
-        return results, len(failed_objects)
-    
-    return results, 0
+    def collect_uploads(wait: bool):
+        while uploads and (wait or uploads[0][1].done()):
+            size, future = uploads.pop(0)
+            progress["failed_objects"] += len(future.result())
+            progress["uploaded_chunks"] += size
+
+    with tempfile.NamedTemporaryFile(suffix=".pdf") as tmp:
+        file.save(tmp)
+        tmp.flush()
+
+        window: List[str] = []
+        carry = ""
+        for pages_done, total_pages, pages in iter_extracted_pages(tmp.name):
+            window.extend(pages)
+            progress["pages_done"] = pages_done
+            progress["total_pages"] = total_pages
+            if len(window) >= INGEST_CHUNK_WINDOW_PAGES:
+                text = window_text(carry, window)
+                window = []
+                chunks = [chunk.page_content for chunk in process_pdf(text=text)]
+                # The last chunk may continue on the next pages
+                carry = chunks.pop() if chunks else ""
+                add_chunks(chunks)
+            collect_uploads(wait=False)
+            yield dict(progress)
+
+        text = window_text(carry, window)
+        if text.strip():
+            add_chunks([chunk.page_content for chunk in process_pdf(text=text)])
+        if pending:
+            uploads.append((len(pending), upload_executor.submit(upload_documents, list(pending))))
+            pending.clear()
+        collect_uploads(wait=True)
+
+    # Only after the new chunks are in, so searches never miss the file's content
+    removed_hashes = [content_hash for content_hash in existing_hashes if content_hash not in seen_hashes]
+    if removed_hashes:
+        delete_file_chunks(file_id, removed_hashes)
+        progress["deleted_chunks"] = sum(existing_hashes[content_hash] for content_hash in removed_hashes)
+
+    progress["status"] = "completed"
+    progress["chunks"] = serialized_chunks
+    yield progress
+
+def validate_upload(files: List[FileStorage], file_id: Optional[str] = None):
+    """Raise UploadError if the upload cannot be ingested, before any work starts"""
+    if not files:
+        raise UploadError("No files uploaded")
+    if file_id and len(files) > 1:
+        raise UploadError("Only one file can be uploaded as a revision of an existing file")
+    for file in files:
+        if not allowed_file(file.filename):
+            raise UploadError(f"File type not allowed for {file.filename}. Only PDF files are accepted.")
+
+def ingest_files(files: List[FileStorage], description: str, author: str, file_id: Optional[str] = None) -> Generator[Dict[str, Any], None, None]:
+    """
+    Ingest several PDFs concurrently, yielding progress updates per file as
+    they happen. The last update of each file has status completed or failed.
+
+    file_id re-ingests an existing file as a new revision; only one file can
+    be uploaded with it.
+    """
+    validate_upload(files, file_id)
+
+    updates: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue()
+
+    def run(file: FileStorage):
+        try:
+            for update in ingest_pdf(file, description, author, file_id):
+                updates.put(update)
+        except Exception as e:
+            updates.put({"filename": file.filename, "status": "failed", "error": str(e)})
+        finally:
+            updates.put(None)
+
+    with ThreadPoolExecutor(max_workers=INGEST_FILE_CONCURRENCY, thread_name_prefix="ingest-file") as executor:
+        for file in files:
+            executor.submit(run, file)
+        remaining = len(files)
+        while remaining:
+            update = updates.get()
+            if update is None:
+                remaining -= 1
+            else:
+                yield update
+
+def upload_file(files: List[FileStorage], description: str, author: str, file_id: Optional[str] = None) -> Tuple[List[dict], int]:
+    results = []
+    failed_objects = 0
+    for update in ingest_files(files, description, author, file_id):
+        if update["status"] == "completed":
+            results.append({
+                "filename": update["filename"],
+                "num_chunks": update["num_chunks"],
+                "chunks": update["chunks"]
+            })
+            failed_objects += update["failed_objects"]
+        elif update["status"] == "failed":
+            raise Exception(f"Error processing {update['filename']}: {update['error']}")
+
+    return results, failed_objects
 
 # manage files
-def get_files(limit: int, offset: int) -> tuple[List[Dict[str, Any]], int]:
+def get_files(limit: int, offset: int, cursor: Optional[str] = None) -> tuple[List[Dict[str, Any]], int, Optional[str]]:
     """
     Get all files with pagination and total count
+
+    Returns:
+        Tuple of (files, total_count, cursor for the next page)
     """
     # Get files data
-    files = search_non_vector_collection(
+    files, next_cursor = search_collection_page(
         collection_name=COLLECTION_FILES,
         limit=limit,    
         offset=offset,
+        cursor=cursor,
         properties=["name", "path", "author", "created_at", "updated_at"],
-        sort=Sort.by_property("created_at", ascending=True)
+        ascending=True
     )
     
     # Get total count
@@ -72,7 +361,7 @@ def get_files(limit: int, offset: int) -> tuple[List[Dict[str, Any]], int]:
     )
     
     files = [File(**file) for file in files]
-    return files, total_count
+    return files, total_count, next_cursor
 
 def create_file(file: File) -> str:
     """
@@ -220,21 +509,22 @@ def delete_file(file_id: str) -> bool:
 
 # manage documents 
 
-def get_documents(limit: int, offset: int) -> tuple[List[Dict[str, Any]], int]:
+def get_documents(limit: int, offset: int, cursor: Optional[str] = None) -> tuple[List[Dict[str, Any]], int, Optional[str]]:
     """
     Get all documents with pagination and total count
     
     Returns:
-        Tuple of (documents, total_count)
+        Tuple of (documents, total_count, cursor for the next page)
     """
     try:
         # Get documents data
-        documents = search_non_vector_collection(
+        documents, next_cursor = search_collection_page(
             collection_name=COLLECTION_DOCUMENTS,
             limit=limit,
             offset=offset,
+            cursor=cursor,
             properties=["title", "content", "description", "author", "created_at", "updated_at"],
-            sort=Sort.by_property("created_at", ascending=True)
+            ascending=True
         )
         
         # Get total count
@@ -242,7 +532,9 @@ def get_documents(limit: int, offset: int) -> tuple[List[Dict[str, Any]], int]:
             collection_name=COLLECTION_DOCUMENTS
         )
         
-        return documents, total_count
+        return documents, total_count, next_cursor
+    except CursorError:
+        raise
     except Exception as e:
         raise Exception(f"Error getting documents: {str(e)}")
 